@@ -0,0 +1,124 @@
+"""
+Micro-benchmark de normalizacion.py frente a las versiones que había
+repartidas por los spiders (split de "APELLIDOS, NOMBRE" en línea, cadenas
+de .replace() y re.sub sin precompilar).
+
+Mide µs por llamada con la caché fría (cadenas nunca vistas) y caliente
+(las mismas cadenas repetidas, como los jugadores de una temporada), y
+comprueba que los resultados son idénticos.
+
+Uso (desde Scraper/):
+    python -m bench.bench_normalizacion
+    python -m bench.bench_normalizacion --cadenas 50000 --repeticiones 20
+"""
+import argparse
+import random
+import re
+import time
+
+from scraping.futbol_scraper import normalizacion
+
+
+# -----------------------------
+# VERSIONES ANTERIORES
+# -----------------------------
+def separar_nombre_antes(texto):
+    if "," in texto:
+        partes = [p.strip() for p in texto.split(',')]
+        apellidos = partes[0]
+        nombre = partes[1]
+    else:
+        apellidos = ""
+        nombre = texto
+    return nombre, apellidos
+
+
+def slug_competicion_antes(nombre):
+    return (
+        nombre.lower()
+        .replace(" ", "-")
+        .replace("ó", "o")
+        .replace("ò", "o")
+        .replace("ú", "u")
+        .replace("ù", "u")
+        .replace("í", "i")
+        .replace("ì", "i")
+        .replace("é", "e")
+        .replace("è", "e")
+        .replace("à", "a")
+    )
+
+
+def slug_club_de_equipo_antes(equipo_slug):
+    return re.sub(r"-(?:[a-h]|u\d+)$", "", equipo_slug)
+
+
+# -----------------------------
+# DATOS
+# -----------------------------
+SILABAS = ["mar", "tí", "gar", "cí", "a", "lo", "pez", "ro", "ca", "sàn", "chez", "ber", "nat", "jor", "di", "pè", "re"]
+
+
+def palabra(rnd):
+    return "".join(rnd.choice(SILABAS) for _ in range(rnd.randint(2, 4))).upper()
+
+
+def generar(n, rnd):
+    nombres = [f"{palabra(rnd)} {palabra(rnd)}, {palabra(rnd)}" for _ in range(n)]
+    competiciones = [f"Primera Divisió Juvenil Grup {palabra(rnd).lower()} S{rnd.randint(10, 19)}"
+                     for _ in range(n)]
+    equipos = [f"{palabra(rnd).lower()}-cf-{rnd.choice('abcdu')}" for _ in range(n)]
+    return {"separar_nombre": nombres, "slug_competicion": competiciones, "slug_club_de_equipo": equipos}
+
+
+CASOS = {
+    "separar_nombre": (separar_nombre_antes, normalizacion.separar_nombre, normalizacion.separar_nombres),
+    "slug_competicion": (slug_competicion_antes, normalizacion.slug_competicion, normalizacion.slugs_competicion),
+    "slug_club_de_equipo": (slug_club_de_equipo_antes, normalizacion.slug_club_de_equipo, None),
+}
+
+
+def cronometrar(funcion, cadenas, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for cadena in cadenas:
+            funcion(cadena)
+    return 1e6 * (time.perf_counter() - inicio) / (len(cadenas) * repeticiones)
+
+
+def cronometrar_lote(funcion, cadenas, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion(cadenas)
+    return 1e6 * (time.perf_counter() - inicio) / (len(cadenas) * repeticiones)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark de normalizacion.py")
+    parser.add_argument("--cadenas", type=int, default=20000, help="Cadenas distintas por caso")
+    parser.add_argument("--repeticiones", type=int, default=10,
+                        help="Veces que se repite cada cadena (caché caliente)")
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+
+    datos = generar(args.cadenas, random.Random(args.semilla))
+
+    print(f"{'función':<22} {'antes µs':>9} {'fría µs':>9} {'caliente µs':>12} {'lote µs':>9} {'x caliente':>11}")
+    for nombre, (antes, ahora, lote) in CASOS.items():
+        cadenas = datos[nombre]
+        assert [antes(c) for c in cadenas] == [ahora(c) for c in cadenas], nombre
+
+        ahora.cache_clear()
+        t_antes = cronometrar(antes, cadenas, args.repeticiones)
+        t_fria = cronometrar(ahora, cadenas, 1)
+        t_caliente = cronometrar(ahora, cadenas, args.repeticiones)
+        t_lote = cronometrar_lote(lote, cadenas, args.repeticiones) if lote else None
+
+        print(
+            f"{nombre:<22} {t_antes:>9.3f} {t_fria:>9.3f} {t_caliente:>12.3f} "
+            f"{t_lote if t_lote is not None else float('nan'):>9.3f} {t_antes / t_caliente:>10.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
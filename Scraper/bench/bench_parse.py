@@ -0,0 +1,335 @@
+"""
+Benchmark de los callbacks de parseo de los spiders.
+
+Mide páginas/segundo, tiempo por helper, memoria pico de cada callback y
+memoria retenida por item
+sobre las páginas de `bench/fixtures/` o sobre un corpus grabado con
+`cli.py scrape ... --grabar DIR` (caché HTTP de Scrapy).
+
+Uso (desde Scraper/):
+    python -m bench.bench_parse
+    python -m bench.bench_parse --iteraciones 500 --json resultados.json
+    python -m bench.bench_parse --corpus .scrapy/httpcache --casos acta
+    python -m bench.bench_parse --comparar resultados_base.json
+    python -m bench.bench_parse --casos acta --procesos 1 2 4 8
+    python -m bench.bench_parse --backend lxml --comparar resultados_selector.json
+"""
+import argparse
+import contextlib
+import gzip
+import json
+import os
+import pickle
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+
+# Los spiders importan db.config, pero el benchmark no toca la BD
+os.environ.setdefault("DB_PORT", "5432")
+
+from scrapy.http import HtmlResponse, Request
+from scrapy.utils.test import get_crawler
+
+from scraping.futbol_scraper.parseo_en_procesos import crear_pool
+from scraping.futbol_scraper.spiders.actas_spider import ActasSpider, parsear_acta_aislada
+from scraping.futbol_scraper.spiders.calendario_spider import CalendarioSpider
+from scraping.futbol_scraper.spiders.campos_spider import CamposSpider
+from scraping.futbol_scraper.spiders.clubes_spider import ClubesSpider
+from scraping.futbol_scraper.spiders.equipos_spider import EquiposSpider
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+# caso: spider, callback, fixture, meta/cb_kwargs de la petición, helpers
+# que se cronometran por separado y, si lo hay, el parser para el pool de
+# procesos (--procesos)
+CASOS = {
+    "acta": {
+        "spider": ActasSpider,
+        "callback": "parse_acta",
+        "fixture": "acta.html",
+        "meta": {"id_grupo": 1, "id_local": 10, "id_visitante": 20},
+        "cb_kwargs": {},
+        "helpers": ["parse_jugadores", "parse_equip_tecnic", "parse_goles",
+                    "parse_tarjetas", "extraer_estado", "normalizar_escudo",
+                    "parse_jugadores_lxml", "parse_equip_tecnic_lxml", "parse_goles_lxml",
+                    "parse_tarjetas_lxml"],
+        "aislada": parsear_acta_aislada,
+    },
+    "calendari": {
+        "spider": CalendarioSpider,
+        "callback": "parse_calendari",
+        "fixture": "calendari.html",
+        "meta": {"id_grupo": 1, "competicion_slug": "primera-catalana-juvenil", "numero_grupo": 1},
+        "cb_kwargs": {},
+        "helpers": [],
+    },
+    "classificacio": {
+        "spider": EquiposSpider,
+        "callback": "parse_grupo_page",
+        "fixture": "classificacio.html",
+        "meta": {},
+        "cb_kwargs": {"id_grupo": 1},
+        "helpers": ["filas_clasificacion", "extraer_nivel", "derive_club_slug"],
+    },
+    "club": {
+        "spider": ClubesSpider,
+        "callback": "parse_club",
+        "fixture": "club.html",
+        "meta": {"slug_original": "club-cf", "slug_usable": "club-cf"},
+        "cb_kwargs": {},
+        "helpers": ["extraer_valor", "normalizar_delegacion"],
+    },
+    "camp": {
+        "spider": CamposSpider,
+        "callback": "parse_campos",
+        "fixture": "camp.html",
+        "meta": {"codigo": ("1234",)},
+        "cb_kwargs": {},
+        "helpers": [],
+    },
+}
+
+
+def _leer(ruta):
+    datos = ruta.read_bytes()
+    return gzip.decompress(datos) if datos[:2] == b"\x1f\x8b" else datos
+
+
+def cargar_corpus(directorio, nombre_spider):
+    """
+    Devuelve [(url, body)] de las respuestas 200 guardadas por
+    FilesystemCacheStorage en `directorio/<nombre_spider>/`.
+    """
+    paginas = []
+    for meta in sorted((Path(directorio) / nombre_spider).glob("*/*/pickled_meta")):
+        datos = pickle.loads(_leer(meta))
+        if datos.get("status") != 200:
+            continue
+        paginas.append((datos["response_url"], _leer(meta.parent / "response_body")))
+    return paginas
+
+
+def paginas_del_caso(caso, corpus):
+    if corpus:
+        return cargar_corpus(corpus, caso["spider"].name)
+    url = f"https://www.fcf.cat/{caso['fixture'].removesuffix('.html')}"
+    return [(url, (FIXTURES / caso["fixture"]).read_bytes())]
+
+
+def crear_spider(caso, backend="selector"):
+    """Spider enlazado a un crawler (stats, settings), sin arrancar nada."""
+    crawler = get_crawler(caso["spider"], {"FCF_EXTRACCION": backend})
+    return caso["spider"].from_crawler(crawler)
+
+
+def instrumentar(spider, helpers, tiempos):
+    """Sustituye cada helper del spider por una versión cronometrada."""
+    for nombre in helpers:
+        original = getattr(spider, nombre)
+
+        def cronometrado(*args, _original=original, _nombre=nombre, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return _original(*args, **kwargs)
+            finally:
+                tiempos[_nombre]["segundos"] += time.perf_counter() - inicio
+                tiempos[_nombre]["llamadas"] += 1
+
+        setattr(spider, nombre, cronometrado)
+
+
+def salida_del_callback(resultado):
+    """
+    Lo que devuelve un callback como lista. Los asíncronos (parse_club) solo
+    esperan a la BD en casos que el benchmark no provoca (un 404), así que
+    se consumen sin event loop: si llegaran a esperar algo, error.
+    """
+    if not hasattr(resultado, "__aiter__"):
+        return resultado
+
+    async def todo():
+        return [item async for item in resultado]
+
+    corrutina = todo()
+    try:
+        corrutina.send(None)
+    except StopIteration as fin:
+        return fin.value
+    corrutina.close()
+    raise RuntimeError("El callback espera a algo fuera del parseo")
+
+
+def ejecutar(spider, caso, paginas, iteraciones, guardar=None):
+    """
+    Ejecuta el callback sobre todas las páginas; devuelve nº de items. Con
+    `guardar` (una lista), los items se quedan en ella.
+    """
+    callback = getattr(spider, caso["callback"])
+    items = 0
+    for _ in range(iteraciones):
+        for url, body in paginas:
+            # Respuesta nueva cada vez: el Selector se cachea en la respuesta
+            request = Request(url, meta=dict(caso["meta"]))
+            response = HtmlResponse(url, body=body, encoding="utf-8", request=request)
+            for item in salida_del_callback(callback(response, **caso["cb_kwargs"])):
+                items += 1
+                if guardar is not None:
+                    guardar.append(item)
+    return items
+
+
+def medir(nombre, caso, iteraciones, corpus, backend="selector"):
+    paginas = paginas_del_caso(caso, corpus)
+    if not paginas:
+        return None
+
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        # 1) Rendimiento sin instrumentar
+        spider = crear_spider(caso, backend)
+        ejecutar(spider, caso, paginas, 1)  # calentamiento
+        inicio = time.perf_counter()
+        items = ejecutar(spider, caso, paginas, iteraciones)
+        segundos = time.perf_counter() - inicio
+
+        # 2) Tiempo por helper
+        tiempos = defaultdict(lambda: {"llamadas": 0, "segundos": 0.0})
+        spider = crear_spider(caso, backend)
+        instrumentar(spider, caso["helpers"], tiempos)
+        ejecutar(spider, caso, paginas, iteraciones)
+
+        # 3) Memoria pico de una pasada
+        spider = crear_spider(caso, backend)
+        tracemalloc.start()
+        ejecutar(spider, caso, paginas, 1)
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # 4) Memoria que siguen ocupando los items (lo que pesa un item
+        # mientras espera en la cola de los pipelines), con el spider ya
+        # caliente para no contar sus cachés
+        retenidos = []
+        tracemalloc.start()
+        ejecutar(spider, caso, paginas, iteraciones, guardar=retenidos)
+        actual, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    total_paginas = len(paginas) * iteraciones
+    return {
+        "paginas": total_paginas,
+        "items": items,
+        "segundos": segundos,
+        "paginas_por_segundo": total_paginas / segundos if segundos else 0.0,
+        "ms_por_pagina": 1000 * segundos / total_paginas,
+        "memoria_pico_kb": pico / 1024,
+        "bytes_por_item": actual / len(retenidos) if retenidos else 0.0,
+        "helpers": {
+            helper: {
+                "llamadas": datos["llamadas"],
+                "segundos": datos["segundos"],
+                "us_por_llamada": 1e6 * datos["segundos"] / datos["llamadas"] if datos["llamadas"] else 0.0,
+            }
+            for helper, datos in tiempos.items()
+        },
+    }
+
+
+def medir_pool(caso, paginas, iteraciones, procesos, backend="selector"):
+    """Páginas/segundo del caso parseado en un pool de `procesos` procesos."""
+    trabajos = [(url, body, "utf-8", dict(caso["meta"]), backend) for url, body in paginas] * iteraciones
+    with crear_pool(procesos) as pool:
+        # Calentamiento: arrancar los procesos e importar los spiders
+        list(pool.map(caso["aislada"], *zip(*trabajos[:2 * procesos])))
+
+        inicio = time.perf_counter()
+        for _ in pool.map(caso["aislada"], *zip(*trabajos), chunksize=8):
+            pass
+        segundos = time.perf_counter() - inicio
+
+    return {
+        "segundos": segundos,
+        "paginas_por_segundo": len(trabajos) / segundos if segundos else 0.0,
+    }
+
+
+def commit_actual():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def imprimir(resultados, base=None):
+    print(f"{'caso':<14} {'págs':>7} {'págs/s':>10} {'ms/pág':>8} {'pico KB':>9} {'B/item':>8}  {'vs base':>8}")
+    for nombre, r in resultados["casos"].items():
+        delta = ""
+        if base and nombre in base.get("casos", {}):
+            anterior = base["casos"][nombre]["paginas_por_segundo"]
+            if anterior:
+                delta = f"{100 * (r['paginas_por_segundo'] / anterior - 1):+.1f}%"
+        print(
+            f"{nombre:<14} {r['paginas']:>7} {r['paginas_por_segundo']:>10.1f} "
+            f"{r['ms_por_pagina']:>8.3f} {r['memoria_pico_kb']:>9.1f} {r.get('bytes_por_item', 0):>8.0f}  {delta:>8}"
+        )
+        for helper, h in sorted(r["helpers"].items(), key=lambda t: -t[1]["segundos"]):
+            print(f"    {helper:<22} {h['llamadas']:>8} llamadas {h['us_por_llamada']:>9.1f} µs/llamada")
+        for procesos, p in r.get("pool", {}).items():
+            escala = p["paginas_por_segundo"] / r["paginas_por_segundo"] if r["paginas_por_segundo"] else 0.0
+            print(f"    pool de {procesos:>2} procesos {p['paginas_por_segundo']:>10.1f} págs/s  (x{escala:.2f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de parseo de los spiders")
+    parser.add_argument("--iteraciones", type=int, default=200)
+    parser.add_argument("--casos", nargs="+", choices=list(CASOS), default=list(CASOS))
+    parser.add_argument("--corpus", metavar="DIR",
+                        help="Corpus grabado (HTTPCACHE_DIR) en vez de las fixtures")
+    parser.add_argument("--json", metavar="FICHERO", help="Guardar los resultados en JSON")
+    parser.add_argument("--comparar", metavar="FICHERO", help="JSON de una ejecución anterior")
+    parser.add_argument("--backend", choices=["selector", "lxml"], default="selector",
+                        help="Backend de extracción de los spiders")
+    parser.add_argument("--procesos", type=int, nargs="+", metavar="N", default=[],
+                        help="Medir también el parseo en un pool de N procesos (casos que lo admiten)")
+    args = parser.parse_args()
+
+    resultados = {
+        "commit": commit_actual(),
+        "python": platform.python_version(),
+        "iteraciones": args.iteraciones,
+        "backend": args.backend,
+        "corpus": args.corpus,
+        "casos": {},
+    }
+    for nombre in args.casos:
+        r = medir(nombre, CASOS[nombre], args.iteraciones, args.corpus, args.backend)
+        if r is None:
+            print(f"[BENCH] Sin páginas para '{nombre}', se omite", file=sys.stderr)
+            continue
+        if args.procesos and CASOS[nombre].get("aislada"):
+            paginas = paginas_del_caso(CASOS[nombre], args.corpus)
+            r["pool"] = {
+                procesos: medir_pool(CASOS[nombre], paginas, args.iteraciones, procesos, args.backend)
+                for procesos in args.procesos
+            }
+        resultados["casos"][nombre] = r
+
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+
+    imprimir(resultados, base)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark de resolucion_clubes.IndiceSlugs.
+
+Indexa los slugs de club de SLUGS_CLUB_WEB (los destinos) junto con N slugs
+de relleno, y mide:
+  - cuántos de los mapeos escritos a mano resuelve solo el índice
+  - falsos positivos: slugs que no existen y aun así se resuelven
+  - µs por resolución (slug desconocido) y tiempo de construir el índice
+
+Uso (desde Scraper/):
+    python -m bench.bench_resolucion_clubes
+    python -m bench.bench_resolucion_clubes --clubes 5000 --repeticiones 200
+"""
+import argparse
+import random
+import time
+
+from scraping.futbol_scraper.normalizacion import SLUGS_CLUB_WEB
+from scraping.futbol_scraper.resolucion_clubes import IndiceSlugs
+
+# Slugs de relleno con la forma de los reales: tipo de entidad + población
+# (sílabas al azar) y a veces un añadido ("sant-feliu-guixols-ue", "ce-manlleu-b")
+ENTIDADES = ["cf", "ue", "cd", "at", "fc", "ce", "club-esportiu", "escola-futbol", "penya", "ud", "ae"]
+PREFIJOS = ["", "", "", "sant-", "santa-", "vila-", "la-", "les-", "el-"]
+SILABAS = ["bar", "ce", "lo", "na", "gi", "ro", "ta", "rra", "gon", "man", "lleu", "vic", "ma", "ta",
+           "ró", "ter", "ras", "sa", "ba", "dell", "reus", "fi", "gue", "res", "ol", "ot", "blan", "es"]
+AÑADIDOS = ["", "", "", "-b", "-fundacio", "-1920", "-atletic", "-unio"]
+
+
+def club_aleatorio(rnd):
+    poblacion = "".join(rnd.choice(SILABAS) for _ in range(rnd.randint(2, 4))).replace("ó", "o")
+    entidad = rnd.choice(ENTIDADES)
+    nombre = f"{rnd.choice(PREFIJOS)}{poblacion}"
+    partes = [nombre, entidad] if rnd.random() < 0.7 else [entidad, nombre]
+    return "-".join(partes) + rnd.choice(AÑADIDOS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del índice de slugs de club")
+    parser.add_argument("--clubes", type=int, default=2500, help="Slugs de relleno en el índice")
+    parser.add_argument("--repeticiones", type=int, default=100)
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.semilla)
+    relleno = {club_aleatorio(rnd) for _ in range(args.clubes)}
+
+    inicio = time.perf_counter()
+    indice = IndiceSlugs(list(relleno) + list(SLUGS_CLUB_WEB.values()))
+    t_indice = time.perf_counter() - inicio
+
+    aciertos = 0
+    for origen, destino in SLUGS_CLUB_WEB.items():
+        resuelto = indice.resolver(origen)
+        aciertos += resuelto == destino
+        marca = "OK" if resuelto == destino else "--"
+        print(f"  {marca} {origen:<34} → {resuelto}")
+
+    inexistentes = [s for s in (club_aleatorio(rnd) for _ in range(1000)) if s not in relleno]
+    falsos = sum(indice.resolver(s) is not None for s in inexistentes)
+
+    consultas = list(SLUGS_CLUB_WEB) * args.repeticiones
+    inicio = time.perf_counter()
+    for slug in consultas:
+        indice.resolver(slug)
+    t_consulta = 1e6 * (time.perf_counter() - inicio) / len(consultas)
+
+    print(f"[BENCH] índice: {len(indice)} slugs en {1000 * t_indice:.1f} ms")
+    print(f"[BENCH] mapeos manuales resueltos: {aciertos}/{len(SLUGS_CLUB_WEB)}")
+    print(f"[BENCH] resueltos sin existir: {falsos}/{len(inexistentes)} (a una edición de otro, "
+          f"o las mismas palabras en otro orden: indistinguibles de un cambio real de slug)")
+    print(f"[BENCH] resolución: {t_consulta:.1f} µs por slug")
+
+
+if __name__ == "__main__":
+    main()
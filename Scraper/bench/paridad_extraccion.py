@@ -0,0 +1,77 @@
+"""
+Paridad entre los backends de extracción "selector" y "lxml": ejecuta cada
+callback con los dos sobre las mismas páginas y compara los items.
+
+Uso (desde Scraper/):
+    python -m bench.paridad_extraccion
+    python -m bench.paridad_extraccion --corpus .scrapy/httpcache
+
+Sale con código 1 si algún item difiere. tests/test_paridad_extraccion.py
+hace la misma comparación con pytest.
+"""
+import argparse
+import contextlib
+import os
+import sys
+
+from scrapy.http import HtmlResponse, Request
+
+from bench.bench_parse import CASOS, crear_spider, paginas_del_caso, salida_del_callback
+
+# Casos con backend lxml
+CASOS_PARIDAD = ["acta", "calendari", "classificacio"]
+
+
+def items_de(spider, caso, url, body):
+    request = Request(url, meta=dict(caso["meta"]))
+    response = HtmlResponse(url, body=body, encoding="utf-8", request=request)
+    callback = getattr(spider, caso["callback"])
+    return [dict(item) for item in salida_del_callback(callback(response, **caso["cb_kwargs"]))]
+
+
+def comparar(nombre, corpus, max_diferencias):
+    caso = CASOS[nombre]
+    paginas = paginas_del_caso(caso, corpus)
+    selector = crear_spider(caso, "selector")
+    lxml = crear_spider(caso, "lxml")
+
+    diferencias = 0
+    items = 0
+    for url, body in paginas:
+        with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+            esperados = items_de(selector, caso, url, body)
+            obtenidos = items_de(lxml, caso, url, body)
+        items += len(esperados)
+        if esperados == obtenidos:
+            continue
+
+        diferencias += 1
+        if diferencias <= max_diferencias:
+            print(f"[PARIDAD] {nombre}: {url}")
+            if len(esperados) != len(obtenidos):
+                print(f"    {len(esperados)} items con selector, {len(obtenidos)} con lxml")
+            for esperado, obtenido in zip(esperados, obtenidos):
+                for campo in sorted(set(esperado) | set(obtenido)):
+                    if esperado.get(campo) != obtenido.get(campo):
+                        print(f"    {campo}: {esperado.get(campo)!r} != {obtenido.get(campo)!r}")
+
+    print(f"[PARIDAD] {nombre:<14} {len(paginas):>6} páginas {items:>7} items  "
+          f"{'OK' if not diferencias else f'{diferencias} páginas distintas'}")
+    return diferencias
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paridad de los backends de extracción")
+    parser.add_argument("--casos", nargs="+", choices=CASOS_PARIDAD, default=CASOS_PARIDAD)
+    parser.add_argument("--corpus", metavar="DIR",
+                        help="Corpus grabado (HTTPCACHE_DIR) en vez de las fixtures")
+    parser.add_argument("--max-diferencias", type=int, default=5,
+                        help="Páginas distintas que se detallan por caso")
+    args = parser.parse_args()
+
+    diferencias = sum(comparar(nombre, args.corpus, args.max_diferencias) for nombre in args.casos)
+    sys.exit(1 if diferencias else 0)
+
+
+if __name__ == "__main__":
+    main()
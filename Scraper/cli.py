@@ -1,10 +1,27 @@
 import argparse
+import contextlib
 import os
+import socket
+import time
+from datetime import date
 from pathlib import Path
 
 from scrapy.crawler import CrawlerProcess
+from twisted.internet import threads
+from twisted.internet.defer import Deferred, DeferredList, succeed
+from twisted.python.failure import Failure
 from scrapy.utils.project import get_project_settings
+from scrapy.utils.reactor import install_reactor
 
+from db.checkpoints import etapa_completada
+from db.connection import sesion
+from db.esquema import asegurar_checkpoints, asegurar_leases_shards
+from db.shards import (
+    marcar_etapa, reiniciar_si_terminada, renovar_lease, shards_sin_etapas, terminar_lease,
+    tomar_lease, tomar_shard_libre,
+)
+
+from scraping.futbol_scraper.shards import leer_shard
 from scraping.futbol_scraper.spiders.competiciones_spider import CompeticionesSpider
 from scraping.futbol_scraper.spiders.grupos_spider import GruposSpider
 from scraping.futbol_scraper.spiders.equipos_spider import EquiposSpider
@@ -13,11 +30,19 @@ from scraping.futbol_scraper.spiders.calendario_spider import CalendarioSpider
 from scraping.futbol_scraper.spiders.actas_spider import ActasSpider
 from scraping.futbol_scraper.spiders.campos_spider import CamposSpider
 
-from db.connection import get_connection
-
 BASE_DIR = Path(__file__).resolve().parent
 
-def get_process():
+SPIDERS = {
+    "competiciones": CompeticionesSpider,
+    "grupos": GruposSpider,
+    "equipos": EquiposSpider,
+    "clubes": ClubesSpider,
+    "calendarios": CalendarioSpider,
+    "actas": ActasSpider,
+    "campos": CamposSpider,
+}
+
+def get_process(ajustes=None):
     """Crea un CrawlerProcess con los settings del proyecto."""
     # 1) Decirle a Scrapy dónde está el settings.py
     os.environ.setdefault("SCRAPY_SETTINGS_MODULE", "scraping.futbol_scraper.settings")
@@ -27,6 +52,14 @@ def get_process():
 
     # 3) Cargar settings del proyecto
     settings = get_project_settings()
+    if ajustes:
+        settings.update(ajustes, priority="cmdline")
+
+    # DebugPrintPipeline no está en la cadena por defecto: vuelca cada item entero
+    if settings.getbool("FCF_DEBUG_ITEMS"):
+        pipelines = settings.getdict("ITEM_PIPELINES")
+        pipelines["scraping.futbol_scraper.pipelines.DebugPrintPipeline"] = 100
+        settings.set("ITEM_PIPELINES", pipelines, priority="cmdline")
 
     # Debug opcional para comprobar que está leyendo bien:
     print("[SETTINGS] BOT_NAME:", settings.get("BOT_NAME"))
@@ -35,35 +68,175 @@ def get_process():
     # 4) Crear el proceso con esos settings
     return CrawlerProcess(settings)
 
-def run_competiciones_spider():
-    process = get_process()
-    process.crawl(CompeticionesSpider)
-    process.start()
+def ajustes_grabacion(directorio):
+    """Guarda las respuestas en `directorio` (corpus para --replay)."""
+    return {"HTTPCACHE_DIR": str(Path(directorio).resolve())}
+
+def ajustes_replay(directorio):
+    """
+    Sirve todas las respuestas desde un corpus grabado (caché HTTP
+    comprimida, indexada por fingerprint de la petición) sin tocar fcf.cat:
+    lo que no está en el corpus se ignora y no hay throttling.
+    """
+    return {
+        "HTTPCACHE_ENABLED": True,
+        "HTTPCACHE_DIR": str(Path(directorio).resolve()),
+        "HTTPCACHE_POLICY": "scrapy.extensions.httpcache.DummyPolicy",
+        "HTTPCACHE_IGNORE_MISSING": True,
+        "DOWNLOAD_DELAY": 0,
+        "CONCURRENT_REQUESTS": 64,
+        "CONCURRENT_REQUESTS_PER_DOMAIN": 64,
+    }
+
+def ajustes_reanudar(nombre):
+    """
+    Ejecución reanudable: los pipelines marcan su progreso en
+    checkpoints_crawl y los spiders se saltan lo ya terminado.
+    """
+    return {"FCF_REANUDAR": nombre}
+
+def jobdir(nombre, spider):
+    """
+    JOBDIR (cola de peticiones y dupefilter persistentes) de un spider en la
+    ejecución `nombre`, o None si el spider siembra desde los checkpoints.
+
+    En esos (actas, calendario) el dupefilter guardaría la huella de cada
+    petición al encolarla: tras un corte, las que estaban en vuelo o en la
+    cola del pipeline se descartarían como repetidas al volver a sembrarlas,
+    y sus filas se perderían. La cola guardada, en cambio, las duplicaría.
+    """
+    if getattr(spider, "siembra_desde_checkpoints", False):
+        return None
+    return str(BASE_DIR / ".scrapy" / "jobs" / nombre / spider.name)
+
+def etapa_ya_completada(nombre, spider):
+    with sesion("cli") as conn:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            asegurar_checkpoints(cur)
+            return etapa_completada(cur, nombre, spider.name)
+
+def nodo_actual():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def tomar_shard(texto, ejecucion, nodo, nueva=False):
+    """
+    Toma el lease del shard pedido ("i/N") o del primero libre ("auto/N").
+    Devuelve (i, N), o None si el shard es de otro nodo vivo o no queda
+    ninguno libre.
+
+    Con `nueva` (sin --resume), si la pasada anterior con esta clave ya
+    terminó en todos los shards, se empieza otra en vez de no encontrar
+    ningún shard libre.
+    """
+    os.environ.setdefault("SCRAPY_SETTINGS_MODULE", "scraping.futbol_scraper.settings")
+    ttl = get_project_settings().getint("FCF_SHARD_TTL", 300)
 
-def run_grupos_spider(codigo_competicion):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute('SELECT codigo_web FROM public.competiciones WHERE codigo_web IS NOT NULL;')
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+    indice, total = leer_shard(texto)
+    with sesion("cli") as conn:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            asegurar_leases_shards(cur)
+            if nueva and reiniciar_si_terminada(cur, ejecucion, total):
+                print(f"[CLI] La pasada anterior de '{ejecucion}' ({total} shards) terminó: empieza una nueva")
+            if indice is None:
+                indice = tomar_shard_libre(cur, ejecucion, total, nodo, ttl)
+                if indice is None:
+                    return None
+            elif not tomar_lease(cur, ejecucion, indice, total, nodo, ttl):
+                return None
+    return indice, total
 
-    codigos = [r[0] for r in rows]
-    print(f"[CLI] Voy a generar grupos para {len(codigos)} competiciones")
+def ajustes_shard(indice, total, ejecucion, nodo):
+    return {
+        "FCF_SHARD": f"{indice}/{total}",
+        "FCF_SHARD_EJECUCION": ejecucion,
+        "FCF_SHARD_NODO": nodo,
+    }
 
-    # 2) Lanzar un spider por cada competición
-    process = get_process()
+def terminar_shard(indice, total, ejecucion, nodo):
+    """
+    Marca el shard como terminado. Si el lease se perdió o se liberó porque
+    algún spider no acabó bien, no se marca y otro nodo lo puede retomar.
+    """
+    with sesion("cli") as conn:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            return terminar_lease(cur, ejecucion, indice, total, nodo)
 
-    for codigo in codigos:
-        process.crawl(
-            GruposSpider,
-            codigo_competicion=str(codigo),
-        )
+def terminar_etapa_shard(shard, etapa):
+    indice, total, ejecucion, _ = shard
+    with sesion("cli") as conn:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            marcar_etapa(cur, ejecucion, total, indice, etapa)
 
+def shards_pendientes(shard, etapas):
+    """
+    Shards que aún no han terminado `etapas`. De paso renueva el lease de
+    este nodo, que mientras espera no tiene ningún spider dando latidos.
+    """
+    indice, total, ejecucion, nodo = shard
+    with sesion("cli") as conn:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            if not renovar_lease(cur, ejecucion, indice, total, nodo):
+                raise RuntimeError(f"lease del shard {indice}/{total} perdido")
+            return shards_sin_etapas(cur, ejecucion, total, etapas)
+
+def esperar_shards(shard, etapas, intervalo):
+    """
+    Deferred que salta cuando todos los shards han terminado `etapas`. Cada
+    etapa reparte por una clave distinta (código de competición, id_grupo,
+    slug...), así que sus datos de entrada son los de todos los nodos. Si un
+    nodo muere, se espera a que otro tome su shard (auto/N) y lo termine.
+    """
+    from twisted.internet import reactor
+
+    listo = Deferred()
+
+    def comprobar():
+        d = threads.deferToThread(shards_pendientes, shard, etapas)
+        d.addCallbacks(ver, listo.errback)
+
+    def ver(faltan):
+        if not faltan:
+            listo.callback(None)
+            return
+        print(f"[CLI][ALL] Esperando a los shards {faltan} ({', '.join(etapas)})")
+        reactor.callLater(intervalo, comprobar)
+
+    comprobar()
+    return listo
+
+def parar_reactor(_=None):
+    """Para el reactor en cuanto esté en marcha (callback de un Deferred)."""
+    from twisted.internet import reactor
+
+    def parar():
+        # Ya parado o parándose (Ctrl+C)
+        with contextlib.suppress(RuntimeError):
+            reactor.stop()
+
+    reactor.callWhenRunning(parar)
+
+def run_competiciones_spider(ajustes=None):
+    process = get_process(ajustes)
+    process.crawl(CompeticionesSpider)
+    process.start()
+
+def run_grupos_spider(codigos_competicion=None, ajustes=None):
+    # Un único crawler para todas las competiciones: el spider lee los
+    # códigos de la BD si no se le pasan
+    process = get_process(ajustes)
+    process.crawl(
+        GruposSpider,
+        codigos_competicion=codigos_competicion,
+    )
     process.start()
 
-def run_equipos_spider(temporada="2025-26", temporada_ruta="2526", tipo="futbol-11"):
-    process = get_process()
+def run_equipos_spider(temporada="2025-26", temporada_ruta="2526", tipo="futbol-11", ajustes=None):
+    process = get_process(ajustes)
     process.crawl(
         EquiposSpider,
         temporada=temporada,
@@ -72,38 +245,161 @@ def run_equipos_spider(temporada="2025-26", temporada_ruta="2526", tipo="futbol-
     )
     process.start()
 
-def run_clubes_spider(temporada_ruta="2526"):
-    process = get_process()
+def run_clubes_spider(temporada_ruta="2526", ajustes=None):
+    process = get_process(ajustes)
     process.crawl(
         ClubesSpider,
         temporada_ruta=temporada_ruta,
     )
     process.start()
 
-def run_calendario_spider(temporada_ruta="2526"):
-    process = get_process()
+def run_calendario_spider(temporada_ruta="2526", ajustes=None):
+    process = get_process(ajustes)
     process.crawl(
         CalendarioSpider,
         temporada_ruta=temporada_ruta,
     )
     process.start()
 
-def run_acta_spider(temporada_ruta="2526", toda_temporada=False):
-    process = get_process()
+def run_acta_spider(temporada_ruta="2526", toda_temporada=False, desde=None, hasta=None, ajustes=None):
+    process = get_process(ajustes)
     process.crawl(
         ActasSpider,
         temporada_ruta=temporada_ruta,
-        toda_temporada=toda_temporada
+        toda_temporada=toda_temporada,
+        desde=desde,
+        hasta=hasta,
     )
     process.start()
 
-def run_campo_spider():
-    process = get_process()
+def run_campo_spider(ajustes=None):
+    process = get_process(ajustes)
     process.crawl(
         CamposSpider
     )
     process.start()
 
+def run_todo(temporada="2025-26", temporada_ruta="2526", tipo="futbol-11", toda_temporada=False,
+             desde=None, hasta=None, reanudar=None, ajustes=None, shard=None):
+    """
+    Ejecuta todas las etapas en un único reactor como un DAG: cada etapa
+    arranca en cuanto terminan sus dependencias, así que `clubes` corre en
+    paralelo a `calendarios → actas → campos`.
+
+    Con `reanudar`, cada etapa tiene su propio JOBDIR (salvo las que
+    siembran desde los checkpoints, ver jobdir) y las que ya se completaron
+    en esa ejecución se saltan.
+
+    Con `shard` (indice, total, ejecucion, nodo) las dependencias de una
+    etapa tienen que estar terminadas en todos los shards, no solo en este
+    (ver esperar_shards).
+    """
+    # etapa: (dependencias, spider, kwargs)
+    etapas = {
+        "competiciones": ([], CompeticionesSpider, {}),
+        "grupos": (["competiciones"], GruposSpider, {}),
+        "equipos": (["grupos"], EquiposSpider, {
+            "temporada": temporada, "temporada_ruta": temporada_ruta, "tipo": tipo,
+        }),
+        "clubes": (["equipos"], ClubesSpider, {"temporada_ruta": temporada_ruta}),
+        "calendarios": (["equipos"], CalendarioSpider, {"temporada_ruta": temporada_ruta}),
+        "actas": (["calendarios"], ActasSpider, {
+            "temporada_ruta": temporada_ruta, "toda_temporada": toda_temporada,
+            "desde": desde, "hasta": hasta,
+        }),
+        "campos": (["actas"], CamposSpider, {}),
+    }
+
+    process = get_process(ajustes)
+    # Scrapy instala el reactor al crear el primer crawler. Con --resume o
+    # --shard antes hay un deferToThread(), que si no hay ninguno instala el
+    # de por defecto: se instala ya el de los settings
+    install_reactor(process.settings["TWISTED_REACTOR"], process.settings["ASYNCIO_EVENT_LOOP"])
+
+    inicio_total = time.monotonic()
+    tiempos = {}
+    fin = {etapa: Deferred() for etapa in etapas}
+
+    espera = process.settings.getfloat("FCF_SHARD_ESPERA", 30)
+
+    def lanzar(_, etapa):
+        dependencias, spider, _ = etapas[etapa]
+        d = succeed(False)
+        if shard and dependencias:
+            d = esperar_shards(shard, dependencias, espera)
+            d.addCallback(lambda _: False)
+        if reanudar:
+            # La consulta va a un hilo: el reactor puede estar moviendo otras etapas
+            d.addCallback(lambda _: threads.deferToThread(etapa_ya_completada, reanudar, spider))
+        d.addCallback(arrancar, etapa)
+        d.addErrback(fin[etapa].errback)
+        return d
+
+    def etapa_terminada(etapa):
+        if not shard:
+            fin[etapa].callback(None)
+            return
+        d = threads.deferToThread(terminar_etapa_shard, shard, etapa)
+        d.addCallbacks(lambda _: fin[etapa].callback(None), fin[etapa].errback)
+
+    def arrancar(completada, etapa):
+        _, spider, kwargs = etapas[etapa]
+
+        if completada:
+            print(f"[CLI][ALL] Etapa {etapa} ya completada en '{reanudar}', se salta")
+            etapa_terminada(etapa)
+            return
+
+        inicio = time.monotonic()
+        print(f"[CLI][ALL] Arranca etapa {etapa}")
+
+        def terminar(resultado):
+            tiempos[etapa] = (inicio - inicio_total, time.monotonic() - inicio_total)
+            print(f"[CLI][ALL] Etapa {etapa} terminada en {time.monotonic() - inicio:.1f}s")
+            motivo = crawler.stats.get_value("finish_reason")
+            if isinstance(resultado, Failure):
+                fin[etapa].errback(resultado)
+            elif shard and motivo != "finished":
+                # Etapa a medias en este shard: los demás no pueden contar con ella
+                fin[etapa].errback(Failure(RuntimeError(f"etapa {etapa} cerrada con '{motivo}'")))
+            else:
+                etapa_terminada(etapa)
+
+        # Cada crawler lleva su copia de los settings: el JOBDIR es solo suyo
+        crawler = process.create_crawler(spider)
+        directorio = jobdir(reanudar, spider) if reanudar else None
+        if directorio:
+            crawler.settings.set("JOBDIR", directorio, priority="cmdline")
+
+        d = process.crawl(crawler, **kwargs)
+        d.addBoth(terminar)
+        return d
+
+    def abortar(fallo, etapa):
+        print(f"[CLI][ALL] Etapa {etapa} NO se ejecuta: falló una dependencia ({fallo.value})")
+        fin[etapa].errback(fallo)
+
+    for etapa, (dependencias, _, _) in etapas.items():
+        if not dependencias:
+            lanzar(None, etapa)
+            continue
+        d = DeferredList([fin[dep] for dep in dependencias], fireOnOneErrback=True, consumeErrors=True)
+        d.addCallbacks(lanzar, abortar, callbackArgs=(etapa,), errbackArgs=(etapa,))
+
+    # El reactor vive hasta que todas las etapas terminan (o se saltan). Con
+    # process.start() a secas se pararía en cuanto no queda ningún crawler
+    # activo, y entre etapas puede no haberlo: mientras se consulta la BD en
+    # un hilo (--resume, fin de etapa con --shard) o se espera a los shards
+    # (los fallos ya se han informado; consumeErrors: que no queden sin gestionar)
+    todas = DeferredList(list(fin.values()), consumeErrors=True)
+    todas.addBoth(parar_reactor)
+
+    process.start(stop_after_crawl=False)
+
+    print(f"[CLI][ALL] Tiempo total: {time.monotonic() - inicio_total:.1f}s")
+    for etapa, (inicio, final) in sorted(tiempos.items(), key=lambda t: t[1][0]):
+        print(f"[CLI][ALL]   {etapa:<14} {inicio:8.1f}s → {final:8.1f}s  ({final - inicio:.1f}s)")
+
 
 def main():
     parser = argparse.ArgumentParser()
@@ -111,34 +407,122 @@ def main():
 
     scrape_parser = subparsers.add_parser("scrape")
     scrape_parser.add_argument("target", choices=["competiciones", "grupos", "equipos", 
-                                                  "clubes", "calendarios", "actas", "campos"])
+                                                  "clubes", "calendarios", "actas", "campos",
+                                                  "all"])
 
     scrape_parser.add_argument("--temporada", default="2025-26")
     scrape_parser.add_argument("--temporada_ruta", default="2526")
     scrape_parser.add_argument("--tipo", default="futbol-11")
     scrape_parser.add_argument("--toda_temporada", action="store_true")
+    scrape_parser.add_argument("--desde", type=date.fromisoformat, metavar="AAAA-MM-DD",
+                               help="Actas: solo partidos jugados desde esta fecha")
+    scrape_parser.add_argument("--hasta", type=date.fromisoformat, metavar="AAAA-MM-DD",
+                               help="Actas: solo partidos jugados hasta esta fecha")
+    scrape_parser.add_argument("--resume", metavar="NOMBRE",
+                               help="Ejecución reanudable: si se corta, relanzar con el mismo NOMBRE "
+                                    "continúa donde se quedó")
+    scrape_parser.add_argument("--shard", metavar="i/N",
+                               help="Procesar solo la partición i de N (o auto/N: la primera libre); "
+                                    "con --resume, cada shard reanuda lo suyo")
+    scrape_parser.add_argument("--backend", choices=["selector", "lxml"],
+                               help="Backend de extracción de actas, equipos y calendario")
+    scrape_parser.add_argument("--procesos-parseo", type=int, metavar="N",
+                               help="Actas: parsear en N procesos (por defecto, en el reactor)")
+    scrape_parser.add_argument("--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                               help="Nivel de log (por defecto, LOG_LEVEL de settings.py)")
+    scrape_parser.add_argument("--debug-items", action="store_true",
+                               help="Volcar cada item entero al log (DebugPrintPipeline)")
+    scrape_parser.add_argument("--replay", metavar="DIR",
+                               help="Servir las respuestas desde un corpus grabado, sin red")
+    scrape_parser.add_argument("--grabar", metavar="DIR",
+                               help="Grabar las respuestas en DIR para usarlas con --replay")
     args = parser.parse_args()
 
 
     if args.command == "scrape":
+        ajustes = {}
+        if args.grabar:
+            ajustes.update(ajustes_grabacion(args.grabar))
+        if args.replay:
+            ajustes.update(ajustes_replay(args.replay))
+        if args.backend:
+            ajustes["FCF_EXTRACCION"] = args.backend
+        if args.procesos_parseo is not None:
+            ajustes["ACTAS_PROCESOS_PARSEO"] = args.procesos_parseo
+        if args.log_level:
+            ajustes["LOG_LEVEL"] = args.log_level
+        if args.debug_items:
+            ajustes["FCF_DEBUG_ITEMS"] = True
+
+        reanudar = args.resume
+        shard = None
+        if args.shard:
+            ejecucion = args.resume or "defecto"
+            nodo = nodo_actual()
+            shard = tomar_shard(args.shard, ejecucion, nodo, nueva=not args.resume)
+            if shard is None:
+                print(f"[CLI] Ningún shard disponible para '{args.shard}' en '{ejecucion}'")
+                return
+            print(f"[CLI] Nodo {nodo} procesa el shard {shard[0]}/{shard[1]}")
+            ajustes.update(ajustes_shard(*shard, ejecucion, nodo))
+            # Cada shard lleva sus propios checkpoints y JOBDIR: que un shard
+            # termine una etapa no significa que los demás la hayan terminado
+            if reanudar:
+                reanudar = f"{reanudar}-shard{shard[0]}de{shard[1]}"
+
+        if reanudar:
+            ajustes.update(ajustes_reanudar(reanudar))
+
+            if args.target != "all":
+                spider = SPIDERS[args.target]
+                if etapa_ya_completada(reanudar, spider):
+                    print(f"[CLI] {args.target} ya completado en '{reanudar}'")
+                    if shard:
+                        terminar_shard(*shard, ejecucion, nodo)
+                    return
+                directorio = jobdir(reanudar, spider)
+                if directorio:
+                    ajustes["JOBDIR"] = directorio
+
         if args.target == "competiciones":
-            run_competiciones_spider()
+            run_competiciones_spider(ajustes=ajustes)
         elif args.target == "grupos":
-            run_grupos_spider() 
+            run_grupos_spider(ajustes=ajustes) 
         elif args.target == "equipos":
             run_equipos_spider(
                 temporada=args.temporada,
                 temporada_ruta=args.temporada_ruta,
                 tipo=args.tipo,
+                ajustes=ajustes,
             )
         elif args.target == "clubes":
-            run_clubes_spider(temporada_ruta=args.temporada_ruta) 
+            run_clubes_spider(temporada_ruta=args.temporada_ruta, ajustes=ajustes) 
         elif args.target == "calendarios":
-            run_calendario_spider() 
+            run_calendario_spider(ajustes=ajustes) 
         elif args.target == "actas":
-            run_acta_spider(temporada_ruta=args.temporada_ruta, toda_temporada=args.toda_temporada) 
+            run_acta_spider(temporada_ruta=args.temporada_ruta, toda_temporada=args.toda_temporada,
+                            desde=args.desde, hasta=args.hasta, ajustes=ajustes) 
         elif args.target == "campos":
-            run_campo_spider() 
+            run_campo_spider(ajustes=ajustes) 
+        elif args.target == "all":
+            run_todo(
+                temporada=args.temporada,
+                temporada_ruta=args.temporada_ruta,
+                tipo=args.tipo,
+                toda_temporada=args.toda_temporada,
+                desde=args.desde,
+                hasta=args.hasta,
+                reanudar=reanudar,
+                ajustes=ajustes,
+                shard=(*shard, ejecucion, nodo) if shard else None,
+            )
+
+        if shard:
+            if terminar_shard(*shard, ejecucion, nodo):
+                print(f"[CLI] Shard {shard[0]}/{shard[1]} terminado")
+            else:
+                print(f"[CLI] Shard {shard[0]}/{shard[1]} no se marca como terminado "
+                      f"(lease perdido o liberado): otro nodo lo puede retomar")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,55 @@
+from collections import OrderedDict
+
+
+class CacheIdentidades:
+    """
+    Mapa en memoria clave natural → id, con tamaño máximo y expulsión LRU.
+    Se precarga con una sola SELECT y se mantiene al día con cada INSERT.
+    """
+
+    def __init__(self, nombre, max_entradas=100000):
+        self.nombre = nombre
+        self.max_entradas = max_entradas
+        self.entradas = OrderedDict()
+
+        self.aciertos = 0
+        self.fallos = 0
+
+    def precargar(self, cur, sql):
+        """
+        `sql` debe devolver filas (*clave, id) de la más reciente a la más
+        antigua y terminar en `LIMIT %s`, que se rellena con `max_entradas`:
+        así solo viajan las filas que caben. Se insertan de la más antigua a
+        la más reciente, de modo que las recientes quedan como las últimas
+        usadas y son las últimas en expulsarse.
+        """
+        cur.execute(sql, (self.max_entradas,))
+        filas = cur.fetchall()
+        for *clave, id_ in reversed(filas):
+            self.guardar(tuple(clave), id_)
+        return len(self.entradas)
+
+    def get(self, clave):
+        id_ = self.entradas.get(clave)
+        if id_ is None:
+            self.fallos += 1
+            return None
+
+        self.aciertos += 1
+        self.entradas.move_to_end(clave)
+        return id_
+
+    def guardar(self, clave, id_):
+        self.entradas[clave] = id_
+        self.entradas.move_to_end(clave)
+        if len(self.entradas) > self.max_entradas:
+            self.entradas.popitem(last=False)
+
+    def descartar(self, clave):
+        """Olvida una clave (p.ej. un id cuyo INSERT se ha deshecho)."""
+        self.entradas.pop(clave, None)
+
+    def volcar_estadisticas(self, stats, prefijo):
+        stats.set_value(f"{prefijo}/{self.nombre}/aciertos", self.aciertos)
+        stats.set_value(f"{prefijo}/{self.nombre}/fallos", self.fallos)
+        stats.set_value(f"{prefijo}/{self.nombre}/entradas", len(self.entradas))
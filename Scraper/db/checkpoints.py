@@ -0,0 +1,37 @@
+"""
+Checkpoints de las ejecuciones reanudables (tabla checkpoints_crawl, ver
+esquema.asegurar_checkpoints). La etapa es el nombre del spider.
+"""
+
+ETAPA_COMPLETA = "*"
+
+
+def clave_checkpoint(*partes):
+    return ":".join(str(p) for p in partes)
+
+
+def cargar_checkpoints(cur, ejecucion, etapa):
+    """Claves de las unidades ya terminadas de la etapa."""
+    cur.execute(
+        'SELECT clave FROM public.checkpoints_crawl '
+        'WHERE ejecucion = %s AND etapa = %s AND clave <> %s',
+        (ejecucion, etapa, ETAPA_COMPLETA),
+    )
+    return {row[0] for row in cur.fetchall()}
+
+
+def marcar_checkpoint(cur, ejecucion, etapa, clave=ETAPA_COMPLETA):
+    cur.execute(
+        'INSERT INTO public.checkpoints_crawl (ejecucion, etapa, clave) '
+        'VALUES (%s, %s, %s) ON CONFLICT DO NOTHING',
+        (ejecucion, etapa, clave),
+    )
+
+
+def etapa_completada(cur, ejecucion, etapa):
+    cur.execute(
+        'SELECT 1 FROM public.checkpoints_crawl '
+        'WHERE ejecucion = %s AND etapa = %s AND clave = %s',
+        (ejecucion, etapa, ETAPA_COMPLETA),
+    )
+    return cur.fetchone() is not None
@@ -9,4 +9,13 @@ DB_CONFIG = {
     "dbname": os.getenv("DB_NAME"),
     "user": os.getenv("DB_USER"),
     "password": os.getenv("DB_PASSWORD"),
-}
\ No newline at end of file
+}
+
+# Pool de conexiones compartido por todos los spiders y pipelines del proceso
+DB_POOL = {
+    "min": int(os.getenv("DB_POOL_MIN", 1)),
+    "max": int(os.getenv("DB_POOL_MAX", 10)),
+    # Segundos máximos esperando una conexión libre antes de dar error
+    "espera_max": float(os.getenv("DB_POOL_ESPERA_MAX", 30)),
+    "statement_timeout_ms": int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 300000)),
+}
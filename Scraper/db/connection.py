@@ -1,8 +1,14 @@
+import threading
+import time
+from contextlib import contextmanager
+
 import psycopg2
-from .config import DB_CONFIG
+from psycopg2 import pool
+from .config import DB_CONFIG, DB_POOL
 
 
 def get_connection():
+    """Conexión suelta, fuera del pool. Para scripts puntuales."""
     conn = psycopg2.connect(
         host=DB_CONFIG["host"],
         port=DB_CONFIG["port"],
@@ -10,4 +16,135 @@ def get_connection():
         user=DB_CONFIG["user"],
         password=DB_CONFIG["password"],
     )
-    return conn
\ No newline at end of file
+    return conn
+
+
+# ----------------------------------
+# POOL COMPARTIDO DEL PROCESO
+# ----------------------------------
+
+_pool = None
+_lock = threading.Lock()
+_huecos = threading.BoundedSemaphore(DB_POOL["max"])
+
+_metricas = {
+    "checkouts": 0,
+    "en_uso": 0,
+    "espera_total_s": 0.0,
+    "espera_max_s": 0.0,
+    "descartadas": 0,
+}
+
+
+def _get_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = pool.ThreadedConnectionPool(
+                DB_POOL["min"],
+                DB_POOL["max"],
+                host=DB_CONFIG["host"],
+                port=DB_CONFIG["port"],
+                dbname=DB_CONFIG["dbname"],
+                user=DB_CONFIG["user"],
+                password=DB_CONFIG["password"],
+                options=f"-c statement_timeout={DB_POOL['statement_timeout_ms']}",
+            )
+        return _pool
+
+
+def _esta_viva(conn):
+    if conn.closed:
+        return False
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def obtener_conexion(etapa=None):
+    """
+    Saca una conexión del pool, esperando si están todas en uso. La conexión
+    sale comprobada, sin transacción abierta, con autocommit desactivado y
+    con application_name = "futbol_scraper:<etapa>".
+    Hay que devolverla con liberar_conexion().
+
+    Bloquea hasta DB_POOL_ESPERA_MAX segundos: desde el reactor (start() de
+    un spider, callbacks, extensiones) se llama a través de hilos.en_hilo.
+    """
+    inicio = time.perf_counter()
+    if not _huecos.acquire(timeout=DB_POOL["espera_max"]):
+        raise pool.PoolError(
+            f"No hay conexiones libres tras {DB_POOL['espera_max']}s (DB_POOL_MAX={DB_POOL['max']})"
+        )
+    espera = time.perf_counter() - inicio
+
+    try:
+        p = _get_pool()
+        conn = p.getconn()
+        conn.autocommit = True
+        if not _esta_viva(conn):
+            with _lock:
+                _metricas["descartadas"] += 1
+            p.putconn(conn, close=True)
+            conn = p.getconn()
+            conn.autocommit = True
+
+        # En autocommit para que el SET no dependa de ninguna transacción
+        with conn.cursor() as cur:
+            cur.execute("SET application_name = %s", (f"futbol_scraper:{etapa or 'general'}",))
+        conn.autocommit = False
+    except Exception:
+        _huecos.release()
+        raise
+
+    with _lock:
+        _metricas["checkouts"] += 1
+        _metricas["en_uso"] += 1
+        _metricas["espera_total_s"] += espera
+        _metricas["espera_max_s"] = max(_metricas["espera_max_s"], espera)
+
+    return conn
+
+
+def liberar_conexion(conn):
+    """Devuelve la conexión al pool, deshaciendo lo que no se haya confirmado."""
+    cerrar = bool(conn.closed)
+    if not cerrar:
+        try:
+            if not conn.autocommit:
+                conn.rollback()
+            conn.autocommit = False
+        except psycopg2.Error:
+            cerrar = True
+
+    _get_pool().putconn(conn, close=cerrar)
+    _huecos.release()
+
+    with _lock:
+        _metricas["en_uso"] -= 1
+
+
+@contextmanager
+def sesion(etapa=None):
+    """
+    with sesion("acta") as conn: ...
+    Saca una conexión del pool y la devuelve al salir.
+    """
+    conn = obtener_conexion(etapa)
+    try:
+        yield conn
+    finally:
+        liberar_conexion(conn)
+
+
+def metricas_pool():
+    with _lock:
+        return dict(_metricas)
+
+
+def volcar_metricas_pool(stats, prefijo="bd/pool"):
+    for nombre, valor in metricas_pool().items():
+        stats.set_value(f"{prefijo}/{nombre}", round(valor, 4) if isinstance(valor, float) else valor)
@@ -0,0 +1,101 @@
+import time
+from collections import defaultdict
+
+from psycopg2.extras import execute_values
+
+
+class BufferEscritura:
+    """
+    Buffer de escritura diferida: acumula filas por tabla y las vuelca en
+    bloque (un INSERT multi-fila por tabla). toca_volcar() dice cuándo: al
+    superar un número de filas pendientes o un tiempo máximo desde el último
+    volcado. La transacción (y su commit o rollback) es cosa de quien llama.
+    """
+
+    def __init__(self, conn, max_filas=2000, max_segundos=30):
+        self.conn = conn
+        self.max_filas = max_filas
+        self.max_segundos = max_segundos
+
+        self.sql_tablas = {}
+        self.filas = {}
+        self.vistas = {}
+
+        self.ultimo_volcado = time.monotonic()
+        self.estadisticas = defaultdict(lambda: {"filas": 0, "segundos": 0.0, "volcados": 0})
+
+    def registrar_tabla(self, tabla, sql):
+        """
+        `sql` debe contener un único `VALUES %s` (formato de execute_values).
+        """
+        self.sql_tablas[tabla] = sql
+        self.filas[tabla] = []
+        self.vistas[tabla] = set()
+
+    def añadir(self, tabla, fila):
+        # Filas idénticas dentro del mismo volcado solo se escriben una vez
+        if fila in self.vistas[tabla]:
+            return
+        self.vistas[tabla].add(fila)
+        self.filas[tabla].append(fila)
+
+    def pendientes(self):
+        return sum(len(filas) for filas in self.filas.values())
+
+    def marca(self):
+        """Posición actual del buffer, para deshacer con deshacer(marca)."""
+        return {tabla: len(filas) for tabla, filas in self.filas.items()}
+
+    def deshacer(self, marca):
+        """Quita las filas añadidas desde `marca` (p.ej. si su transacción falló)."""
+        for tabla, n in marca.items():
+            for fila in self.filas[tabla][n:]:
+                self.vistas[tabla].discard(fila)
+            del self.filas[tabla][n:]
+
+    def toca_volcar(self):
+        return (
+            self.pendientes() >= self.max_filas
+            or time.monotonic() - self.ultimo_volcado >= self.max_segundos
+        )
+
+    def volcar(self):
+        """
+        Escribe todas las filas pendientes. Si falla, las filas siguen ahí:
+        tras el rollback, quien llama las quita con deshacer() o repite el
+        volcado.
+        """
+        tiempos = {}
+        with self.conn.cursor() as cur:
+            for tabla, sql in self.sql_tablas.items():
+                filas = self.filas[tabla]
+                if not filas:
+                    continue
+
+                inicio = time.perf_counter()
+                execute_values(cur, sql, filas, page_size=len(filas))
+                tiempos[tabla] = time.perf_counter() - inicio
+
+        for tabla, segundos in tiempos.items():
+            stats = self.estadisticas[tabla]
+            stats["filas"] += len(self.filas[tabla])
+            stats["segundos"] += segundos
+            stats["volcados"] += 1
+
+            self.filas[tabla] = []
+            self.vistas[tabla] = set()
+
+        self.ultimo_volcado = time.monotonic()
+
+    def resumen(self):
+        """
+        Devuelve {tabla: {"filas", "segundos", "volcados", "filas_por_segundo"}}.
+        """
+        resumen = {}
+        for tabla, stats in self.estadisticas.items():
+            segundos = stats["segundos"]
+            resumen[tabla] = {
+                **stats,
+                "filas_por_segundo": stats["filas"] / segundos if segundos else 0.0,
+            }
+        return resumen
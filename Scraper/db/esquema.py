@@ -0,0 +1,145 @@
+"""
+Cambios de esquema idempotentes que necesitan los pipelines. Se ejecutan al
+abrir cada spider, así que todo debe poder lanzarse varias veces.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def asegurar_huellas_actas(cur):
+    # Huella (hash) del último acta escrito para cada partido
+    cur.execute(
+        'ALTER TABLE public.partidos ADD COLUMN IF NOT EXISTS huella_acta text'
+    )
+
+
+# Índices únicos de los upserts de EquiposYClubesPostgresPipeline:
+# nombre → (tabla, expresión de la clave, filas que cuentan: los NULL no chocan)
+INDICES_UNICOS_EQUIPOS = {
+    "clubes_slug_uniq": ("clubes", "slug", "slug IS NOT NULL"),
+    "equipos_club_grupo_nivel_uniq": (
+        "equipos", "id_club, id_grupo, (COALESCE(nivel, 1))", "id_club IS NOT NULL AND id_grupo IS NOT NULL",
+    ),
+}
+
+
+def asegurar_secuencias_equipos(cur):
+    """
+    Secuencias para id_club / id_equipo e índices únicos para los upserts
+    de EquiposYClubesPostgresPipeline. La secuencia se deja en el máximo
+    entre su valor y el MAX() de la tabla, nunca retrocede, así que varios
+    procesos pueden arrancar a la vez sin repartirse los mismos ids.
+
+    Un índice único no se puede crear si la tabla ya tiene claves
+    repetidas: en ese caso se avisa con algunos ejemplos y no se crea.
+    Devuelve el conjunto de índices únicos disponibles.
+    """
+    for tabla, columna in (("clubes", "id_club"), ("equipos", "id_equipo")):
+        secuencia = f"public.{tabla}_{columna}_seq"
+        cur.execute(f"CREATE SEQUENCE IF NOT EXISTS {secuencia}")
+        # Con is_called = true el siguiente nextval es el valor + 1 (también
+        # en una secuencia recién creada, cuyo last_value es 1 sin usar)
+        cur.execute(f"""
+            SELECT setval('{secuencia}', GREATEST(t.m, (SELECT last_value FROM {secuencia})), true)
+            FROM (SELECT MAX({columna}) AS m FROM public.{tabla}) t
+        """)
+
+    disponibles = set()
+    for indice, (tabla, clave, filtro) in INDICES_UNICOS_EQUIPOS.items():
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL", (f"public.{indice}",))
+        if cur.fetchone()[0]:
+            disponibles.add(indice)
+            continue
+
+        cur.execute(f"""
+            SELECT {clave}, COUNT(*) FROM public.{tabla}
+            WHERE {filtro}
+            GROUP BY {clave} HAVING COUNT(*) > 1
+            ORDER BY COUNT(*) DESC LIMIT 10
+        """)
+        repetidas = cur.fetchall()
+        if repetidas:
+            logger.error(
+                "[ESQUEMA] No se crea %s: %s tiene claves repetidas (%s). Ejemplos: %s",
+                indice, tabla, clave, repetidas,
+            )
+            continue
+
+        cur.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {indice} ON public.{tabla} ({clave})")
+        disponibles.add(indice)
+
+    return disponibles
+
+
+def asegurar_checkpoints(cur):
+    """
+    Progreso de las ejecuciones reanudables (cli.py --resume NOMBRE): una
+    fila por unidad terminada (grupo, partido) y una con clave '*' por
+    etapa completa.
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS public.checkpoints_crawl (
+            ejecucion text NOT NULL,
+            etapa text NOT NULL,
+            clave text NOT NULL,
+            completado timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (ejecucion, etapa, clave)
+        )
+    """)
+
+
+def asegurar_leases_shards(cur):
+    """
+    Leases de los shards de una ejecución repartida entre nodos
+    (cli.py --shard i/N). Un shard es de quien tiene el latido al día; si
+    el nodo muere, pasado el TTL lo puede tomar otro.
+
+    etapas_shards guarda qué etapas de `scrape all` ha terminado cada shard:
+    una etapa no arranca en ningún nodo hasta que todos los shards han
+    terminado sus dependencias.
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS public.leases_shards (
+            ejecucion text NOT NULL,
+            total integer NOT NULL,
+            shard integer NOT NULL,
+            nodo text NOT NULL,
+            latido timestamptz NOT NULL DEFAULT now(),
+            terminado boolean NOT NULL DEFAULT false,
+            PRIMARY KEY (ejecucion, total, shard)
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS public.etapas_shards (
+            ejecucion text NOT NULL,
+            total integer NOT NULL,
+            etapa text NOT NULL,
+            shard integer NOT NULL,
+            terminada timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (ejecucion, total, etapa, shard)
+        )
+    """)
+
+
+def asegurar_slugs_clubes(cur):
+    """
+    Slug con el que la web publica la ficha de cada club (ClubesSpider). El
+    origen dice de dónde salió: 'manual' (mapeos escritos a mano), 'listado'
+    (el mismo slug aparece en el listado de clubes), 'aproximado' (resuelto
+    por parecido con uno del listado y confirmado con el nombre de la ficha)
+    o 'propio' (no estaba en el listado, pero la ficha responde con su slug).
+
+    'sin_resolver' (slug_web NULL) guarda que el club no tiene ficha, con la
+    fecha en `actualizado`, para no volver a buscarla cada vez.
+    """
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS public.slugs_clubes (
+            slug text PRIMARY KEY,
+            slug_web text,
+            origen text NOT NULL,
+            actualizado timestamptz NOT NULL DEFAULT now()
+        )
+    """)
+    # Tablas creadas cuando slug_web era obligatorio
+    cur.execute('ALTER TABLE public.slugs_clubes ALTER COLUMN slug_web DROP NOT NULL')
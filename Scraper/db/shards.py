@@ -0,0 +1,125 @@
+"""
+Leases de shards (tabla leases_shards, ver esquema.asegurar_leases_shards).
+Los shards se numeran de 1 a `total`.
+"""
+
+
+def tomar_lease(cur, ejecucion, shard, total, nodo, ttl):
+    """
+    Toma el shard si está libre, si ya era de este nodo o si su dueño lleva
+    más de `ttl` segundos sin latido. Devuelve True si ahora es nuestro.
+    """
+    cur.execute(
+        '''
+        INSERT INTO public.leases_shards (ejecucion, total, shard, nodo)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT (ejecucion, total, shard) DO UPDATE
+        SET nodo = EXCLUDED.nodo, latido = now()
+        WHERE NOT leases_shards.terminado
+          AND (leases_shards.nodo = EXCLUDED.nodo
+               OR leases_shards.latido < now() - make_interval(secs => %s))
+        RETURNING shard
+        ''',
+        (ejecucion, total, shard, nodo, ttl),
+    )
+    return cur.fetchone() is not None
+
+
+def reiniciar_si_terminada(cur, ejecucion, total):
+    """
+    Si los `total` shards de la ejecución están terminados, esa pasada ya
+    acabó: se borran sus leases y etapas para que la clave sirva para una
+    nueva. Devuelve True si se ha reiniciado.
+    """
+    cur.execute(
+        '''
+        SELECT count(*) = %s
+        FROM public.leases_shards
+        WHERE ejecucion = %s AND total = %s AND terminado
+        ''',
+        (total, ejecucion, total),
+    )
+    if not cur.fetchone()[0]:
+        return False
+    cur.execute(
+        "DELETE FROM public.leases_shards WHERE ejecucion = %s AND total = %s AND terminado",
+        (ejecucion, total),
+    )
+    cur.execute(
+        "DELETE FROM public.etapas_shards WHERE ejecucion = %s AND total = %s",
+        (ejecucion, total),
+    )
+    return True
+
+
+def tomar_shard_libre(cur, ejecucion, total, nodo, ttl):
+    """Primer shard que se pueda tomar (libre o abandonado), o None."""
+    for shard in range(1, total + 1):
+        if tomar_lease(cur, ejecucion, shard, total, nodo, ttl):
+            return shard
+    return None
+
+
+def renovar_lease(cur, ejecucion, shard, total, nodo):
+    """Latido. Devuelve False si el shard ya no es de este nodo."""
+    cur.execute(
+        '''
+        UPDATE public.leases_shards SET latido = now()
+        WHERE ejecucion = %s AND total = %s AND shard = %s AND nodo = %s
+        RETURNING shard
+        ''',
+        (ejecucion, total, shard, nodo),
+    )
+    return cur.fetchone() is not None
+
+
+def liberar_lease(cur, ejecucion, shard, total, nodo):
+    """Suelta el shard sin terminarlo: otro nodo lo puede tomar ya."""
+    cur.execute(
+        '''
+        UPDATE public.leases_shards SET nodo = '', latido = 'epoch'
+        WHERE ejecucion = %s AND total = %s AND shard = %s AND nodo = %s
+        ''',
+        (ejecucion, total, shard, nodo),
+    )
+
+
+def terminar_lease(cur, ejecucion, shard, total, nodo):
+    """Marca el shard como terminado (si sigue siendo de este nodo)."""
+    cur.execute(
+        '''
+        UPDATE public.leases_shards SET terminado = true, latido = now()
+        WHERE ejecucion = %s AND total = %s AND shard = %s AND nodo = %s
+        RETURNING shard
+        ''',
+        (ejecucion, total, shard, nodo),
+    )
+    return cur.fetchone() is not None
+
+
+def marcar_etapa(cur, ejecucion, total, shard, etapa):
+    """El shard ha terminado la etapa (scrape all)."""
+    cur.execute(
+        '''
+        INSERT INTO public.etapas_shards (ejecucion, total, etapa, shard)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT DO NOTHING
+        ''',
+        (ejecucion, total, etapa, shard),
+    )
+
+
+def shards_sin_etapas(cur, ejecucion, total, etapas):
+    """Shards (1..total) a los que aún les falta alguna de `etapas`."""
+    cur.execute(
+        '''
+        SELECT s.shard
+        FROM generate_series(1, %s) AS s(shard)
+        WHERE (SELECT count(*) FROM public.etapas_shards e
+               WHERE e.ejecucion = %s AND e.total = %s
+                 AND e.shard = s.shard AND e.etapa = ANY(%s)) < %s
+        ORDER BY s.shard
+        ''',
+        (total, ejecucion, total, list(etapas), len(etapas)),
+    )
+    return [shard for shard, in cur.fetchall()]
@@ -0,0 +1,69 @@
+"""
+Slugs de la ficha web de cada club (tabla slugs_clubes, ver
+esquema.asegurar_slugs_clubes). Los mapeos 'manual' no se sobrescriben con
+los aprendidos.
+"""
+from psycopg2.extras import execute_values
+
+ORIGEN_MANUAL = "manual"
+ORIGEN_SIN_RESOLVER = "sin_resolver"
+
+
+def cargar_slugs_clubes(cur):
+    """{slug: slug_web} de todos los clubes ya resueltos."""
+    cur.execute('SELECT slug, slug_web FROM public.slugs_clubes WHERE slug_web IS NOT NULL')
+    return dict(cur.fetchall())
+
+
+def cargar_sin_resolver(cur, dias):
+    """Slugs marcados 'sin_resolver' hace menos de `dias` días."""
+    cur.execute(
+        "SELECT slug FROM public.slugs_clubes "
+        "WHERE origen = %s AND actualizado > now() - %s * interval '1 day'",
+        (ORIGEN_SIN_RESOLVER, dias),
+    )
+    return {slug for slug, in cur.fetchall()}
+
+
+def sembrar_slugs_clubes(cur, mapeos):
+    """
+    Mapeos escritos a mano: sustituyen a los aprendidos y a los
+    'sin_resolver'; los 'manual' que ya estén en la tabla se dejan como están.
+    """
+    execute_values(
+        cur,
+        '''
+        INSERT INTO public.slugs_clubes (slug, slug_web, origen) VALUES %s
+        ON CONFLICT (slug) DO UPDATE
+        SET slug_web = EXCLUDED.slug_web, origen = EXCLUDED.origen, actualizado = now()
+        WHERE slugs_clubes.origen <> 'manual'
+        ''',
+        [(slug, slug_web, ORIGEN_MANUAL) for slug, slug_web in mapeos.items()],
+    )
+
+
+def guardar_slugs_clubes(cur, filas):
+    """filas: (slug, slug_web, origen) aprendidos (slug_web None con 'sin_resolver')."""
+    execute_values(
+        cur,
+        '''
+        INSERT INTO public.slugs_clubes (slug, slug_web, origen) VALUES %s
+        ON CONFLICT (slug) DO UPDATE
+        SET slug_web = EXCLUDED.slug_web, origen = EXCLUDED.origen, actualizado = now()
+        WHERE slugs_clubes.origen <> 'manual'
+        ''',
+        filas,
+    )
+
+
+def marcar_sin_resolver(cur, slug):
+    """El club no tiene ficha: no se vuelve a buscar hasta que caduque (cargar_sin_resolver)."""
+    guardar_slugs_clubes(cur, [(slug, None, ORIGEN_SIN_RESOLVER)])
+
+
+def olvidar_slug_club(cur, slug):
+    """Quita un mapeo aprendido que ha dado 404: se volverá a resolver."""
+    cur.execute(
+        "DELETE FROM public.slugs_clubes WHERE slug = %s AND origen <> 'manual'",
+        (slug,),
+    )
@@ -0,0 +1,65 @@
+import logging
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import threads
+
+from db.checkpoints import cargar_checkpoints, marcar_checkpoint
+from db.connection import sesion
+from db.esquema import asegurar_checkpoints
+
+logger = logging.getLogger(__name__)
+
+
+def checkpoints_del_spider(spider):
+    """
+    Claves ya terminadas para este spider en la ejecución FCF_REANUDAR, o
+    un conjunto vacío si no se está reanudando. Bloquea (pide conexión al
+    pool): desde start() se llama con `await en_hilo(checkpoints_del_spider, self)`.
+    """
+    ejecucion = spider.settings.get("FCF_REANUDAR")
+    if not ejecucion:
+        return set()
+
+    with sesion(spider.name) as conn:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            asegurar_checkpoints(cur)
+            completados = cargar_checkpoints(cur, ejecucion, spider.name)
+
+    logger.info("[CHECKPOINT] %s: %d unidades ya terminadas en '%s'", spider.name, len(completados), ejecucion)
+    return completados
+
+
+class CheckpointsEtapa:
+    """
+    Con FCF_REANUDAR (cli.py --resume NOMBRE) marca la etapa del spider como
+    completada cuando el crawl acaba bien, para que al reanudar se salte.
+    """
+
+    def __init__(self, ejecucion):
+        self.ejecucion = ejecucion
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        ejecucion = crawler.settings.get("FCF_REANUDAR")
+        if not ejecucion:
+            raise NotConfigured
+        ext = cls(ejecucion)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_closed(self, spider, reason):
+        if reason != "finished":
+            return None
+        # Fuera del reactor: Scrapy espera al Deferred antes de cerrar
+        return threads.deferToThread(self.marcar_etapa, spider)
+
+    def marcar_etapa(self, spider):
+        with sesion(spider.name) as conn:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                asegurar_checkpoints(cur)
+                marcar_checkpoint(cur, self.ejecucion, spider.name)
+
+        logger.info("[CHECKPOINT] Etapa %s completada en '%s'", spider.name, self.ejecucion)
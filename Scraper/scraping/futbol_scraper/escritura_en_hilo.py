@@ -0,0 +1,94 @@
+import logging
+
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet import threads
+from twisted.python.threadpool import ThreadPool
+
+from .registro import Muestreo
+
+
+class EscrituraEnHilo:
+    """
+    Base de los pipelines de PostgreSQL: las escrituras salen del hilo del
+    reactor y se hacen en un hilo propio del pipeline, de modo que mientras
+    se escribe un acta se sigue descargando y parseando.
+
+    Un solo hilo por pipeline: los items se escriben en el orden en que
+    llegan y la conexión y las cachés del pipeline no se comparten.
+
+    Las subclases definen:
+      - spider_objetivo: nombre del spider al que atienden
+      - abrir(spider), escribir_item(item, spider) y cerrar(spider): en el
+        hilo de escritura (abrir saca la conexión del pool, que puede esperar)
+
+    Si hay PIPELINE_COLA_MAX items esperando a escribirse se pausa el engine
+    (no salen peticiones nuevas) hasta que la cola baja a la mitad.
+
+    Los mensajes por fila van por `self.muestreo` (uno de cada
+    FCF_LOG_MUESTREO); al cerrar, sus contadores quedan en las stats (log/*).
+    """
+
+    spider_objetivo = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        pipeline = cls()
+        pipeline.crawler = crawler
+        pipeline.cola_max = crawler.settings.getint("PIPELINE_COLA_MAX", 100)
+        pipeline.muestreo = Muestreo(
+            logging.getLogger(cls.__module__),
+            crawler.settings.getint("FCF_LOG_MUESTREO", 100),
+        )
+        return pipeline
+
+    async def open_spider(self, spider):
+        if spider.name != self.spider_objetivo:
+            return
+
+        self.pendientes = 0
+        self.pausado = False
+        self.hilo = ThreadPool(minthreads=1, maxthreads=1, name=f"bd-{spider.name}")
+        self.hilo.start()
+
+        try:
+            await self._en_hilo(self.abrir, spider)
+        except Exception:
+            self.hilo.stop()
+            raise
+
+    def _en_hilo(self, funcion, *args):
+        from twisted.internet import reactor
+        return maybe_deferred_to_future(
+            threads.deferToThreadPool(reactor, self.hilo, funcion, *args)
+        )
+
+    async def process_item(self, item, spider):
+        if spider.name != self.spider_objetivo:
+            return item
+
+        stats = self.crawler.stats
+        self.pendientes += 1
+        stats.max_value("bd/cola/maxima", self.pendientes)
+        if self.pendientes >= self.cola_max and not self.pausado:
+            self.pausado = True
+            self.crawler.engine.pause()
+            stats.inc_value("bd/cola/pausas")
+
+        try:
+            return await self._en_hilo(self.escribir_item, item, spider)
+        finally:
+            self.pendientes -= 1
+            if self.pausado and self.pendientes <= self.cola_max // 2:
+                self.pausado = False
+                self.crawler.engine.unpause()
+
+    async def close_spider(self, spider):
+        if spider.name != self.spider_objetivo:
+            return
+
+        # Se encola detrás de los items pendientes: cuando corre, ya están todos escritos
+        try:
+            await self._en_hilo(self.cerrar, spider)
+        finally:
+            self.hilo.stop()
+            self.muestreo.volcar_estadisticas(self.crawler.stats)
@@ -0,0 +1,33 @@
+from lxml import etree
+
+# Backends de extracción de los spiders de actas, equipos y calendario:
+#   - "selector": Selector/SelectorList de Scrapy (parsel)
+#   - "lxml": el árbol lxml de la respuesta (el que ya parseó parsel, no se
+#     vuelve a parsear) con XPaths precompilados que devuelven cadenas
+BACKENDS = ("selector", "lxml")
+
+
+def backend_del_spider(spider):
+    """Backend del argumento `backend` del spider (-a backend=lxml) o de FCF_EXTRACCION."""
+    backend = getattr(spider, "backend", None) or spider.settings.get("FCF_EXTRACCION", "selector")
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de extracción desconocido: {backend}")
+    return backend
+
+
+def primero(valores):
+    return valores[0] if valores else None
+
+
+def primero_en(xpath, nodos):
+    """Primer resultado de `xpath` sobre una lista de nodos (como SelectorList.xpath(...).get())."""
+    for nodo in nodos:
+        valores = xpath(nodo)
+        if valores:
+            return valores[0]
+    return None
+
+
+def html(nodo):
+    """Serialización de un elemento (como Selector.get())."""
+    return etree.tostring(nodo, method="html", encoding="unicode", with_tail=False)
@@ -0,0 +1,15 @@
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet import threads
+
+
+def en_hilo(funcion, *args, **kwargs):
+    """
+    Ejecuta `funcion(*args, **kwargs)` en el pool de hilos del reactor y
+    devuelve algo que se puede esperar (await) desde start() o un callback.
+
+    Para todo lo que bloquea fuera de los pipelines: consultas a la BD y,
+    sobre todo, obtener_conexion(), que puede esperar hasta
+    DB_POOL_ESPERA_MAX segundos a que quede una conexión libre. En el hilo
+    del reactor esa espera pararía también descargas, parseo y latidos.
+    """
+    return maybe_deferred_to_future(threads.deferToThread(funcion, *args, **kwargs))
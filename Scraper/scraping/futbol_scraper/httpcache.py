@@ -0,0 +1,52 @@
+import re
+from time import time
+
+from scrapy.extensions.httpcache import RFC2616Policy
+from scrapy.utils.httpobj import urlparse_cached
+
+from .urls import familia_url
+
+ACTA_TANCADA = re.compile(rb"acta\s+tancada", re.IGNORECASE)
+
+
+class PoliticaCacheFCF(RFC2616Policy):
+    """
+    Política de caché HTTP con TTL por familia de URL (FCF_CACHE_TTL).
+
+    - Las actas cerradas ("Acta tancada") no caducan nunca.
+    - Pasado el TTL, la petición sale con If-None-Match / If-Modified-Since
+      si el servidor dio ETag / Last-Modified, y un 304 reutiliza la copia.
+    - Se ignoran las cabeceras Cache-Control de fcf.cat: la frescura la
+      decide solo el TTL configurado.
+    """
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.ttls = settings.getdict("FCF_CACHE_TTL")
+        self.ttl_defecto = settings.getint("FCF_CACHE_TTL_DEFECTO", 86400)
+
+    def should_cache_request(self, request):
+        return urlparse_cached(request).scheme not in self.ignore_schemes
+
+    def should_cache_response(self, response, request):
+        # 403/404/500 están en HTTPERROR_ALLOWED_CODES pero no se guardan
+        return response.status == 200
+
+    def is_cached_response_fresh(self, cachedresponse, request):
+        familia = familia_url(request.url)
+
+        if familia == "acta" and ACTA_TANCADA.search(cachedresponse.body):
+            return True
+
+        ttl = self.ttls.get(familia, self.ttl_defecto)
+        if ttl is None:
+            return True
+
+        # Sin cabecera Date no sabemos la edad de la copia: se revalida
+        if b"Date" in cachedresponse.headers:
+            edad = self._compute_current_age(cachedresponse, request, time())
+            if edad < ttl:
+                return True
+
+        self._set_conditional_validators(request, cachedresponse)
+        return False
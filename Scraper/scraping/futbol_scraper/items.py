@@ -1,3 +1,5 @@
+from typing import NamedTuple, Optional
+
 import scrapy
 
 
@@ -46,6 +48,37 @@ class CalendarioItem(scrapy.Item):
     slug_competicion = scrapy.Field()
     abreviatura_competicion = scrapy.Field()
 
+class CalendarioCompletoItem(scrapy.Item):
+    # Fin de un calendari: el spider ya ha emitido sus `filas` CalendarioItem
+    id_grupo = scrapy.Field()
+    filas = scrapy.Field()
+
+# Entradas de las listas de ActasItem: tuplas con nombre (sin __dict__ por
+# instancia) y ya normalizadas en el spider, dorsales y minutos como int
+class Jugador(NamedTuple):
+    nombre: str
+    apellidos: str
+    dorsal: Optional[int]
+
+class Staff(NamedTuple):
+    nombre: str
+    apellidos: str
+    rol: str
+
+class Gol(NamedTuple):
+    tipo: str
+    nombre: str
+    apellidos: str
+    minuto: Optional[int]
+    id_equipo: Optional[int]
+
+class Tarjeta(NamedTuple):
+    nombre: str
+    apellidos: str
+    tipo: str
+    minuto: Optional[int]
+    dorsal: Optional[int]
+
 class ActasItem(scrapy.Item):
     id_grupo = scrapy.Field()
     id_local = scrapy.Field()
@@ -65,6 +98,7 @@ class ActasItem(scrapy.Item):
     apellidos_arbitro = scrapy.Field()
     delegacion_arbitro = scrapy.Field()
 
+    # Listas de Jugador / Staff / Gol / Tarjeta
     jugadores_local = scrapy.Field()
     jugadores_visitante = scrapy.Field()
 
@@ -79,6 +113,9 @@ class ActasItem(scrapy.Item):
     tarjetas_local = scrapy.Field()
     tarjetas_visitante = scrapy.Field()
 
+    # Hash del contenido del acta, lo rellena ActasHuellaPipeline
+    huella = scrapy.Field()
+
 class CamposItem(scrapy.Item):
     codigo = scrapy.Field()
     nombre_campo = scrapy.Field()
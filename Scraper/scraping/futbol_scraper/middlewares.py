@@ -4,10 +4,13 @@
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
 from scrapy import signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
 
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
 
+from .urls import familia_url
+
 
 class FutbolScraperSpiderMiddleware:
     # Not all methods need to be defined. If a method is not defined,
@@ -50,51 +53,155 @@ class FutbolScraperSpiderMiddleware:
             yield item_or_request
 
     def spider_opened(self, spider):
-        spider.logger.info("Spider opened: %s" % spider.name)
+        spider.logger.info("Spider opened: %s", spider.name)
+
+
+class RitmoFamilia:
+    """Lo aprendido de una familia de URLs: latencia y tasa de errores (medias móviles)."""
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.latencia = None
+        self.errores = 0.0
+        self.exitos_seguidos = 0
 
 
 class FutbolScraperDownloaderMiddleware:
-    # Not all methods need to be defined. If a method is not defined,
-    # scrapy acts as if the downloader middleware does not modify the
-    # passed objects.
+    """
+    Ritmo de descarga adaptativo por familia de URL ("acta", "calendari",
+    "cargar_grupos"...; ver urls.familia_url).
+
+    Cada familia va en su propio slot de descarga, con delay y concurrencia
+    propios. Se parte de DOWNLOAD_DELAY / CONCURRENT_REQUESTS_PER_DOMAIN y:
+      - con respuestas rápidas y sin errores se baja el delay hasta
+        delay_min y después se sube la concurrencia hasta concurrencia_max;
+      - un error (FCF_THROTTLE_ERRORES, timeouts, conexión) duplica el delay
+        (o aplica Retry-After) y reduce la concurrencia a la mitad;
+      - si la latencia media pasa del doble de latencia_objetivo se frena.
+    Los límites salen de FCF_THROTTLE[familia] sobre FCF_THROTTLE_DEFECTO.
+    Las respuestas servidas por la caché HTTP no cuentan.
+    """
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        settings = crawler.settings
+        self.limites_defecto = settings.getdict("FCF_THROTTLE_DEFECTO")
+        self.limites_familia = settings.getdict("FCF_THROTTLE")
+        self.estados_error = set(settings.getlist("FCF_THROTTLE_ERRORES"))
+        self.ritmos = {}
 
     @classmethod
     def from_crawler(cls, crawler):
-        # This method is used by Scrapy to create your spiders.
-        s = cls()
+        if not crawler.settings.getbool("FCF_THROTTLE_ENABLED"):
+            raise NotConfigured
+        s = cls(crawler)
         crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
         return s
 
+    # ----------------------------------
+    # HELPERS
+    # ----------------------------------
+
+    def _ritmo(self, familia):
+        ritmo = self.ritmos.get(familia)
+        if ritmo is None:
+            limites = {**self.limites_defecto, **self.limites_familia.get(familia, {})}
+            ritmo = self.ritmos[familia] = RitmoFamilia(limites)
+        return ritmo
+
+    def _slot(self, request):
+        clave = request.meta.get("download_slot")
+        return self.crawler.engine.downloader.slots.get(clave)
+
+    def _publicar(self, familia, slot, ritmo):
+        stats = self.crawler.stats
+        stats.set_value(f"throttle/{familia}/delay", round(slot.delay, 3))
+        stats.set_value(f"throttle/{familia}/concurrencia", slot.concurrency)
+        if ritmo.latencia is not None:
+            stats.set_value(f"throttle/{familia}/latencia_media", round(ritmo.latencia, 3))
+
+    @staticmethod
+    def _retry_after(response):
+        valor = response.headers.get(b"Retry-After") if response is not None else None
+        try:
+            return float(valor)
+        except (TypeError, ValueError):
+            return None
+
+    def _exito(self, ritmo, slot, latencia):
+        limites = ritmo.limites
+        ritmo.latencia = latencia if ritmo.latencia is None else 0.8 * ritmo.latencia + 0.2 * latencia
+        ritmo.errores *= 0.9
+        ritmo.exitos_seguidos += 1
+
+        if ritmo.latencia > 2 * limites["latencia_objetivo"]:
+            # El servidor va lento: frenar antes de que empiece a fallar
+            slot.delay = min(limites["delay_max"], max(slot.delay, limites["delay_min"]) * 1.5)
+            slot.concurrency = max(1, slot.concurrency - 1)
+            ritmo.exitos_seguidos = 0
+            return
+
+        if ritmo.exitos_seguidos < limites["exitos_para_acelerar"] or ritmo.errores > 0.05:
+            return
+
+        ritmo.exitos_seguidos = 0
+        if slot.delay > limites["delay_min"]:
+            slot.delay = max(limites["delay_min"], slot.delay * 0.8)
+        elif (ritmo.latencia <= limites["latencia_objetivo"]
+              and slot.concurrency < limites["concurrencia_max"]):
+            slot.concurrency += 1
+
+    def _error(self, ritmo, slot, familia, retry_after=None):
+        limites = ritmo.limites
+        ritmo.errores = 0.9 * ritmo.errores + 0.1
+        ritmo.exitos_seguidos = 0
+
+        delay = max(2 * slot.delay, limites["delay_min"], retry_after or 0)
+        slot.delay = min(limites["delay_max"], delay)
+        slot.concurrency = max(1, slot.concurrency // 2)
+
+        self.crawler.stats.inc_value(f"throttle/{familia}/errores")
+        self.crawler.spider.logger.info(
+            "[THROTTLE] %s: error → delay %.2fs, concurrencia %d", familia, slot.delay, slot.concurrency
+        )
+
+    # ----------------------------------
+    # MIDDLEWARE
+    # ----------------------------------
+
     def process_request(self, request, spider):
-        # Called for each request that goes through the downloader
-        # middleware.
-
-        # Must either:
-        # - return None: continue processing this request
-        # - or return a Response object
-        # - or return a Request object
-        # - or raise IgnoreRequest: process_exception() methods of
-        #   installed downloader middleware will be called
+        # Un slot de descarga por familia (si la petición no trae uno propio)
+        if "download_slot" not in request.meta:
+            request.meta["download_slot"] = f"fcf-{familia_url(request.url)}"
         return None
 
     def process_response(self, request, response, spider):
-        # Called with the response returned from the downloader.
+        if "cached" in response.flags:
+            return response
+
+        slot = self._slot(request)
+        if slot is None:
+            return response
+
+        familia = familia_url(request.url)
+        ritmo = self._ritmo(familia)
+
+        if response.status in self.estados_error:
+            self._error(ritmo, slot, familia, self._retry_after(response))
+        else:
+            self._exito(ritmo, slot, request.meta.get("download_latency", 0.0))
 
-        # Must either;
-        # - return a Response object
-        # - return a Request object
-        # - or raise IgnoreRequest
+        self._publicar(familia, slot, ritmo)
         return response
 
     def process_exception(self, request, exception, spider):
-        # Called when a download handler or a process_request()
-        # (from other downloader middleware) raises an exception.
-
-        # Must either:
-        # - return None: continue processing this exception
-        # - return a Response object: stops process_exception() chain
-        # - return a Request object: stops process_exception() chain
-        pass
+        slot = self._slot(request)
+        if slot is not None and not isinstance(exception, IgnoreRequest):
+            familia = familia_url(request.url)
+            ritmo = self._ritmo(familia)
+            self._error(ritmo, slot, familia)
+            self._publicar(familia, slot, ritmo)
+        return None
 
     def spider_opened(self, spider):
-        spider.logger.info("Spider opened: %s" % spider.name)
+        spider.logger.info("Spider opened: %s", spider.name)
@@ -0,0 +1,147 @@
+"""
+Normalización de nombres y slugs compartida por spiders y pipelines.
+
+Las funciones por cadena están memoizadas (los mismos jugadores, equipos y
+clubes se repiten en miles de páginas) y el plegado de acentos se hace con
+tablas de translate, en una sola pasada. Las versiones en lote
+(separar_nombres, slugs...) procesan una lista entera de una vez.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+# Tamaño de las cachés: de sobra para los jugadores de una temporada
+MAX_CACHE = 1 << 16
+
+
+def _tabla_acentos():
+    """Tabla de translate: letras latinas con diacrítico → letra base (à → a, ç → c, ñ → n...)."""
+    tabla = {}
+    for codigo in range(0xC0, 0x250):
+        letra = chr(codigo)
+        base = unicodedata.normalize("NFKD", letra)[0]
+        if base != letra and base.isascii():
+            tabla[codigo] = base
+    return str.maketrans(tabla)
+
+
+def _tabla_bytes(tabla):
+    """
+    La misma tabla para bytes.translate sobre el texto en latin-1: mucho más
+    rápida que str.translate, que con texto no ASCII va carácter a carácter.
+    """
+    bytes_ = bytearray(range(256))
+    for codigo, destino in tabla.items():
+        if codigo < 256:
+            bytes_[codigo] = ord(destino)
+    return bytes(bytes_)
+
+
+def traducir(texto, tabla, tabla_bytes):
+    try:
+        return texto.encode("latin-1").translate(tabla_bytes).decode("latin-1")
+    except UnicodeEncodeError:
+        # Algún carácter fuera de latin-1 (ł, ő...): la tabla completa
+        return texto.translate(tabla)
+
+
+ACENTOS = _tabla_acentos()
+ACENTOS_BYTES = _tabla_bytes(ACENTOS)
+
+# Slug de competición tal y como se ha generado siempre (los slugs ya están
+# en la BD y forman parte de las URLs de la web): solo estas vocales
+SLUG_COMPETICION = str.maketrans({
+    " ": "-",
+    "ó": "o", "ò": "o", "ú": "u", "ù": "u", "í": "i",
+    "ì": "i", "é": "e", "è": "e", "à": "a",
+})
+SLUG_COMPETICION_BYTES = _tabla_bytes(SLUG_COMPETICION)
+
+RE_NO_SLUG = re.compile(r"[^a-z0-9\-]")
+RE_GUIONES = re.compile(r"-+")
+RE_SUFIJO_EQUIPO = re.compile(r"-(?:[a-h]|u\d+)$")
+RE_LETRA_EQUIPO = re.compile(r"\s+[A-D]$", re.IGNORECASE)
+
+# Clubes cuyo slug en el apartado de club de la web no coincide con el de
+# las clasificaciones. Semilla de la tabla slugs_clubes: los demás los
+# resuelve ClubesSpider contra el listado de clubes (resolucion_clubes.py)
+SLUGS_CLUB_WEB = {
+    "jesus-y-maria-ud": "jesus-i-maria-ud",
+    "remences-ae-unio": "remences-associacio-esportiva-unio",
+    "costa-daurada-fc": "costa-daurada-salou-fc",
+    "bescano-cd": "bescano-ce",
+    "palafrugell-cf": "palafrugell-fc",
+    "efb-ulldecona": "escola-futbol-base-ulldecona-assoc",
+    "unificacion-cfsantaperpetua": "unificacion-cfsanta-perpetua",
+    "fundacio-esport-hospitalet-at": "fundacio-esporthospitalet-at",
+    "escola-f-pobla-segur-i-comarc": "escola-f-pobla-segur-i-comarca",
+    "vilaseca-cf": "vila-seca-cf",
+    "agramunt-escolagerard-gatell-cf": "agramunt-escola-gerard-gatell-cf",
+    "montroig-at": "mont-roig-at",
+    "vilanova-geltru-cf": "vilanova-i-la-geltru-cf",
+    "lleida-esportiu-club": "lleida-ponent-esportiu-club",
+    "sant-jaume-denveija-ue": "sant-jaume-denveja-ue",
+    "vila-olimpica-club-esp": "vila-olimpica-club-esportiu",
+    "alcanar-2015-escola-futbol": "escola-futbol-alcanar-2015",
+    "les-corts-de-barcelona-club-esp": "les-corts-de-barcelona-club-esportiu",
+}
+
+
+@lru_cache(maxsize=MAX_CACHE)
+def plegar_acentos(texto):
+    return traducir(texto, ACENTOS, ACENTOS_BYTES)
+
+
+@lru_cache(maxsize=MAX_CACHE)
+def separar_nombre(texto, max_partes=-1):
+    """
+    "APELLIDOS, NOMBRE" → (nombre, apellidos). Sin coma: (texto, "").
+    Con más de una coma, el nombre es lo que hay entre la primera y la
+    segunda (o todo lo que sigue a la primera con max_partes=1).
+    """
+    if "," not in texto:
+        return texto, ""
+    partes = [p.strip() for p in texto.split(",", max_partes)]
+    return partes[1], partes[0]
+
+
+@lru_cache(maxsize=MAX_CACHE)
+def slug(texto):
+    """Slug genérico: minúsculas, sin acentos, guiones y solo [a-z0-9-]."""
+    texto = plegar_acentos(texto.lower().strip()).replace(" ", "-")
+    return RE_GUIONES.sub("-", RE_NO_SLUG.sub("", texto))
+
+
+@lru_cache(maxsize=MAX_CACHE)
+def slug_competicion(nombre):
+    return traducir(nombre.lower(), SLUG_COMPETICION, SLUG_COMPETICION_BYTES)
+
+
+@lru_cache(maxsize=MAX_CACHE)
+def slug_club_de_equipo(equipo_slug):
+    """damm-cf-a → damm-cf (quita la letra o el sufijo -uNN del equipo)."""
+    return RE_SUFIJO_EQUIPO.sub("", equipo_slug)
+
+
+@lru_cache(maxsize=MAX_CACHE)
+def nombre_club(nombre_equipo):
+    """"C.F. DAMM A" → "C.F. DAMM" (sin la letra A-D final)."""
+    return RE_LETRA_EQUIPO.sub("", nombre_equipo)
+
+
+# -----------------------------
+# LOTES
+# -----------------------------
+def separar_nombres(textos, max_partes=-1):
+    if max_partes == -1:
+        # Misma clave de caché que separar_nombre(texto)
+        return list(map(separar_nombre, textos))
+    return [separar_nombre(texto, max_partes) for texto in textos]
+
+
+def slugs(textos):
+    return list(map(slug, textos))
+
+
+def slugs_competicion(nombres):
+    return list(map(slug_competicion, nombres))
@@ -0,0 +1,39 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet.defer import Deferred
+from twisted.python.failure import Failure
+
+
+def crear_pool(procesos):
+    """
+    Pool de procesos para parsear fuera del hilo del reactor. Con "spawn":
+    el proceso de Scrapy ya tiene hilos (escritura en BD, DNS) y conexiones
+    abiertas que un fork copiaría a medias.
+    """
+    return ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _resolver(deferred, futuro):
+    try:
+        resultado = futuro.result()
+    except Exception:
+        deferred.errback(Failure())
+    else:
+        deferred.callback(resultado)
+
+
+def en_pool(pool, funcion, *args):
+    """
+    Ejecuta `funcion(*args)` en el pool y devuelve algo que se puede
+    esperar (await) desde un callback de Scrapy. No ocupa ningún hilo
+    mientras espera: el resultado vuelve al reactor con callFromThread.
+    Los resultados llegan en el orden en que acaban, no en el de envío.
+    """
+    from twisted.internet import reactor
+
+    deferred = Deferred()
+    futuro = pool.submit(funcion, *args)
+    futuro.add_done_callback(lambda f: reactor.callFromThread(_resolver, deferred, f))
+    return maybe_deferred_to_future(deferred)
@@ -1,35 +1,47 @@
 import re
-from db.connection import get_connection
+import json
+import time
+import hashlib
+import logging
+from psycopg2.extensions import TransactionRollbackError
+from psycopg2.extras import execute_values
+from scrapy.exceptions import DropItem
+from db.connection import obtener_conexion, liberar_conexion, sesion, volcar_metricas_pool
+from db.escritura import BufferEscritura
+from db.cache import CacheIdentidades
+from db.esquema import asegurar_huellas_actas, asegurar_secuencias_equipos, asegurar_checkpoints
+from db.checkpoints import clave_checkpoint, marcar_checkpoint
+from .escritura_en_hilo import EscrituraEnHilo
+from .hilos import en_hilo
+from .items import CalendarioCompletoItem
+from .normalizacion import nombre_club as nombre_club_de_equipo
+
+logger = logging.getLogger(__name__)
 
 
 class DebugPrintPipeline:
+    """Vuelca cada item entero al log. Solo con `cli.py scrape ... --debug-items`."""
+
     def process_item(self, item, spider):
-        print(f"[DEBUG PIPELINE] Spider={spider.name} Item={dict(item)}")
+        logger.info("[DEBUG PIPELINE] Spider=%s Item=%s", spider.name, dict(item))
         return item
 
-class CompeticionesPostgresPipeline:
-    def open_spider(self, spider):
-        # Solo nos interesa cuando el spider es 'competiciones'
-        if spider.name != "competiciones":
-            return
+class CompeticionesPostgresPipeline(EscrituraEnHilo):
+    spider_objetivo = "competiciones"
 
-        self.conn = get_connection()
+    def abrir(self, spider):
+        self.conn = obtener_conexion(spider.name)
         self.conn.autocommit = True  # para no preocuparnos de commits aún
         self.cur = self.conn.cursor()
-        print("[PIPELINE] Conectado a PostgreSQL para Competiciones")
-
-    def close_spider(self, spider):
-        if spider.name != "competiciones":
-            return
+        logger.info("[PIPELINE] Conectado a PostgreSQL para Competiciones")
 
+    def cerrar(self, spider):
         self.cur.close()
-        self.conn.close()
-        print("[PIPELINE] Conexión PostgreSQL cerrada")
-
-    def process_item(self, item, spider):
-        if spider.name != "competiciones":
-            return item
+        volcar_metricas_pool(spider.crawler.stats)
+        liberar_conexion(self.conn)
+        logger.info("[PIPELINE] Conexión PostgreSQL cerrada")
 
+    def escribir_item(self, item, spider):
         sql = """
         INSERT INTO public.competiciones
             (nombre_competicion, categoria, edad_maxima,
@@ -50,29 +62,25 @@ class CompeticionesPostgresPipeline:
             ),
         )
 
-        print(f'[PIPELINE] Insertada competición {item.get("nombre")}')
+        self.muestreo.info("competiciones/insertada", "[PIPELINE] Insertada competición %s", item.get("nombre"))
         return item
 
-class GruposPostgresPipeline:
-    def open_spider(self, spider):
-        if spider.name != "grupos":
-            return
-        self.conn = get_connection()
+class GruposPostgresPipeline(EscrituraEnHilo):
+    spider_objetivo = "grupos"
+
+    def abrir(self, spider):
+        self.conn = obtener_conexion(spider.name)
         self.conn.autocommit = True
         self.cur = self.conn.cursor()
-        print("[PIPELINE GRUPOS] Conectado a PostgreSQL")
+        logger.info("[PIPELINE GRUPOS] Conectado a PostgreSQL")
 
-    def close_spider(self, spider):
-        if spider.name != "grupos":
-            return
+    def cerrar(self, spider):
         self.cur.close()
-        self.conn.close()
-        print("[PIPELINE GRUPOS] Conexión cerrada")
-
-    def process_item(self, item, spider):
-        if spider.name != "grupos":
-            return item
+        volcar_metricas_pool(spider.crawler.stats)
+        liberar_conexion(self.conn)
+        logger.info("[PIPELINE GRUPOS] Conexión cerrada")
 
+    def escribir_item(self, item, spider):
         # Buscar idCompeticion a partir de CodigoWeb
         self.cur.execute(
             'SELECT id_competicion FROM public.competiciones WHERE codigo_web = %s',
@@ -80,7 +88,7 @@ class GruposPostgresPipeline:
         )
         row = self.cur.fetchone()
         if not row:
-            print(f"[PIPELINE GRUPOS] Competición CodigoWeb={item['codigo_competicion']} NO encontrada")
+            logger.warning("[PIPELINE GRUPOS] Competición CodigoWeb=%s NO encontrada", item["codigo_competicion"])
             return item
 
         id_competicion = row[0]
@@ -106,24 +114,33 @@ class GruposPostgresPipeline:
             ),
         )
 
-        print(f"[PIPELINE GRUPOS] Upsert grupo {item.get('numero_grupo')} de competicion {id_competicion}")
+        self.muestreo.info("grupos/upsert", "[PIPELINE GRUPOS] Upsert grupo %s de competicion %s",
+                          item.get("numero_grupo"), id_competicion)
         return item
     
-class EquiposYClubesPostgresPipeline:
-    def open_spider(self, spider):
-        if spider.name != "equipos":
-            return
-        self.conn = get_connection()
+class EquiposYClubesPostgresPipeline(EscrituraEnHilo):
+    spider_objetivo = "equipos"
+
+    def abrir(self, spider):
+        self.conn = obtener_conexion(spider.name)
         self.conn.autocommit = True
         self.cur = self.conn.cursor()
-        print("[PIPELINE EQUIPOS] Conectado a PostgreSQL")
 
-    def close_spider(self, spider):
-        if spider.name != "equipos":
-            return
+        # Sin índice único (tabla con claves repetidas) no hay upsert: se
+        # busca y luego se inserta o actualiza, como antes
+        indices = asegurar_secuencias_equipos(self.cur)
+        self.upsert_clubes = "clubes_slug_uniq" in indices
+        self.upsert_equipos = "equipos_club_grupo_nivel_uniq" in indices
+        if not (self.upsert_clubes and self.upsert_equipos):
+            logger.warning("[PIPELINE EQUIPOS] Faltan índices únicos (ver el error anterior): "
+                           "clubes/equipos se escriben con SELECT + INSERT/UPDATE")
+        logger.info("[PIPELINE EQUIPOS] Conectado a PostgreSQL")
+
+    def cerrar(self, spider):
         self.cur.close()
-        self.conn.close()
-        print("[PIPELINE EQUIPOS] Conexión cerrada")
+        volcar_metricas_pool(spider.crawler.stats)
+        liberar_conexion(self.conn)
+        logger.info("[PIPELINE EQUIPOS] Conexión cerrada")
 
     # ---------- helpers ----------
 
@@ -159,91 +176,114 @@ class EquiposYClubesPostgresPipeline:
 
     def _get_or_create_club(self, slug, nombre_club):
         """
-        Devuelve idClub. Si no existe, lo crea.
+        Devuelve idClub. Si no existe, lo crea; si existe, actualiza el
+        nombre por si cambia cómo lo muestra la FCF. Una sola sentencia.
         """
+        if not self.upsert_clubes:
+            return self._get_or_create_club_sin_indice(slug, nombre_club)
+
         self.cur.execute(
-            'SELECT id_club FROM public.clubes WHERE slug = %s',
+            '''
+            INSERT INTO public.clubes (id_club, slug, nombre_club)
+            VALUES (nextval('public.clubes_id_club_seq'), %s, %s)
+            ON CONFLICT (slug) DO UPDATE
+            SET nombre_club = EXCLUDED.nombre_club
+            RETURNING id_club
+            ''',
+            (slug, nombre_club),
+        )
+        return self.cur.fetchone()[0]
+
+    def _get_or_create_equipo(self, id_club, id_grupo, categoria, nivel, equipo_slug):
+        """
+        Crea o actualiza equipo. Consideramos único (idClub, idGrupo, Nivel).
+        Devuelve idEquipo.
+        """
+        if not self.upsert_equipos:
+            return self._get_or_create_equipo_sin_indice(id_club, id_grupo, categoria, nivel, equipo_slug)
+
+        self.cur.execute(
+            '''
+            INSERT INTO public.equipos
+                (id_equipo, id_club, categoria, nivel, id_grupo, slug)
+            VALUES (nextval('public.equipos_id_equipo_seq'), %s, %s, %s, %s, %s)
+            ON CONFLICT (id_club, id_grupo, (COALESCE(nivel, 1))) DO UPDATE
+            SET categoria = COALESCE(EXCLUDED.categoria, equipos.categoria),
+                nivel     = COALESCE(EXCLUDED.nivel, equipos.nivel),
+                slug      = COALESCE(EXCLUDED.slug, equipos.slug)
+            RETURNING id_equipo
+            ''',
+            (id_club, categoria, nivel, id_grupo, equipo_slug),
+        )
+        return self.cur.fetchone()[0]
+
+    def _get_or_create_club_sin_indice(self, slug, nombre_club):
+        self.cur.execute(
+            'SELECT id_club FROM public.clubes WHERE slug = %s ORDER BY id_club LIMIT 1',
             (slug,),
         )
         row = self.cur.fetchone()
         if row:
-            id_club = row[0]
-            # Actualizamos nombre por si cambia cómo lo muestra la FCF
             self.cur.execute(
                 'UPDATE public.clubes SET nombre_club = %s WHERE id_club = %s',
-                (nombre_club, id_club),
+                (nombre_club, row[0]),
             )
-            return id_club
-
-        self.cur.execute('SELECT COALESCE(MAX(id_club), 0) + 1 FROM public.clubes')
-        id_club = self.cur.fetchone()[0]
+            return row[0]
 
         self.cur.execute(
             '''
             INSERT INTO public.clubes (id_club, slug, nombre_club)
-            VALUES (%s, %s, %s)
+            VALUES (nextval('public.clubes_id_club_seq'), %s, %s)
+            RETURNING id_club
             ''',
-            (id_club, slug, nombre_club),
+            (slug, nombre_club),
         )
-        return id_club
+        return self.cur.fetchone()[0]
 
-    def _get_or_create_equipo(self, id_club, id_grupo, categoria, nivel, equipo_slug):
-        """
-        Crea o actualiza equipo. Consideramos único (idClub, idGrupo, Nivel).
-        Devuelve idEquipo.
-        """
+    def _get_or_create_equipo_sin_indice(self, id_club, id_grupo, categoria, nivel, equipo_slug):
         self.cur.execute(
             '''
-            SELECT id_equipo
-            FROM public.equipos
-            WHERE id_club = %s
-              AND id_grupo = %s
-              AND COALESCE(nivel, 1) = COALESCE(%s, 1)
+            SELECT id_equipo FROM public.equipos
+            WHERE id_club = %s AND id_grupo = %s AND COALESCE(nivel, 1) = COALESCE(%s, 1)
+            ORDER BY id_equipo LIMIT 1
             ''',
             (id_club, id_grupo, nivel),
         )
         row = self.cur.fetchone()
         if row:
-            id_equipo = row[0]
             self.cur.execute(
                 '''
-                UPDATE public.equipose
+                UPDATE public.equipos
                 SET categoria = COALESCE(%s, categoria),
                     nivel     = COALESCE(%s, nivel),
-                    slug        = COALESCE(%s, slug)
-                WHERE "idEquipo" = %s
+                    slug      = COALESCE(%s, slug)
+                WHERE id_equipo = %s
                 ''',
-                (categoria, nivel, equipo_slug, id_equipo),
+                (categoria, nivel, equipo_slug, row[0]),
             )
-            return id_equipo
-
-        # No existe todavía -> crear nuevo
-        self.cur.execute('SELECT COALESCE(MAX(id_equipo), 0) + 1 FROM public.equipos')
-        id_equipo = self.cur.fetchone()[0]
+            return row[0]
 
         self.cur.execute(
             '''
             INSERT INTO public.equipos
                 (id_equipo, id_club, categoria, nivel, id_grupo, slug)
-            VALUES (%s, %s, %s, %s, %s, %s)
+            VALUES (nextval('public.equipos_id_equipo_seq'), %s, %s, %s, %s, %s)
+            RETURNING id_equipo
             ''',
-            (id_equipo, id_club, categoria, nivel, id_grupo, equipo_slug),
+            (id_club, categoria, nivel, id_grupo, equipo_slug),
         )
-        return id_equipo
+        return self.cur.fetchone()[0]
 
-    # ---------- process_item ----------
-
-    def process_item(self, item, spider):
-        if spider.name != "equipos":
-            return item
+    # ---------- escribir_item ----------
 
+    def escribir_item(self, item, spider):
         id_grupo = item["id_grupo"]
 
         # ---- CLUB ----
         nombre_equipo = item["nombre_equipo"]
 
         # Nombre de club = sin la letra A/B/C final
-        nombre_club = re.sub(r"\s+[A-D]$", "", nombre_equipo, flags=re.IGNORECASE)
+        nombre_club = nombre_club_de_equipo(nombre_equipo)
 
         id_club = self._get_or_create_club(
             slug=item["club_slug"],
@@ -269,34 +309,30 @@ class EquiposYClubesPostgresPipeline:
             equipo_slug=equipo_slug,
         )
 
-        print(
-            f'[PIPELINE EQUIPOS] Club={item["club_slug"]} (idClub={id_club}) '
-            f'→ Equipo id={id_equipo} slug={equipo_slug} en grupo {id_grupo}, '
-            f'categoria={categoria}, nivel={nivel}'
+        self.muestreo.info(
+            "equipos/upsert",
+            "[PIPELINE EQUIPOS] Club=%s (idClub=%s) → Equipo id=%s slug=%s en grupo %s, categoria=%s, nivel=%s",
+            item["club_slug"], id_club, id_equipo, equipo_slug, id_grupo, categoria, nivel,
         )
 
         return item
 
-class ClubesPostgresPipeline:
-    def open_spider(self, spider):
-        if spider.name != "clubes":
-            return
-        self.conn = get_connection()
+class ClubesPostgresPipeline(EscrituraEnHilo):
+    spider_objetivo = "clubes"
+
+    def abrir(self, spider):
+        self.conn = obtener_conexion(spider.name)
         self.conn.autocommit = True
         self.cur = self.conn.cursor()
-        print("[PIPELINE CLUBES] Conectado a PostgreSQL")
+        logger.info("[PIPELINE CLUBES] Conectado a PostgreSQL")
 
-    def close_spider(self, spider):
-        if spider.name != "clubes":
-            return
+    def cerrar(self, spider):
         self.cur.close()
-        self.conn.close()
-        print("[PIPELINE CLUBES] Conexión cerrada")
-
-    def process_item(self, item, spider):
-        if spider.name != "clubes":
-            return item
+        volcar_metricas_pool(spider.crawler.stats)
+        liberar_conexion(self.conn)
+        logger.info("[PIPELINE CLUBES] Conexión cerrada")
 
+    def escribir_item(self, item, spider):
         sql = """
         UPDATE public.clubes
         SET localidad = COALESCE(%s, localidad),
@@ -315,40 +351,108 @@ class ClubesPostgresPipeline:
             ),
         )
 
-        print(f'[PIPELINE CLUBES] Actualizado club {item["slug"]}')
+        self.muestreo.info("clubes/actualizado", "[PIPELINE CLUBES] Actualizado club %s", item["slug"])
         return item
 
-class CalendariosPostgresPipeline:
-    def open_spider(self, spider):
-        if spider.name != "calendario":
-            return
+class CalendariosPostgresPipeline(EscrituraEnHilo):
+    spider_objetivo = "calendario"
 
-        self.conn = get_connection()
+    def abrir(self, spider):
+        self.conn = obtener_conexion(spider.name)
         self.conn.autocommit = True
         self.cur = self.conn.cursor()
         
         self.competiciones_actualizadas = set()
 
-        print("[PIPELINE CALENDARIO] Conectado a PostgreSQL")
-
-    def close_spider(self, spider):
-        if spider.name != "calendario":
-            return
+        # Partidos de cada calendari, por grupo: las respuestas se parsean a
+        # la vez y sus filas llegan mezcladas. Se insertan todos de una vez
+        # cuando han llegado las filas que anuncia su CalendarioCompletoItem
+        self.partidos_pendientes = {}
+        self.filas_recibidas = {}
+        self.filas_esperadas = {}
+
+        self.tiempo_bd = 0.0
+
+        # Ejecución reanudable (--resume): se marca cada grupo escrito
+        self.ejecucion = spider.settings.get("FCF_REANUDAR")
+        if self.ejecucion:
+            asegurar_checkpoints(self.cur)
+
+        # Mapa (id_grupo, slug) → id_equipo, limitado a los grupos del spider
+        self.ids_grupo = getattr(spider, "ids_grupo", None)
+        self.equipos = {}
+        self.equipos_por_slug = {}
+        self._cargar_equipos()
+
+        # Slugs que no estaban en la BD, por grupo: no se repite la consulta
+        # dentro del mismo calendari, pero sí en los siguientes (el equipo
+        # puede haberse creado entretanto)
+        self.no_encontrados = {}
+
+        logger.info("[PIPELINE CALENDARIO] Conectado a PostgreSQL (%d equipos precargados)", len(self.equipos))
+
+    def cerrar(self, spider):
+        # Grupos a medias (crawl cortado): se escriben, pero sin checkpoint
+        for id_grupo in list(self.partidos_pendientes):
+            self._insertar_partidos_pendientes(id_grupo, completo=False)
+
+        stats = spider.crawler.stats
+        stats.set_value("calendario/tiempo_bd", round(self.tiempo_bd, 3))
+        logger.info(
+            "[PIPELINE CALENDARIO] Tiempo en BD: %.1fs, tiempo de descarga: %.1fs",
+            self.tiempo_bd, stats.get_value("calendario/tiempo_descarga", 0),
+        )
 
         self.cur.close()
-        self.conn.close()
-        print("[PIPELINE CALENDARIO] Conexión cerrada")
+        volcar_metricas_pool(spider.crawler.stats)
+        liberar_conexion(self.conn)
+        logger.info("[PIPELINE CALENDARIO] Conexión cerrada")
 
     # -------------------------------
     # HELPERS
     # -------------------------------
 
-    def _get_equipo_id(self, slug):
+    def _cargar_equipos(self):
+        inicio = time.perf_counter()
+
+        sql = 'SELECT id_grupo, slug, id_equipo FROM public.equipos WHERE slug IS NOT NULL'
+        params = ()
+        if self.ids_grupo:
+            sql += ' AND id_grupo = ANY(%s)'
+            params = (list(self.ids_grupo),)
+
+        self.cur.execute(sql, params)
+        for id_grupo, slug, id_equipo in self.cur.fetchall():
+            self.equipos[(id_grupo, slug)] = id_equipo
+            self.equipos_por_slug.setdefault(slug, id_equipo)
+
+        self.tiempo_bd += time.perf_counter() - inicio
+
+    def _get_equipo_id(self, slug, id_grupo):
+        id_equipo = self.equipos.get((id_grupo, slug))
+        if id_equipo is None:
+            id_equipo = self.equipos_por_slug.get(slug)
+        if id_equipo is not None or slug in self.no_encontrados.get(id_grupo, ()):
+            return id_equipo
+
+        # Fallo en el mapa: se consulta la BD (preferimos el equipo del mismo grupo)
+        inicio = time.perf_counter()
         self.cur.execute(
-            'SELECT id_equipo FROM public.equipos WHERE slug = %s',
-            (slug,)
+            'SELECT id_equipo FROM public.equipos WHERE slug = %s '
+            'ORDER BY (id_grupo = %s) DESC LIMIT 1',
+            (slug, id_grupo)
         )
-        return self.cur.fetchone()
+        row = self.cur.fetchone()
+        self.tiempo_bd += time.perf_counter() - inicio
+
+        if row is None:
+            self.no_encontrados.setdefault(id_grupo, set()).add(slug)
+            return None
+
+        id_equipo = row[0]
+        self.equipos[(id_grupo, slug)] = id_equipo
+        self.equipos_por_slug.setdefault(slug, id_equipo)
+        return id_equipo
 
     def _update_abreviatura_competicion(self, slug, abreviatura):
         sql = """
@@ -356,18 +460,57 @@ class CalendariosPostgresPipeline:
             SET abreviatura = %s
             WHERE slug = %s;
         """
+        inicio = time.perf_counter()
         self.cur.execute(sql, (abreviatura, slug))
+        self.tiempo_bd += time.perf_counter() - inicio
+
+    def _insertar_partidos_pendientes(self, id_grupo, completo=True):
+        partidos = self.partidos_pendientes.pop(id_grupo, [])
+        self.filas_recibidas.pop(id_grupo, None)
+        self.filas_esperadas.pop(id_grupo, None)
+        self.no_encontrados.pop(id_grupo, None)
+
+        inicio = time.perf_counter()
+        insertados = []
+        if partidos:
+            sql = """
+            INSERT INTO public.partidos
+                (id_equipo_local, id_equipo_visitante, jornada, id_grupo)
+            VALUES %s
+            ON CONFLICT (id_equipo_local,id_Equipo_visitante,jornada,id_grupo)
+            DO NOTHING
+            RETURNING id_partido;
+            """
+            insertados = execute_values(
+                self.cur, sql, partidos,
+                page_size=len(partidos), fetch=True,
+            )
+        if completo and self.ejecucion:
+            marcar_checkpoint(self.cur, self.ejecucion, "calendario", clave_checkpoint(id_grupo))
+        self.tiempo_bd += time.perf_counter() - inicio
 
+        duplicados = len(partidos) - len(insertados)
+        logger.info("[CALENDARIO][G%s] %d partidos nuevos, %d ya existían",
+                    id_grupo, len(insertados), duplicados)
+
+    def _grupo_si_completo(self, id_grupo):
+        esperadas = self.filas_esperadas.get(id_grupo)
+        if esperadas is not None and self.filas_recibidas.get(id_grupo, 0) >= esperadas:
+            self._insertar_partidos_pendientes(id_grupo)
 
     # -------------------------------
-    # PROCESS ITEM
+    # ESCRIBIR ITEM
     # -------------------------------
 
-    def process_item(self, item, spider):
-        if spider.name != "calendario":
-            return item
-
+    def escribir_item(self, item, spider):
         id_grupo = item.get("id_grupo")
+
+        if isinstance(item, CalendarioCompletoItem):
+            self.filas_esperadas[id_grupo] = item["filas"]
+            self._grupo_si_completo(id_grupo)
+            # Es solo una marca: no cuenta como item ni sale en los feeds
+            raise DropItem(f"Calendari completo G{id_grupo}", log_level="DEBUG")
+
         jornada = int(item["jornada"])
 
         equipo_local = item.get("equipo_local_slug")
@@ -380,7 +523,8 @@ class CalendariosPostgresPipeline:
         abreviatura_competicion = item.get("abreviatura_competicion")
         if slug_competicion and slug_competicion not in self.competiciones_actualizadas:
 
-            print(f"[PIPELINE] Guardando abreviatura {abreviatura_competicion} para slug {slug_competicion}")
+            self.muestreo.debug("calendario/abreviatura", "[PIPELINE] Guardando abreviatura %s para slug %s",
+                               abreviatura_competicion, slug_competicion)
 
             self._update_abreviatura_competicion(
                 slug_competicion,
@@ -392,70 +536,219 @@ class CalendariosPostgresPipeline:
         # ----------------------------------
         # EQUIPOS
         # ----------------------------------
-        local_data = self._get_equipo_id(equipo_local)
-        visitante_data = self._get_equipo_id(equipo_visitante)
+        id_local = self._get_equipo_id(equipo_local, id_grupo)
+        id_visitante = self._get_equipo_id(equipo_visitante, id_grupo)
 
-        if not local_data or not visitante_data:
-            print(f"[CALENDARIO][ERROR] Equipo NO encontrado: "
-                  f"{item['equipo_local_slug']} vs {item['equipo_visitante_slug']}")
-            return item
+        if id_local is None or id_visitante is None:
+            self.muestreo.warning("calendario/equipo_no_encontrado", "[CALENDARIO][ERROR] Equipo NO encontrado: %s vs %s",
+                                  item["equipo_local_slug"], item["equipo_visitante_slug"])
+        else:
+            # ----------------------------------
+            # PARTIDO (se inserta en bloque con el resto del calendari)
+            # ----------------------------------
+            self.partidos_pendientes.setdefault(id_grupo, []).append((id_local, id_visitante, jornada, id_grupo))
 
-        id_local = local_data[0]
-        id_visitante = visitante_data[0]
+        self.filas_recibidas[id_grupo] = self.filas_recibidas.get(id_grupo, 0) + 1
+        self._grupo_si_completo(id_grupo)
 
-        # ----------------------------------
-        # INSERT PARTIDO
-        # ----------------------------------
-        sql = """
-        INSERT INTO public.partidos
-            (id_equipo_local, id_equipo_visitante, jornada, id_grupo)
-        VALUES (%s,%s,%s,%s)
-        ON CONFLICT (id_equipo_local,id_Equipo_visitante,jornada,id_grupo)
-        DO NOTHING
-        RETURNING id_partido;
-        """
+        return item
 
-        self.cur.execute(sql, (
-            id_local, id_visitante,jornada, id_grupo
-        ))
+class ActasHuellaPipeline:
+    """
+    Calcula un hash del acta ya parseada y descarta las que no han cambiado
+    desde la última escritura, antes de que lleguen a ActasPostgresPipeline.
 
-        row = None
-        try:
-            row = self.cur.fetchone()
-        except Exception as e:
-            print("[PIPELINE CALENDARIO] ERROR fetchone():", e)
-            raise
+    Las huellas conocidas se comparten con ActasPostgresPipeline a través de
+    `spider.huellas_actas`: allí se anotan las nuevas, y solo cuando el acta
+    entera (con alineaciones y eventos) ya está confirmada en la BD.
+    """
 
-        if row:
-            id_partido = row[0]
-            print(f"[CALENDARIO][INSERT][G{item['id_grupo']}][J{jornada}] id={id_partido}")
-        else:
-            print(f"[CALENDARIO][DUPLICADO][G{item['id_grupo']}][J{jornada}] ya existe")
+    async def open_spider(self, spider):
+        if spider.name != "acta":
+            return
 
-        return item
+        self.huellas = await en_hilo(self.cargar_huellas, spider)
+        spider.huellas_actas = self.huellas
+
+        self.sin_cambios = 0
+        self.cambiadas = 0
+
+        logger.info("[PIPELINE HUELLA] %d huellas de actas cargadas", len(self.huellas))
 
-class ActasPostgresPipeline:
-    def open_spider(self, spider):
+    def cargar_huellas(self, spider):
+        with sesion(spider.name) as conn:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                asegurar_huellas_actas(cur)
+
+                cur.execute("""
+                    SELECT id_grupo, id_equipo_local, id_equipo_visitante, huella_acta
+                    FROM public.partidos
+                    WHERE huella_acta IS NOT NULL
+                """)
+                return {
+                    (id_grupo, id_local, id_visitante): huella
+                    for id_grupo, id_local, id_visitante, huella in cur.fetchall()
+                }
+
+    def close_spider(self, spider):
         if spider.name != "acta":
             return
 
-        self.conn = get_connection()
-        self.conn.autocommit = True
+        stats = spider.crawler.stats
+        stats.set_value("actas/sin_cambios", self.sin_cambios)
+        stats.set_value("actas/cambiadas", self.cambiadas)
+
+        logger.info("[PIPELINE HUELLA] Actas sin cambios: %d, cambiadas: %d", self.sin_cambios, self.cambiadas)
+
+    @staticmethod
+    def calcular_huella(item):
+        datos = {k: v for k, v in dict(item).items() if k != "huella"}
+        texto = json.dumps(datos, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+    def process_item(self, item, spider):
+        if spider.name != "acta":
+            return item
+
+        clave = (item.get("id_grupo"), item.get("id_local"), item.get("id_visitante"))
+        huella = self.calcular_huella(item)
+
+        if self.huellas.get(clave) == huella:
+            self.sin_cambios += 1
+            raise DropItem(f"Acta sin cambios {clave}", log_level="DEBUG")
+
+        self.cambiadas += 1
+        item["huella"] = huella
+        return item
+
+class ActasPostgresPipeline(EscrituraEnHilo):
+    spider_objetivo = "acta"
+
+    def abrir(self, spider):
+        # Sin autocommit: las actas se escriben por lotes, varias en una
+        # transacción y cada una bajo su savepoint (ver escribir_item)
+        self.conn = obtener_conexion(spider.name)
         self.cur = self.conn.cursor()
         
         self.competiciones_actualizadas = set()
 
-        print("[PIPELINE ACTA] Conectado a PostgreSQL")
+        self.max_reintentos = spider.settings.getint("ACTAS_MAX_REINTENTOS", 3)
+
+        # Ejecución reanudable (--resume): cada acta escrita se marca en la
+        # misma transacción que la escribe
+        self.ejecucion = spider.settings.get("FCF_REANUDAR")
+        if self.ejecucion:
+            asegurar_checkpoints(self.cur)
+        # (caché, clave) de los ids creados en la transacción en curso, para
+        # olvidarlos si se hace rollback
+        self.ids_nuevos = []
+        # Actas escritas en la transacción en curso, aún sin commit
+        self.lote = []
+        self.huellas = getattr(spider, "huellas_actas", None)
+
+        # Alineaciones, staff, eventos y relaciones de todas las actas del
+        # lote se escriben en bloque (un INSERT multi-fila por tabla) justo
+        # antes del commit, que se hace al llegar a N filas o pasados N segundos
+        self.buffer = BufferEscritura(
+            self.conn,
+            max_filas=spider.settings.getint("ACTAS_LOTE_MAX_FILAS", 2000),
+            max_segundos=spider.settings.getfloat("ACTAS_LOTE_MAX_SEGUNDOS", 10),
+        )
+        self.buffer.registrar_tabla("jugadores_equipos", """
+            INSERT INTO jugadores_equipos (id_jugador, id_equipo)
+            SELECT v.id_jugador, v.id_equipo
+            FROM (VALUES %s) AS v(id_jugador, id_equipo)
+            WHERE NOT EXISTS (
+                SELECT 1 FROM jugadores_equipos je
+                WHERE je.id_jugador = v.id_jugador AND je.id_equipo = v.id_equipo
+            )
+        """)
+        self.buffer.registrar_tabla("staff_equipos", """
+            INSERT INTO staff_equipos (id_staff, id_equipo)
+            SELECT v.id_staff, v.id_equipo
+            FROM (VALUES %s) AS v(id_staff, id_equipo)
+            WHERE NOT EXISTS (
+                SELECT 1 FROM staff_equipos se
+                WHERE se.id_staff = v.id_staff AND se.id_equipo = v.id_equipo
+            )
+        """)
+        self.buffer.registrar_tabla("alineaciones", """
+            INSERT INTO alineaciones (id_partido, id_equipo, id_jugador, titular, dorsal)
+            VALUES %s
+            ON CONFLICT (id_partido, id_equipo, id_jugador) DO NOTHING
+        """)
+        self.buffer.registrar_tabla("staff_partidos", """
+            INSERT INTO staff_partidos (id_partido, id_equipo, id_staff, rol)
+            VALUES %s
+            ON CONFLICT (id_partido, id_equipo, id_staff) DO NOTHING
+        """)
+        self.buffer.registrar_tabla("eventos", """
+            INSERT INTO eventos (id_partido, id_jugador, id_equipo, minuto, tipo_evento)
+            VALUES %s
+            ON CONFLICT (id_partido, id_jugador, minuto, tipo_evento) DO NOTHING
+        """)
+
+        # Caché de identidades (clave natural → id), precargada en bloque
+        max_entradas = spider.settings.getint("ACTAS_CACHE_MAX_ENTRADAS", 100000)
+        self.cache_jugadores = CacheIdentidades("jugadores", max_entradas)
+        self.cache_staff = CacheIdentidades("cuerpo_tecnico", max_entradas)
+        self.cache_arbitros = CacheIdentidades("arbitros", max_entradas)
+        self.cache_campos = CacheIdentidades("campos", max_entradas)
+
+        self.cache_jugadores.precargar(self.cur, """
+            SELECT nombre_jugador, apellidos_jugador, id_jugador
+            FROM jugadores ORDER BY id_jugador DESC LIMIT %s
+        """)
+        self.cache_staff.precargar(self.cur, """
+            SELECT nombre_staff, apellido_staff, id_staff
+            FROM cuerpo_tecnico ORDER BY id_staff DESC LIMIT %s
+        """)
+        self.cache_arbitros.precargar(self.cur, """
+            SELECT nombre_arbitro, apellidos_arbitro, delegacion, id_arbitro
+            FROM public.arbitros ORDER BY id_arbitro DESC LIMIT %s
+        """)
+        self.cache_campos.precargar(self.cur, """
+            SELECT codigo_web::text, id_campo
+            FROM public.campos ORDER BY id_campo DESC LIMIT %s
+        """)
+        self.conn.commit()
 
-    def close_spider(self, spider):
-        if spider.name != "acta":
-            return
+        logger.info(
+            "[PIPELINE ACTA] Caché precargada: %d jugadores, %d staff, %d árbitros, %d campos",
+            len(self.cache_jugadores.entradas), len(self.cache_staff.entradas),
+            len(self.cache_arbitros.entradas), len(self.cache_campos.entradas),
+        )
+
+        logger.info("[PIPELINE ACTA] Conectado a PostgreSQL")
+
+    def cerrar(self, spider):
+        self._confirmar_lote()
+
+        stats = spider.crawler.stats
+        for tabla, datos in self.buffer.resumen().items():
+            logger.info(
+                "[PIPELINE ACTA][BUFFER] %s: %d filas en %d volcados → %.0f filas/s",
+                tabla, datos["filas"], datos["volcados"], datos["filas_por_segundo"],
+            )
+            stats.set_value(f"actas/bd/{tabla}/filas", datos["filas"])
+            stats.set_value(f"actas/bd/{tabla}/filas_por_segundo", round(datos["filas_por_segundo"], 1))
+
+        for cache in (self.cache_jugadores, self.cache_staff, self.cache_arbitros, self.cache_campos):
+            logger.info("[PIPELINE ACTA][CACHE] %s: %d aciertos, %d fallos", cache.nombre, cache.aciertos, cache.fallos)
+            cache.volcar_estadisticas(stats, "actas/cache")
 
         self.cur.close()
-        self.conn.close()
-        print("[PIPELINE ACTA] Conexión cerrada")
+        volcar_metricas_pool(spider.crawler.stats)
+        liberar_conexion(self.conn)
+        logger.info("[PIPELINE ACTA] Conexión cerrada")
 
     def _get_or_create_arbitro(self, nombre, apellidos, delegacion):
+        clave = (nombre, apellidos, delegacion)
+        id_arbitro = self.cache_arbitros.get(clave)
+        if id_arbitro is not None:
+            return id_arbitro
+
         self.cur.execute(
             'SELECT id_arbitro FROM public.arbitros '
             'WHERE nombre_arbitro = %s AND apellidos_arbitro = %s AND delegacion = %s',
@@ -464,7 +757,8 @@ class ActasPostgresPipeline:
         row = self.cur.fetchone()
 
         if row:
-            print(f"[ACTAS][ARBITRO] Ya existe → id {row[0]}")
+            self.muestreo.debug("actas/arbitro_existe", "[ACTAS][ARBITRO] Ya existe → id %s", row[0])
+            self.cache_arbitros.guardar(clave, row[0])
             return row[0]
 
         # Crear árbitro
@@ -475,12 +769,20 @@ class ActasPostgresPipeline:
             (nombre, apellidos, delegacion)
         )
         new_id = self.cur.fetchone()[0]
+        self.cache_arbitros.guardar(clave, new_id)
+        self.ids_nuevos.append((self.cache_arbitros, clave))
 
-        print(f"[ACTAS][ÁRBITRO NUEVO] {nombre} {apellidos} ({delegacion}) → id={new_id}")
+        self.muestreo.info("actas/arbitro_nuevo", "[ACTAS][ÁRBITRO NUEVO] %s %s (%s) → id=%s",
+                           nombre, apellidos, delegacion, new_id)
 
         return new_id
 
     def _get_or_create_campo(self, codigo):
+        clave = (str(codigo),)
+        id_campo = self.cache_campos.get(clave)
+        if id_campo is not None:
+            return id_campo
+
         self.cur.execute(
             'SELECT id_campo FROM public.campos WHERE codigo_web = %s',
             (codigo,)
@@ -488,7 +790,8 @@ class ActasPostgresPipeline:
         row = self.cur.fetchone()
 
         if row:
-            print(f"[ACTAS][CAMPO] Ya existe → id {row[0]}")
+            self.muestreo.debug("actas/campo_existe", "[ACTAS][CAMPO] Ya existe → id %s", row[0])
+            self.cache_campos.guardar(clave, row[0])
             return row[0]
 
         # Insert nuevo campo
@@ -497,22 +800,30 @@ class ActasPostgresPipeline:
             (codigo,)
         )
         new_id = self.cur.fetchone()[0]
+        self.cache_campos.guardar(clave, new_id)
+        self.ids_nuevos.append((self.cache_campos, clave))
 
-        print(f"[ACTAS][CAMPO NUEVO] CódigoWeb={codigo} → idCampo={new_id}")
+        self.muestreo.info("actas/campo_nuevo", "[ACTAS][CAMPO NUEVO] CódigoWeb=%s → idCampo=%s", codigo, new_id)
 
         return new_id
     
     def get_or_create_jugador(self, nombre, apellidos):
+        clave = (nombre, apellidos)
+        id_jugador = self.cache_jugadores.get(clave)
+        if id_jugador is not None:
+            return id_jugador
+
         # Buscar jugador existente
         self.cur.execute("""
             SELECT id_jugador FROM jugadores
-            WHERE nombre_jugador" = %s AND apellidos_jugador = %s
+            WHERE nombre_jugador = %s AND apellidos_jugador = %s
         """, (nombre, apellidos))
 
         result = self.cur.fetchone()
 
         if result:
-            print(f"[ACTAS][JUGADORES] Ya existe → id {result[0]}")
+            self.muestreo.debug("actas/jugador_existe", "[ACTAS][JUGADORES] Ya existe → id %s", result[0])
+            self.cache_jugadores.guardar(clave, result[0])
             return result[0]  # id_jugador ya existe
 
         # Crear jugador nuevo
@@ -523,39 +834,26 @@ class ActasPostgresPipeline:
         """, (nombre, apellidos))
 
         new_id = self.cur.fetchone()[0]
-        self.conn.commit()
+        self.cache_jugadores.guardar(clave, new_id)
+        self.ids_nuevos.append((self.cache_jugadores, clave))
 
-        print(f"[ACTAS][JUGADOR NUEVO] {nombre}{apellidos} → {new_id}")
+        self.muestreo.info("actas/jugador_nuevo", "[ACTAS][JUGADOR NUEVO] %s%s → %s", nombre, apellidos, new_id)
 
         return new_id
 
     def ensure_jugador_equipo(self, id_jugador, id_equipo):
-        self.cur.execute("""
-            SELECT 1 FROM jugadores_equipos
-            WHERE id_jugador = %s AND id_equipo = %s
-        """, (id_jugador, id_equipo))
-
-        result = self.cur.fetchone()
-
-        if result:
-            print(f"[ACTAS][JUGADORES EQUIPO] Ya existe relación")
-            return  # Ya existe
-
-        self.cur.execute("""
-            INSERT INTO jugadores_equipos (id_jugador, id_equipo)
-            VALUES (%s, %s)
-        """, (id_jugador, id_equipo))
-
-        self.conn.commit()
+        # Se vuelca en bloque; las relaciones ya existentes se ignoran al insertar
+        self.buffer.añadir("jugadores_equipos", (id_jugador, id_equipo))
     
     def insert_alineacion(self, id_jugador, id_equipo, id_partido, titular, dorsal):
-        self.cur.execute("""
-            INSERT INTO alineaciones (id_partido, id_equipo, id_jugador, titular, dorsal)
-            VALUES (%s, %s, %s, %s, %s)
-            ON CONFLICT (id_partido, id_equipo, id_jugador) DO NOTHING
-        """, (id_partido, id_equipo, id_jugador, titular, dorsal))
+        self.buffer.añadir("alineaciones", (id_partido, id_equipo, id_jugador, titular, dorsal))
 
     def get_or_create_staff(self, nombre, apellidos):
+        clave = (nombre, apellidos)
+        id_staff = self.cache_staff.get(clave)
+        if id_staff is not None:
+            return id_staff
+
         # Buscar jugador existente
         self.cur.execute("""
             SELECT id_staff FROM cuerpo_tecnico
@@ -565,7 +863,8 @@ class ActasPostgresPipeline:
         result = self.cur.fetchone()
 
         if result:
-            print(f"[ACTAS][STAFF] Ya existe → id {result[0]}")
+            self.muestreo.debug("actas/staff_existe", "[ACTAS][STAFF] Ya existe → id %s", result[0])
+            self.cache_staff.guardar(clave, result[0])
             return result[0]  # id_jugador ya existe
 
         # Crear jugador nuevo
@@ -576,37 +875,18 @@ class ActasPostgresPipeline:
         """, (nombre, apellidos))
 
         new_id = self.cur.fetchone()[0]
-        self.conn.commit()
+        self.cache_staff.guardar(clave, new_id)
+        self.ids_nuevos.append((self.cache_staff, clave))
 
-        print(f"[ACTAS][STAFF NUEVO] {nombre}{apellidos} → {new_id}")
+        self.muestreo.info("actas/staff_nuevo", "[ACTAS][STAFF NUEVO] %s%s → %s", nombre, apellidos, new_id)
 
         return new_id
 
     def ensure_staff_equipo(self, id_staff, id_equipo):
-        self.cur.execute("""
-            SELECT 1 FROM staff_equipos
-            WHERE id_staff = %s AND id_equipo = %s
-        """, (id_staff, id_equipo))
-
-        result = self.cur.fetchone()
-
-        if result:
-            print(f"[ACTAS][STAFF EQUIPO] Ya existe relación")
-            return  # Ya existe
-
-        self.cur.execute("""
-            INSERT INTO staff_equipos (id_staff, id_equipo)
-            VALUES (%s, %s)
-        """, (id_staff, id_equipo))
-
-        self.conn.commit()
+        self.buffer.añadir("staff_equipos", (id_staff, id_equipo))
     
     def insert_staff_partido(self, id_staff, id_equipo, id_partido, rol):
-        self.cur.execute("""
-            INSERT INTO staff_partidos (id_partido, id_equipo, id_staff, rol)
-            VALUES (%s, %s, %s, %s)
-            ON CONFLICT (id_partido, id_equipo, id_staff) DO NOTHING
-        """, (id_partido, id_equipo, id_staff, rol))
+        self.buffer.añadir("staff_partidos", (id_partido, id_equipo, id_staff, rol))
 
     def map_tipo_tarjeta(self, tipo):
         if tipo == "Groga":
@@ -619,14 +899,9 @@ class ActasPostgresPipeline:
             return None
     
     def insert_evento(self, id_partido, id_jugador, id_equipo, minuto, tipo_evento):
-        self.cur.execute("""
-            INSERT INTO eventos (id_partido, id_jugador, id_equipo, minuto, tipo_evento)
-            VALUES (%s, %s, %s, %s, %s)
-            ON CONFLICT (id_partido, id_jugador, minuto, tipo_evento) DO NOTHING
-        """, (id_partido, id_jugador, id_equipo, minuto, tipo_evento))
-
-        self.conn.commit()
-        print(f"[ACTAS][EVENTO] {tipo_evento} → Jugador {id_jugador} ({id_equipo}) min {minuto}")
+        self.buffer.añadir("eventos", (id_partido, id_jugador, id_equipo, minuto, tipo_evento))
+        self.muestreo.debug("actas/evento", "[ACTAS][EVENTO] %s → Jugador %s (%s) min %s",
+                            tipo_evento, id_jugador, id_equipo, minuto)
 
     def map_tipo_gol(self, tipo):
         if tipo == "Normal":
@@ -638,52 +913,81 @@ class ActasPostgresPipeline:
         else:
             return None
 
-    def get_equipo_del_jugador(self, id_jugador):
-        self.cur.execute("""
-            SELECT id_equipo FROM jugadores_equipos
-            WHERE idJugador = %s
-        """, (id_jugador,))
-        
-        rows = self.cur.fetchall()
-        return [row[0] for row in rows]
-    
-    def deducir_equipo_gol(self, id_jugador, id_local, id_visitante):
-        equipos_jugador = set(self.get_equipo_del_jugador(id_jugador))
-        print(equipos_jugador)
-        equipos_partido = {id_local, id_visitante}
-        print(equipos_partido)
-        interseccion = equipos_jugador & equipos_partido
-
-        if len(interseccion) == 1:
-            return interseccion.pop()
-
-        if len(interseccion) > 1:
-            print(f"[WARNING] Jugador {id_jugador} asociado a ambos equipos.")
-            return None
+    # ----------------------------------
+    # TRANSACCIONES
+    # ----------------------------------
 
-        print(f"[WARNING] Jugador {id_jugador} no está asociado a local ni visitante.")
-        return None
-    
-    def process_item(self, item, spider):
-        if spider.name != "acta":
-            return item
-        
-        print("\n" + "="*60)
-        print(f"[ACTAS][ITEM] Procesando acta de partido {item.get('id_local')} vs {item.get('id_visitante')}")
-        print("="*60)
-
-        id_grupo = item.get("id_grupo")
-        id_local = item.get("id_local")
-        id_visitante = item.get("id_visitante")
+    def _marca(self):
+        return self.buffer.marca(), len(self.ids_nuevos)
 
-        fecha = item.get("fecha") or None
-        hora = item.get("hora") or None
+    def _deshacer(self, marca):
+        """Tras un rollback, quita del buffer y de las cachés lo que no llegó a la BD."""
+        marca_buffer, n_ids = marca
+        self.buffer.deshacer(marca_buffer)
+        for cache, clave in self.ids_nuevos[n_ids:]:
+            cache.descartar(clave)
+        del self.ids_nuevos[n_ids:]
 
-        estado = item.get("estado")
+    def _en_transaccion(self, nombre, funcion, *args):
+        """
+        Ejecuta `funcion` en una transacción y hace commit. Si algo falla,
+        rollback; los conflictos con otras transacciones (deadlock,
+        serialización) se reintentan hasta ACTAS_MAX_REINTENTOS veces.
+        """
+        for intento in range(1, self.max_reintentos + 1):
+            marca = self._marca()
+            try:
+                resultado = funcion(*args)
+                self.conn.commit()
+                del self.ids_nuevos[:]
+                return resultado
+            except TransactionRollbackError as e:
+                self.conn.rollback()
+                self._deshacer(marca)
+                if intento == self.max_reintentos:
+                    raise
+                self.crawler.stats.inc_value(f"actas/bd/reintentos_{nombre}")
+                logger.warning("[PIPELINE ACTA][REINTENTO] %s (%d/%d): %s", nombre, intento, self.max_reintentos, e.pgcode)
+                time.sleep(0.1 * intento)
+            except Exception:
+                self.conn.rollback()
+                self._deshacer(marca)
+                raise
+
+    def _seccion(self, nombre, funcion, *args):
+        """
+        Ejecuta `funcion` bajo un SAVEPOINT: una sección del acta, o el acta
+        entera dentro del lote. Si choca con otra transacción se repite solo
+        lo del savepoint; cualquier otro error lo deshace y sube, y el resto
+        de la transacción sigue en pie.
+        """
+        for intento in range(1, self.max_reintentos + 1):
+            marca = self._marca()
+            self.cur.execute(f"SAVEPOINT {nombre}")
+            try:
+                resultado = funcion(*args)
+            except TransactionRollbackError as e:
+                self.cur.execute(f"ROLLBACK TO SAVEPOINT {nombre}")
+                self._deshacer(marca)
+                if intento == self.max_reintentos:
+                    raise
+                self.crawler.stats.inc_value("actas/bd/reintentos_seccion")
+                logger.warning("[PIPELINE ACTA][REINTENTO] Sección %s (%d/%d): %s",
+                               nombre, intento, self.max_reintentos, e.pgcode)
+                time.sleep(0.1 * intento)
+            except Exception:
+                self.cur.execute(f"ROLLBACK TO SAVEPOINT {nombre}")
+                self._deshacer(marca)
+                raise
+            else:
+                self.cur.execute(f"RELEASE SAVEPOINT {nombre}")
+                return resultado
 
-        goles_local = item.get("goles_local")
-        goles_visitante = item.get("goles_visitante")
+    # ----------------------------------
+    # SECCIONES DEL ACTA
+    # ----------------------------------
 
+    def _escribir_arbitro(self, item):
         # ----------------------------------
         # ÁRBITRO
         # ----------------------------------
@@ -695,8 +999,10 @@ class ActasPostgresPipeline:
         if nombre_arbitro or apellidos_arbitro:
             id_arbitro = self._get_or_create_arbitro(nombre_arbitro, apellidos_arbitro, delegacion)
         else:
-            print("[ACTAS][ARBITRO] No hay árbitro en el acta.")
+            self.muestreo.debug("actas/sin_arbitro", "[ACTAS][ARBITRO] No hay árbitro en el acta.")
+        return id_arbitro
 
+    def _escribir_campo(self, item):
         # ----------------------------------
         # CAMPO
         # ----------------------------------
@@ -706,7 +1012,21 @@ class ActasPostgresPipeline:
         if codigo_estadio:
             id_campo = self._get_or_create_campo(codigo_estadio)
         else:
-            print("[ACTAS][CAMPO] No hay código de estadio.")
+            self.muestreo.debug("actas/sin_campo", "[ACTAS][CAMPO] No hay código de estadio.")
+        return id_campo
+
+    def _escribir_partido(self, item, id_arbitro, id_campo):
+        id_grupo = item.get("id_grupo")
+        id_local = item.get("id_local")
+        id_visitante = item.get("id_visitante")
+
+        fecha = item.get("fecha") or None
+        hora = item.get("hora") or None
+
+        estado = item.get("estado")
+
+        goles_local = item.get("goles_local")
+        goles_visitante = item.get("goles_visitante")
 
         # ----------------------------------
         # PARTIDOS
@@ -727,14 +1047,21 @@ class ActasPostgresPipeline:
         self.cur.execute(
             sql,
             (estado, goles_local, goles_visitante, id_campo,
-             id_arbitro, fecha, hora, id_local, id_visitante, id_grupo
+             id_arbitro, fecha, hora,
+             id_local, id_visitante, id_grupo
             ),
         )
 
         result = self.cur.fetchone()
         id_partido = result[0] if result else None
 
-        print(f"[PARTIDOS][UPDATE] id_grupo={id_grupo}, id_local={id_local}, id_visitante={id_visitante}")
+        self.muestreo.debug("actas/partido", "[PARTIDOS][UPDATE] id_grupo=%s, id_local=%s, id_visitante=%s",
+                            id_grupo, id_local, id_visitante)
+        return id_partido
+
+    def _escribir_jugadores(self, item, id_partido):
+        id_local = item.get("id_local")
+        id_visitante = item.get("id_visitante")
 
         # ----------------------------------
         # TITULARES
@@ -743,11 +1070,7 @@ class ActasPostgresPipeline:
         jugadores_visitante = item.get("jugadores_visitante")
 
         for jugador in jugadores_local:
-            nombre = jugador["nombre"]
-            apellidos = jugador["apellidos"]
-            dorsal = jugador.get("dorsal", None)
-
-            id_jugador = self.get_or_create_jugador(nombre, apellidos)
+            id_jugador = self.get_or_create_jugador(jugador.nombre, jugador.apellidos)
             self.ensure_jugador_equipo(id_jugador, id_local)
 
             self.insert_alineacion(
@@ -755,15 +1078,11 @@ class ActasPostgresPipeline:
                 id_equipo=id_local,
                 id_partido=id_partido,
                 titular=True,
-                dorsal=dorsal
+                dorsal=jugador.dorsal
             )
 
         for jugador in jugadores_visitante:
-            nombre = jugador["nombre"]
-            apellidos = jugador["apellidos"]
-            dorsal = jugador.get("dorsal", None)
-
-            id_jugador = self.get_or_create_jugador(nombre, apellidos)
+            id_jugador = self.get_or_create_jugador(jugador.nombre, jugador.apellidos)
             self.ensure_jugador_equipo(id_jugador, id_visitante)
 
             self.insert_alineacion(
@@ -771,7 +1090,7 @@ class ActasPostgresPipeline:
                 id_equipo=id_visitante,
                 id_partido=id_partido,
                 titular=True,
-                dorsal=dorsal
+                dorsal=jugador.dorsal
             )
 
         # ----------------------------------
@@ -781,11 +1100,7 @@ class ActasPostgresPipeline:
         suplentes_visitante = item.get("suplentes_visitante")
 
         for jugador in suplentes_local:
-            nombre = jugador["nombre"]
-            apellidos = jugador["apellidos"]
-            dorsal = jugador.get("dorsal", None)
-
-            id_jugador = self.get_or_create_jugador(nombre, apellidos)
+            id_jugador = self.get_or_create_jugador(jugador.nombre, jugador.apellidos)
             self.ensure_jugador_equipo(id_jugador, id_local)
 
             self.insert_alineacion(
@@ -793,15 +1108,11 @@ class ActasPostgresPipeline:
                 id_equipo=id_local,
                 id_partido=id_partido,
                 titular=False,
-                dorsal=dorsal
+                dorsal=jugador.dorsal
             )
         
         for jugador in suplentes_visitante:
-            nombre = jugador["nombre"]
-            apellidos = jugador["apellidos"]
-            dorsal = jugador.get("dorsal", None)
-
-            id_jugador = self.get_or_create_jugador(nombre, apellidos)
+            id_jugador = self.get_or_create_jugador(jugador.nombre, jugador.apellidos)
             self.ensure_jugador_equipo(id_jugador, id_visitante)
 
             self.insert_alineacion(
@@ -809,9 +1120,13 @@ class ActasPostgresPipeline:
                 id_equipo=id_visitante,
                 id_partido=id_partido,
                 titular=False,
-                dorsal=dorsal
+                dorsal=jugador.dorsal
             )
-        
+
+    def _escribir_staff(self, item, id_partido):
+        id_local = item.get("id_local")
+        id_visitante = item.get("id_visitante")
+
         # ----------------------------------
         # CUERPO TÉCNICO
         # ----------------------------------
@@ -819,35 +1134,31 @@ class ActasPostgresPipeline:
         staff_visitante = item.get("staff_visitante")
 
         for staff in staff_local:
-            nombre = staff["nombre"]
-            apellidos = staff["apellidos"]
-            rol = staff.get("rol", None)
-
-            id_staff = self.get_or_create_staff(nombre, apellidos)
+            id_staff = self.get_or_create_staff(staff.nombre, staff.apellidos)
             self.ensure_staff_equipo(id_staff, id_local)
 
             self.insert_staff_partido(
                 id_staff=id_staff,
                 id_equipo=id_local,
                 id_partido=id_partido,
-                rol=rol
+                rol=staff.rol
             )
         
         for staff in staff_visitante:
-            nombre = staff["nombre"]
-            apellidos = staff["apellidos"]
-            rol = staff.get("rol", None)
-
-            id_staff = self.get_or_create_staff(nombre, apellidos)
+            id_staff = self.get_or_create_staff(staff.nombre, staff.apellidos)
             self.ensure_staff_equipo(id_staff, id_visitante)
 
             self.insert_staff_partido(
                 id_staff=id_staff,
                 id_equipo=id_visitante,
                 id_partido=id_partido,
-                rol=rol
+                rol=staff.rol
             )
-        
+
+    def _escribir_eventos(self, item, id_partido):
+        id_local = item.get("id_local")
+        id_visitante = item.get("id_visitante")
+
         # ----------------------------------
         # EVENTOS
         # ----------------------------------
@@ -856,88 +1167,138 @@ class ActasPostgresPipeline:
         goles = item.get("goles", [])
 
         for tarjeta in tarjetas_local:
-            nombre = tarjeta["nombre"]
-            apellidos = tarjeta["apellidos"]
-            tipo = self.map_tipo_tarjeta(tarjeta["tipo"])
-            minuto = tarjeta["minuto"]
-            minuto = int(minuto) if minuto not in (None, "") else None
-            dorsal_raw = tarjeta["dorsal"]
-            
-            dorsal_clean = (
-                dorsal_raw.replace('\xa0', '').strip()
-                if dorsal_raw else None
-            )
+            # Las tarjetas sin dorsal no se asignan a ningún jugador
+            if tarjeta.dorsal is None:
+                continue
+
+            id_jugador = self.get_or_create_jugador(tarjeta.nombre, tarjeta.apellidos)
+            self.ensure_jugador_equipo(id_jugador, id_local)
+            self.insert_evento(id_partido, id_jugador, id_local, tarjeta.minuto,
+                               self.map_tipo_tarjeta(tarjeta.tipo))
 
-            if dorsal_clean:
-                dorsal = int(dorsal_clean)
-                id_jugador = self.get_or_create_jugador(nombre, apellidos)
+        for tarjeta in tarjetas_visitante:
+            # Las tarjetas sin dorsal no se asignan a ningún jugador
+            if tarjeta.dorsal is None:
+                continue
 
-                self.ensure_jugador_equipo(id_jugador, id_local)
-                
-                self.insert_evento(id_partido, id_jugador, id_local, minuto, tipo)
+            id_jugador = self.get_or_create_jugador(tarjeta.nombre, tarjeta.apellidos)
+            self.ensure_jugador_equipo(id_jugador, id_visitante)
+            self.insert_evento(id_partido, id_jugador, id_visitante, tarjeta.minuto,
+                               self.map_tipo_tarjeta(tarjeta.tipo))
 
-            else:
-                pass
+        for gol in goles:
+            id_jugador = self.get_or_create_jugador(gol.nombre, gol.apellidos)
+            self.insert_evento(id_partido, id_jugador, gol.id_equipo, gol.minuto,
+                               self.map_tipo_gol(gol.tipo))
 
-        for tarjeta in tarjetas_visitante:
-            nombre = tarjeta["nombre"]
-            apellidos = tarjeta["apellidos"]
-            tipo = self.map_tipo_tarjeta(tarjeta["tipo"])
-            minuto = tarjeta["minuto"]
-            minuto = int(minuto) if minuto not in (None, "") else None
-            dorsal_raw = tarjeta["dorsal"]
-
-            dorsal_clean = (
-                dorsal_raw.replace('\xa0', '').strip()
-                if dorsal_raw else None
+    def _escribir_acta(self, item):
+        self.muestreo.info("actas/item", "[ACTAS][ITEM] Procesando acta de partido %s vs %s",
+                          item.get("id_local"), item.get("id_visitante"))
+
+        id_arbitro = self._seccion("arbitro", self._escribir_arbitro, item)
+        id_campo = self._seccion("campo", self._escribir_campo, item)
+        id_partido = self._seccion("partido", self._escribir_partido, item, id_arbitro, id_campo)
+
+        self._seccion("jugadores", self._escribir_jugadores, item, id_partido)
+        self._seccion("staff", self._escribir_staff, item, id_partido)
+        self._seccion("eventos", self._escribir_eventos, item, id_partido)
+
+        # La huella va la última: si está en la BD, el acta está entera
+        if id_partido is not None and item.get("huella"):
+            self.cur.execute(
+                'UPDATE public.partidos SET huella_acta = %s WHERE id_partido = %s',
+                (item["huella"], id_partido),
             )
 
-            if dorsal_clean:
-                dorsal = int(dorsal_clean)
-                id_jugador = self.get_or_create_jugador(nombre, apellidos)
+        if self.ejecucion:
+            clave = clave_checkpoint(item.get("id_grupo"), item.get("id_local"), item.get("id_visitante"))
+            marcar_checkpoint(self.cur, self.ejecucion, "acta", clave)
 
-                self.ensure_jugador_equipo(id_jugador, id_visitante)
-                
-                self.insert_evento(id_partido, id_jugador, id_visitante, minuto, tipo)
-            else:
-                pass
+    def _escribir_acta_sola(self, item):
+        self._escribir_acta(item)
+        self._seccion("volcado", self.buffer.volcar)
 
-        for gol in goles:
-            nombre = gol["nombre"]
-            apellidos = gol["apellidos"]
-            tipo = self.map_tipo_gol(gol["tipo"])
-            minuto = gol["minuto"]
-            id_equipo = gol["id_equipo"]
+    def _confirmado(self, lote):
+        """Ya en la BD: a partir de aquí las mismas actas se pueden saltar."""
+        self.crawler.stats.inc_value("actas/bd/transacciones")
+        if self.huellas is None:
+            return
+        for item in lote:
+            if item.get("huella"):
+                self.huellas[(item.get("id_grupo"), item.get("id_local"), item.get("id_visitante"))] = item["huella"]
 
-            id_jugador = self.get_or_create_jugador(nombre, apellidos)
+    def _confirmar_lote(self):
+        """
+        Vuelca el buffer y hace commit de la transacción del lote. Las filas
+        de cada acta, su huella y su checkpoint se confirman juntos: si el
+        proceso muere antes, al reanudar se vuelven a pedir.
 
-            self.insert_evento(id_partido, id_jugador, id_equipo, minuto, tipo)
+        Si el volcado o el commit fallan, rollback y las actas del lote se
+        escriben de nuevo, cada una en su transacción: la que no se pueda
+        escribir no arrastra a las demás.
+        """
+        lote, self.lote = self.lote, []
+        if not lote:
+            return
 
+        try:
+            self._seccion("volcado", self.buffer.volcar)
+            self.conn.commit()
+        except Exception as e:
+            self.conn.rollback()
+            self._deshacer(self.marca_lote)
+            self.crawler.stats.inc_value("actas/bd/lotes_repetidos")
+            logger.warning("[PIPELINE ACTA] Lote de %d actas deshecho (%s): se escriben una a una", len(lote), e)
+            for item in lote:
+                self._repetir_acta(item)
+            return
+
+        del self.ids_nuevos[:]
+        self.crawler.stats.inc_value("actas/bd/lotes")
+        self.crawler.stats.max_value("actas/bd/actas_por_lote_max", len(lote))
+        self._confirmado(lote)
+
+    def _repetir_acta(self, item):
+        # El item ya siguió su camino: un fallo aquí solo se puede registrar
+        clave = (item.get("id_grupo"), item.get("id_local"), item.get("id_visitante"))
+        try:
+            self._en_transaccion("acta", self._escribir_acta_sola, item)
+        except Exception as e:
+            self.crawler.stats.inc_value("actas/bd/fallidas")
+            logger.error("[PIPELINE ACTA] Acta %s no escrita: %s", clave, e)
+        else:
+            self._confirmado([item])
+
+    def escribir_item(self, item, spider):
+        if not self.lote:
+            self.marca_lote = self._marca()
+
+        # Cada acta bajo su savepoint: si falla se deshace solo ella (y el
+        # error sube) y el resto del lote sigue
+        self._seccion("acta", self._escribir_acta, item)
+        self.lote.append(item)
+
+        if self.buffer.toca_volcar():
+            self._confirmar_lote()
         return item
 
-class CamposPostgresPipeline:
-    def open_spider(self, spider):
-        if spider.name != "campo":
-            return
+class CamposPostgresPipeline(EscrituraEnHilo):
+    spider_objetivo = "campo"
 
-        self.conn = get_connection()
+    def abrir(self, spider):
+        self.conn = obtener_conexion(spider.name)
         self.conn.autocommit = True
         self.cur = self.conn.cursor()
 
-        print("[PIPELINE CAMPO] Conectado a PostgreSQL")
-
-    def close_spider(self, spider):
-        if spider.name != "campo":
-            return
+        logger.info("[PIPELINE CAMPO] Conectado a PostgreSQL")
 
+    def cerrar(self, spider):
         self.cur.close()
-        self.conn.close()
-        print("[PIPELINE CAMPO] Conexión cerrada")
-
-    def process_item(self, item, spider):
-        if spider.name != "campo":
-            return item
+        volcar_metricas_pool(spider.crawler.stats)
+        liberar_conexion(self.conn)
+        logger.info("[PIPELINE CAMPO] Conexión cerrada")
 
+    def escribir_item(self, item, spider):
         codigo_web = item.get("codigo")
         nombre_campo = item.get("nombre_campo")
         terreno = item.get("terreno")
@@ -960,6 +1321,6 @@ class CamposPostgresPipeline:
             (nombre_campo, terreno, direccion, localidad, provincia, codigo_web),
         )
 
-        print(f"[CAMPOS][UPDATE] Nombre: {nombre_campo}, Codigo: {codigo_web}")
+        self.muestreo.info("campos/actualizado", "[CAMPOS][UPDATE] Nombre: %s, Codigo: %s", nombre_campo, codigo_web)
 
         return item
\ No newline at end of file
@@ -0,0 +1,39 @@
+import logging
+from collections import Counter
+
+
+class Muestreo:
+    """
+    Mensajes por fila (un jugador, un evento, un partido...) con muestreo:
+    de cada clave se registra el primero y después uno de cada `cada`; el
+    resto solo se cuenta. Si el nivel está desactivado, el mensaje ni se
+    formatea.
+
+    Los mensajes llevan `clave` y `n` (nº de mensajes de esa clave hasta
+    ahora) como campos extra del LogRecord.
+    """
+
+    def __init__(self, logger, cada=100):
+        self.logger = logger
+        self.cada = max(1, cada)
+        self.contadores = Counter()
+
+    def log(self, nivel, clave, msg, *args):
+        self.contadores[clave] += 1
+        n = self.contadores[clave]
+        if (n == 1 or n % self.cada == 0) and self.logger.isEnabledFor(nivel):
+            self.logger.log(nivel, f"{msg} [%s n=%d]", *args, clave, n,
+                            extra={"clave": clave, "n": n})
+
+    def debug(self, clave, msg, *args):
+        self.log(logging.DEBUG, clave, msg, *args)
+
+    def info(self, clave, msg, *args):
+        self.log(logging.INFO, clave, msg, *args)
+
+    def warning(self, clave, msg, *args):
+        self.log(logging.WARNING, clave, msg, *args)
+
+    def volcar_estadisticas(self, stats, prefijo="log"):
+        for clave, n in self.contadores.items():
+            stats.set_value(f"{prefijo}/{clave}", n)
@@ -0,0 +1,196 @@
+"""
+Resolución de slugs de club: el slug que sale del nombre del equipo
+(derive_club_slug) no siempre es el de la ficha del club en la web
+(vilaseca-cf → vila-seca-cf, les-corts-de-barcelona-club-esp →
+les-corts-de-barcelona-club-esportiu...).
+
+IndiceSlugs indexa los slugs publicados en el listado de clubes por
+trigramas y, para un slug desconocido, compara solo con los candidatos que
+más trigramas comparten (distancia de edición sin guiones, o las mismas
+palabras en otro orden). Los slugs largos, que pueden venir de un nombre
+truncado, se buscan además como prefijo en la lista ordenada.
+"""
+import bisect
+import heapq
+import math
+import re
+from collections import defaultdict
+
+from .normalizacion import slug as slug_de
+
+# Slugs de club en los enlaces de la web: /club/2526/damm-cf
+RE_ENLACE_CLUB = re.compile(r"/club/\d+/([a-z0-9-]+)")
+
+# Candidatos que se comparan tras el filtro de trigramas
+MAX_CANDIDATOS = 25
+# Fracción mínima de los trigramas del slug que debe compartir un candidato
+MIN_TRIGRAMAS_COMUNES = 0.4
+# Los nombres de equipo de la web se cortan: slugs de al menos esta longitud
+# pueden ser el principio del slug del club
+MIN_LONGITUD_TRUNCADO = 20
+
+
+def slugs_en_listado(textos):
+    """Slugs de club de los enlaces (href) de una página de listado."""
+    slugs = set()
+    for texto in textos:
+        coincidencia = RE_ENLACE_CLUB.search(texto or "")
+        if coincidencia:
+            slugs.add(coincidencia.group(1))
+    return slugs
+
+
+def compacto(slug):
+    return slug.replace("-", "")
+
+
+def palabras_ordenadas(slug):
+    return "-".join(sorted(p for p in slug.split("-") if p))
+
+
+def trigramas(texto):
+    texto = f"^{texto}$"
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def distancia(a, b, maximo):
+    """
+    Distancia de edición con transposiciones (cf ↔ fc cuenta 1). Solo se
+    calcula la banda |i - j| <= maximo y se corta en cuanto una fila entera
+    pasa de `maximo`; en ese caso devuelve maximo + 1.
+    """
+    if abs(len(a) - len(b)) > maximo:
+        return maximo + 1
+    fuera = maximo + 1
+    anterior2 = None
+    anterior = [j if j <= maximo else fuera for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        ca = a[i - 1]
+        desde = max(1, i - maximo)
+        hasta = min(len(b), i + maximo)
+        fila = [fuera] * (len(b) + 1)
+        fila[0] = i if i <= maximo else fuera
+        for j in range(desde, hasta + 1):
+            cb = b[j - 1]
+            valor = anterior[j - 1] + (ca != cb)
+            if anterior[j] + 1 < valor:
+                valor = anterior[j] + 1
+            if fila[j - 1] + 1 < valor:
+                valor = fila[j - 1] + 1
+            if anterior2 is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb \
+                    and anterior2[j - 2] + 1 < valor:
+                valor = anterior2[j - 2] + 1
+            fila[j] = valor
+        if min(fila[desde - 1:hasta + 1]) > maximo:
+            return fuera
+        anterior2, anterior = anterior, fila
+    return min(anterior[-1], fuera)
+
+
+def tolerancia(slug):
+    """Ediciones admitidas: 1 por cada 10 caracteres, al menos 1."""
+    return max(1, len(compacto(slug)) // 10)
+
+
+def mismo_club(nombre_web, nombre_bd):
+    """
+    ¿Es la ficha del club que se buscaba? Compara como slugs el nombre de
+    la ficha y el de la tabla clubes, con la tolerancia de resolver(); el
+    de la BD sale del nombre del equipo y puede venir truncado.
+    """
+    if not nombre_web or not nombre_bd:
+        return False
+    web, bd = slug_de(nombre_web), slug_de(nombre_bd)
+    if palabras_ordenadas(web) == palabras_ordenadas(bd):
+        return True
+    if len(bd) >= MIN_LONGITUD_TRUNCADO and compacto(web).startswith(compacto(bd)):
+        return True
+    maximo = tolerancia(bd)
+    return distancia(compacto(web), compacto(bd), maximo) <= maximo
+
+
+class IndiceSlugs:
+
+    def __init__(self, slugs):
+        self.slugs = sorted(set(slugs))
+        self.conocidos = set(self.slugs)
+        self.compactos = [compacto(s) for s in self.slugs]
+        self.ordenados = [compacto(palabras_ordenadas(s)) for s in self.slugs]
+        self.por_compacto = sorted((texto, posicion) for posicion, texto in enumerate(self.compactos))
+        self.longitudes = [len(texto) for texto in self.compactos]
+        self.trigramas = [trigramas(texto) for texto in self.compactos]
+        self.por_trigrama = defaultdict(list)
+        for posicion, propios in enumerate(self.trigramas):
+            for trigrama in propios:
+                self.por_trigrama[trigrama].append(posicion)
+
+    def __len__(self):
+        return len(self.slugs)
+
+    def candidatos(self, slug):
+        """
+        Posiciones de los slugs que comparten al menos MIN_TRIGRAMAS_COMUNES
+        de los trigramas de `slug`, de más a menos compartidos. Quien cumpla
+        el mínimo tiene por fuerza alguno de los trigramas más raros, así que
+        solo se recorren sus listas (las de trigramas como "clu" o "cf$" son
+        enormes). Antes de contar se descartan por longitud los que no
+        pueden quedar dentro de la tolerancia.
+        """
+        texto = compacto(slug)
+        propios = sorted(trigramas(texto), key=lambda t: len(self.por_trigrama.get(t, ())))
+        minimo = math.ceil(MIN_TRIGRAMAS_COMUNES * len(propios))
+        posibles = set()
+        for trigrama in propios[:len(propios) - minimo + 1]:
+            posibles.update(self.por_trigrama.get(trigrama, ()))
+
+        maximo = tolerancia(slug)
+        desde = len(texto) - maximo
+        hasta = len(texto) + maximo
+        longitudes = self.longitudes
+        propios = set(propios)
+        comunes = (
+            (len(propios & self.trigramas[pos]), pos)
+            for pos in posibles if desde <= longitudes[pos] <= hasta
+        )
+        mejores = heapq.nlargest(MAX_CANDIDATOS, ((n, pos) for n, pos in comunes if n >= minimo))
+        return [pos for _, pos in mejores]
+
+    def puntuar(self, slug, posicion, maximo):
+        texto = compacto(slug)
+        candidato = self.compactos[posicion]
+        # Palabras cambiadas de sitio: solo si coinciden del todo
+        if compacto(palabras_ordenadas(slug)) == self.ordenados[posicion]:
+            return 0
+        return distancia(texto, candidato, maximo)
+
+    def truncados(self, slug):
+        """Slugs que empiezan exactamente por `slug` (búsqueda binaria)."""
+        if len(slug) < MIN_LONGITUD_TRUNCADO:
+            return []
+        texto = compacto(slug)
+        posiciones = []
+        i = bisect.bisect_left(self.por_compacto, (texto,))
+        while i < len(self.por_compacto) and self.por_compacto[i][0].startswith(texto):
+            posiciones.append(self.por_compacto[i][1])
+            i += 1
+        return posiciones
+
+    def resolver(self, slug):
+        """
+        Slug del listado para `slug`: él mismo si está, el único candidato
+        más cercano dentro de la tolerancia, o None (ninguno o empate).
+        """
+        if slug in self.conocidos:
+            return slug
+
+        maximo = tolerancia(slug)
+        puntuados = {posicion: 0 for posicion in self.truncados(slug)}
+        for posicion in self.candidatos(slug):
+            if posicion not in puntuados:
+                puntuados[posicion] = self.puntuar(slug, posicion, maximo)
+        puntuados = sorted((d, pos) for pos, d in puntuados.items() if d <= maximo)
+        if not puntuados:
+            return None
+        if len(puntuados) > 1 and puntuados[1][0] == puntuados[0][0]:
+            return None
+        return self.slugs[puntuados[0][1]]
@@ -39,29 +39,114 @@ DOWNLOAD_DELAY = 1
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
-#DOWNLOADER_MIDDLEWARES = {
-#    "futbol_scraper.middlewares.FutbolScraperDownloaderMiddleware": 543,
-#}
+DOWNLOADER_MIDDLEWARES = {
+    "scraping.futbol_scraper.middlewares.FutbolScraperDownloaderMiddleware": 543,
+}
+
+# Ritmo adaptativo por familia de URL (FutbolScraperDownloaderMiddleware).
+# DOWNLOAD_DELAY y CONCURRENT_REQUESTS_PER_DOMAIN son solo el punto de
+# partida de cada familia; el delay y la concurrencia se ajustan dentro de
+# estos límites según latencia y errores.
+FCF_THROTTLE_ENABLED = True
+FCF_THROTTLE_ERRORES = [403, 429, 500, 502, 503, 504]
+FCF_THROTTLE_DEFECTO = {
+    "delay_min": 0.5,
+    "delay_max": 30,
+    "concurrencia_max": 2,
+    # Segundos de latencia media a partir de los que no se acelera más
+    # (y con el doble se frena)
+    "latencia_objetivo": 2.0,
+    # Respuestas buenas seguidas antes de cada paso de aceleración
+    "exitos_para_acelerar": 10,
+}
+FCF_THROTTLE = {
+    "acta": {"latencia_objetivo": 3.0},
+    "cargar_competiciones": {"delay_min": 0.25, "concurrencia_max": 4},
+    "cargar_grupos": {"delay_min": 0.25, "concurrencia_max": 4},
+    "club": {"concurrencia_max": 1},
+    "camp": {"concurrencia_max": 1},
+}
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
-#EXTENSIONS = {
-#    "scrapy.extensions.telnet.TelnetConsole": None,
-#}
+EXTENSIONS = {
+    "scraping.futbol_scraper.checkpoints.CheckpointsEtapa": 500,
+    "scraping.futbol_scraper.shards.LeaseShard": 510,
+}
+
+# Nombre de la ejecución reanudable (cli.py --resume NOMBRE); None = sin checkpoints
+FCF_REANUDAR = None
+
+# Crawling repartido entre nodos (cli.py scrape ... --shard i/N). Cada nodo
+# mantiene un lease en leases_shards con un latido cada FCF_SHARD_LATIDO s;
+# un shard sin latido durante FCF_SHARD_TTL s lo puede tomar otro nodo.
+# En `scrape all`, un nodo que espera a que los demás terminen una etapa lo
+# comprueba cada FCF_SHARD_ESPERA s.
+FCF_SHARD = None
+FCF_SHARD_EJECUCION = "defecto"
+FCF_SHARD_NODO = None
+FCF_SHARD_LATIDO = 60
+FCF_SHARD_TTL = 300
+FCF_SHARD_ESPERA = 30
+
+# Logging. A DEBUG, Scrapy registra cada petición y cada item entero; los
+# mensajes por fila de los pipelines salen muestreados (el primero y uno de
+# cada FCF_LOG_MUESTREO por tipo) y el total de cada tipo queda en las
+# stats (log/*). cli.py: --log-level DEBUG, --debug-items (DebugPrintPipeline).
+LOG_LEVEL = "INFO"
+FCF_LOG_MUESTREO = 100
+FCF_DEBUG_ITEMS = False
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 ITEM_PIPELINES = {
-    "scraping.futbol_scraper.pipelines.DebugPrintPipeline": 100,
     "scraping.futbol_scraper.pipelines.CompeticionesPostgresPipeline": 300,
     "scraping.futbol_scraper.pipelines.GruposPostgresPipeline": 400,
     "scraping.futbol_scraper.pipelines.EquiposYClubesPostgresPipeline": 500,
     "scraping.futbol_scraper.pipelines.ClubesPostgresPipeline": 600,
     "scraping.futbol_scraper.pipelines.CalendariosPostgresPipeline": 700,
+    "scraping.futbol_scraper.pipelines.ActasHuellaPipeline": 750,
     "scraping.futbol_scraper.pipelines.ActasPostgresPipeline": 800,
     "scraping.futbol_scraper.pipelines.CamposPostgresPipeline": 900,
 }
 
+# Las actas se escriben por lotes: varias en una transacción, cada una bajo
+# su savepoint y con un savepoint por sección. Alineaciones, staff, eventos y
+# relaciones del lote se vuelcan en bloque y se hace commit al llegar a N
+# filas pendientes o pasados N segundos (y al cerrar el spider)
+ACTAS_LOTE_MAX_FILAS = 2000
+ACTAS_LOTE_MAX_SEGUNDOS = 10
+# Intentos ante deadlocks / fallos de serialización (por sección y por acta)
+ACTAS_MAX_REINTENTOS = 3
+
+# Backend de extracción de actas, equipos y calendario: "selector"
+# (Selector de Scrapy) o "lxml" (XPaths precompilados sobre el árbol lxml).
+# Cada spider lo puede cambiar con -a backend=...; paridad entre ambos:
+# python -m bench.paridad_extraccion
+FCF_EXTRACCION = "selector"
+
+# Procesos para parsear las actas fuera del reactor (0 = en el propio
+# reactor). Útil sobre todo con --replay, cuando la descarga ya no limita.
+ACTAS_PROCESOS_PARSEO = 0
+
+# Máximo de entradas por tabla en la caché de identidades (jugadores,
+# cuerpo técnico, árbitros y campos) del pipeline de actas
+ACTAS_CACHE_MAX_ENTRADAS = 100000
+
+# Listado de clubes de la web ({temporada_ruta} se sustituye). ClubesSpider
+# lo descarga cuando hay clubes sin slug web conocido en slugs_clubes y los
+# resuelve contra él (por parecido si no están tal cual); los que no se
+# resuelven se piden con su propio slug. None = pedirlos todos así
+FCF_CLUBES_LISTADO = "https://www.fcf.cat/clubs/{temporada_ruta}"
+# Días que un club sin ficha (404 con su propio slug, o parecido que no se
+# confirma) queda en slugs_clubes como 'sin_resolver': hasta entonces ni se
+# pide ni hace descargar el listado
+FCF_CLUBES_SIN_RESOLVER_DIAS = 7
+
+# Los pipelines de PostgreSQL escriben en un hilo propio; con esta cantidad
+# de items esperando a escribirse se pausa el engine hasta que baja a la mitad
+PIPELINE_COLA_MAX = 100
+
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
 #AUTOTHROTTLE_ENABLED = True
@@ -75,13 +160,28 @@ ITEM_PIPELINES = {
 # Enable showing throttling stats for every response received:
 #AUTOTHROTTLE_DEBUG = False
 
-# Enable and configure HTTP caching (disabled by default)
+# Caché HTTP del proyecto: los aciertos no pasan por el slot de descarga,
+# así que no esperan DOWNLOAD_DELAY
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#httpcache-middleware-settings
-#HTTPCACHE_ENABLED = True
-#HTTPCACHE_EXPIRATION_SECS = 0
-#HTTPCACHE_DIR = "httpcache"
-#HTTPCACHE_IGNORE_HTTP_CODES = []
-#HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
+HTTPCACHE_ENABLED = True
+HTTPCACHE_EXPIRATION_SECS = 0
+HTTPCACHE_DIR = "httpcache"
+HTTPCACHE_GZIP = True
+HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
+HTTPCACHE_POLICY = "scraping.futbol_scraper.httpcache.PoliticaCacheFCF"
+
+# TTL en segundos por familia de URL (primer segmento de la ruta); None = no
+# caduca. Las actas cerradas no caducan nunca, tengan el TTL que tengan.
+FCF_CACHE_TTL = {
+    "acta": 3600,
+    "calendari": 86400,
+    "classificacio": 86400,
+    "cargar_competiciones": 86400,
+    "cargar_grupos": 86400,
+    "club": 7 * 86400,
+    "camp": 7 * 86400,
+}
+FCF_CACHE_TTL_DEFECTO = 86400
 
 # Set settings whose default value is deprecated to a future-proof value
 FEED_EXPORT_ENCODING = "utf-8"
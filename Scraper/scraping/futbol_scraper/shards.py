@@ -0,0 +1,120 @@
+import logging
+import zlib
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.defer import deferred_from_coro
+from twisted.internet import task, threads
+
+from db.connection import sesion
+from db.shards import liberar_lease, renovar_lease
+
+logger = logging.getLogger(__name__)
+
+
+def leer_shard(texto):
+    """
+    "i/N" → (i, N), con i de 1 a N; "auto/N" → (None, N).
+    """
+    indice, _, total = str(texto).partition("/")
+    total = int(total)
+    if total < 1:
+        raise ValueError(f"Shard inválido: {texto}")
+    if indice == "auto":
+        return None, total
+    indice = int(indice)
+    if not 1 <= indice <= total:
+        raise ValueError(f"Shard inválido: {texto}")
+    return indice, total
+
+
+def shard_del_spider(spider):
+    """(resto, total) del shard de este nodo según FCF_SHARD, o None si no hay reparto."""
+    valor = spider.settings.get("FCF_SHARD")
+    if not valor:
+        return None
+    indice, total = leer_shard(valor)
+    return indice - 1, total
+
+
+def en_shard(clave, shard):
+    """
+    ¿Le toca esta clave a este nodo? Las claves numéricas (id_grupo, códigos
+    de la web) van por módulo, de modo que una competición y sus grupos
+    caen en el mismo shard si el código coincide; los slugs, por crc32.
+    """
+    if shard is None:
+        return True
+    resto, total = shard
+    if isinstance(clave, str) and clave.isdigit():
+        clave = int(clave)
+    if isinstance(clave, int):
+        return clave % total == resto
+    return zlib.crc32(str(clave).encode("utf-8")) % total == resto
+
+
+class LeaseShard:
+    """
+    Mantiene el latido del lease del shard mientras corre el spider. Si el
+    lease se pierde (otro nodo lo ha tomado) se cierra el spider; si el
+    spider no acaba bien se suelta el shard para que lo tome otro nodo.
+    """
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        self.crawler = crawler
+        self.shard, self.total = leer_shard(settings.get("FCF_SHARD"))
+        self.ejecucion = settings.get("FCF_SHARD_EJECUCION")
+        self.nodo = settings.get("FCF_SHARD_NODO")
+        self.intervalo = settings.getfloat("FCF_SHARD_LATIDO", 60)
+        self.tarea = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not (crawler.settings.get("FCF_SHARD") and crawler.settings.get("FCF_SHARD_NODO")):
+            raise NotConfigured
+        ext = cls(crawler)
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def _en_bd(self, funcion):
+        with sesion("shards") as conn:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                return funcion(cur, self.ejecucion, self.shard, self.total, self.nodo)
+
+    def latido(self):
+        # La consulta (y la espera por una conexión del pool) en un hilo; la
+        # LoopingCall no vuelve a llamar hasta que acaba
+        d = threads.deferToThread(self._en_bd, renovar_lease)
+        d.addCallbacks(self._tras_latido, self._latido_fallido)
+        return d
+
+    def _latido_fallido(self, fallo):
+        # Se reintenta en el siguiente latido; si la BD no vuelve, otro nodo
+        # tomará el shard pasado el TTL y _tras_latido cerrará el spider
+        logger.warning("[SHARD] Latido del shard %s/%s fallido: %s", self.shard, self.total, fallo.value)
+
+    def _tras_latido(self, renovado):
+        # Si entretanto el spider ya se ha cerrado, no hay nada que parar
+        if renovado or self.tarea is None or not self.tarea.running:
+            return
+        logger.warning("[SHARD] Lease %s/%s perdido: otro nodo lo ha tomado", self.shard, self.total)
+        self.tarea.stop()
+        self.tarea = None
+        deferred_from_coro(self.crawler.engine.close_spider_async(reason="lease_perdido"))
+
+    def spider_opened(self, spider):
+        self.tarea = task.LoopingCall(self.latido)
+        self.tarea.start(self.intervalo, now=True)
+
+    def spider_closed(self, spider, reason):
+        if self.tarea is not None and self.tarea.running:
+            self.tarea.stop()
+        if reason not in ("finished", "lease_perdido"):
+            d = threads.deferToThread(self._en_bd, liberar_lease)
+            d.addCallback(lambda _: logger.warning(
+                "[SHARD] Spider cerrado (%s): shard %s/%s liberado", reason, self.shard, self.total))
+            return d
+        return None
@@ -1,73 +1,291 @@
 import scrapy
 import re
 from datetime import date
-from db.connection import get_connection
-from ..items import ActasItem
+from lxml import etree
+from parsel import Selector, SelectorList
+from scrapy.http import HtmlResponse
+from db.connection import obtener_conexion, liberar_conexion
+from db.checkpoints import clave_checkpoint
+from ..items import ActasItem, Gol, Jugador, Staff, Tarjeta
+from ..checkpoints import checkpoints_del_spider
+from ..hilos import en_hilo
+from ..shards import shard_del_spider
+from ..parseo_en_procesos import crear_pool, en_pool
+from ..extraccion import backend_del_spider, primero, primero_en
+from ..normalizacion import separar_nombre, separar_nombres
 from scrapy import signals
+from twisted.internet import threads
+
+# -----------------------------
+# XPATHS PRECOMPILADOS DEL ACTA
+# -----------------------------
+XP_ESCUDO_LOCAL = etree.XPath(
+    '//div[@class="acta-head"]/div[contains(@class, "acta-escut")][1]/a/img/@src', smart_strings=False)
+XP_ESCUDO_VISITANTE = etree.XPath(
+    '//div[@class="acta-head"]/div[contains(@class, "acta-escut")][last()]/a/img/@src', smart_strings=False)
+XP_FECHA_HORA = etree.XPath('//div[contains(@class, "print-acta-data")]/text()', smart_strings=False)
+XP_ESTADO = etree.XPath('//div[@class="acta-estat"]/span/text()', smart_strings=False)
+XP_RESULTADO = etree.XPath('//div[@class="acta-marcador"]/span/text()', smart_strings=False)
+
+XP_TABLAS = etree.XPath('//table[@class="acta-table"]')
+XP_CABECERAS = etree.XPath('thead/tr/th')
+XP_COLUMNAS_TABLA = etree.XPath('ancestor::div[contains(@class, "col-md-4")]')
+XP_COLUMNAS_LOCAL = etree.XPath('//div[contains(@class, "col-md-4")][1]')
+XP_COLUMNAS_VISITANTE = etree.XPath('//div[contains(@class, "col-md-4")][last()]')
+
+# Backend lxml: filas y celdas de cada tabla
+XP_FILAS = etree.XPath('.//tbody/tr')
+XP_JUGADOR = etree.XPath('.//td[2]/a/text()', smart_strings=False)
+XP_DORSAL = etree.XPath('.//td[1]/span/text()', smart_strings=False)
+XP_STAFF_NOMBRE = etree.XPath('normalize-space(.//td[1])', smart_strings=False)
+XP_STAFF_ROL = etree.XPath('.//td[2]//span/@class', smart_strings=False)
+XP_GOL_TIPO = etree.XPath('.//div[@class="gol"]//div[contains(@class, "gol-")]/@class', smart_strings=False)
+XP_GOL_JUGADOR = etree.XPath('.//td[3]/a/text()', smart_strings=False)
+XP_GOL_MINUTO = etree.XPath('./td[last()]/text()', smart_strings=False)
+XP_GOL_ESCUDO = etree.XPath('.//img[contains(@class, "acta-escut-gol")]/@src', smart_strings=False)
+XP_TARJETA_JUGADOR = etree.XPath('.//a/text()', smart_strings=False)
+XP_TARJETA_TIPO = etree.XPath(
+    './/div[@class="acta-stat-box"]/*[contains(@class, "groga") or contains(@class, "vermella")]/@class',
+    smart_strings=False)
+XP_TARJETA_MINUTO = etree.XPath('.//div[@class="acta-minut-targeta"]/text()', smart_strings=False)
+XP_ESTADIO_URL = etree.XPath('.//tbody//a[1]/@href', smart_strings=False)
+XP_ARBITRO_FILA = etree.XPath('.//tbody/tr[1]')
+XP_ARBITRO_NOMBRE = etree.XPath('.//td[2]/text()', smart_strings=False)
+XP_ARBITRO_DELEGACION = etree.XPath('.//td[2]/span/text()', smart_strings=False)
+
+# Secciones del acta según el texto de la cabecera de cada tabla
+SECCIONES_COLUMNA = ("Titulars", "Suplents", "Equip Tècnic", "Targetes")
+SECCIONES_GLOBALES = ("Gols", "Estadi", "Àrbitres")
+
+
+# Prioridad de los partidos sin fecha o aún por jugar: al final de la cola
+PRIORIDAD_MINIMA = -10**6
+
+# Filas del cursor de partidos pendientes que se traen de cada vez
+LOTE_SEMILLA = 2000
+
+
+def _entero(texto):
+    """Dorsal o minuto de la web ("\xa07 ", "23") como int; vacío o no numérico → None."""
+    if texto is None:
+        return None
+    texto = texto.replace("\xa0", "").strip()
+    return int(texto) if texto.isdigit() else None
+
+
+def _fecha(valor):
+    if valor is None or isinstance(valor, date):
+        return valor
+    return date.fromisoformat(valor)
+
+
+def _minuto(texto):
+    """Minuto de la web ("23'") como int; vacío → None."""
+    return _entero(texto.replace("'", "")) if texto else None
+
+
+def _sin_espacios(texto):
+    return texto.strip() if texto else ""
+
+
+# -----------------------------
+# CAMPOS DEL ACTA, comunes a los dos backends: reciben los textos de cada
+# fila tal como salen del HTML
+# -----------------------------
+def jugadores_de_filas(filas):
+    """(texto "APELLIDOS, NOMBRE", dorsal) por fila; las filas sin jugador se saltan."""
+    filas = [(texto, dorsal) for texto, dorsal in filas if texto]
+    # Todos los nombres de la sección en un lote
+    nombres = separar_nombres([texto for texto, _ in filas])
+    return [Jugador(nombre, apellidos, _entero(dorsal))
+            for (nombre, apellidos), (_, dorsal) in zip(nombres, filas)]
+
+
+def staff_de_filas(filas):
+    """(nombre, clase del span del rol) por fila."""
+    filas = list(filas)
+    nombres = separar_nombres([texto for texto, _ in filas])
+    return [Staff(nombre, apellidos, rol.capitalize() if rol else "")
+            for (nombre, apellidos), (_, rol) in zip(nombres, filas)]
+
+
+def tipo_gol(clase):
+    if clase:
+        if "gol-penal" in clase:
+            return "Penal"
+        if "gol-propia" in clase:
+            return "Propia"
+    return "Normal"
+
+
+def tipo_tarjeta(clase):
+    if clase:
+        if "groga-2" in clase:
+            return "Segona Groga"     # Segunda amarilla
+        if "groga" in clase:
+            return "Groga"            # Amarilla
+        if "vermella" in clase:
+            return "Vermella"         # Roja directa
+    return "Desconocida"
+
+
+def gol_de_fila(clase_tipo, texto, minuto, id_equipo):
+    nombre, apellidos = separar_nombre(_sin_espacios(texto))
+    return Gol(tipo_gol(clase_tipo), nombre, apellidos, _minuto(minuto), id_equipo)
+
+
+def tarjeta_de_fila(texto, clase_tipo, minuto, dorsal):
+    nombre, apellidos = separar_nombre(_sin_espacios(texto))
+    return Tarjeta(nombre, apellidos, tipo_tarjeta(clase_tipo), _minuto(minuto), _entero(dorsal))
+
+
+def prioridad_acta(fecha_partido, estado_partido, hoy):
+    """
+    Prioridad de la petición del acta: cuanto más reciente el partido, antes.
+    A igual fecha, los que aún no están 'Acabado' van por delante.
+    """
+    if fecha_partido is None or fecha_partido > hoy:
+        return PRIORIDAD_MINIMA
+    return -2 * (hoy - fecha_partido).days + (0 if estado_partido == "Acabado" else 1)
+
+def cerrar_semilla(conn, cur):
+    try:
+        cur.close()
+    finally:
+        liberar_conexion(conn)
 
 class ActasSpider(scrapy.Spider):
     name = "acta"
+    # Al reanudar, start() siembra de nuevo todo lo que no tiene checkpoint:
+    # sin JOBDIR (ver cli.jobdir)
+    siembra_desde_checkpoints = True
     
-    def __init__(self, temporada="2025-2026", temporada_ruta="2526", toda_temporada=False, *args, **kwargs):
+    def __init__(self, temporada="2025-2026", temporada_ruta="2526", toda_temporada=False,
+                 desde=None, hasta=None, backend=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.temporada = temporada
         self.temporada_ruta = temporada_ruta
         self.toda_temporada = toda_temporada
+        # Ventana opcional de fechas de partido (date o "AAAA-MM-DD")
+        self.desde = _fecha(desde)
+        self.hasta = _fecha(hasta)
+        # "selector" o "lxml" (ver extraccion.py); None → FCF_EXTRACCION
+        self.backend = backend
+        self.pool = None
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        # Con ACTAS_PROCESOS_PARSEO > 0 las actas se parsean en un pool de
+        # procesos (ver parse_acta_en_pool)
+        procesos = crawler.settings.getint("ACTAS_PROCESOS_PARSEO", 0)
+        if procesos > 0:
+            spider.pool = crear_pool(procesos)
+            crawler.signals.connect(spider.cerrar_pool, signal=signals.spider_closed)
+        return spider
+
+    def cerrar_pool(self, spider):
+        # Esperar a los procesos bloquea: en un hilo, y Scrapy espera al Deferred
+        return threads.deferToThread(self.pool.shutdown, wait=True, cancel_futures=True)
+
+    async def start(self):
+        """
+        Cargar en una sola consulta todos los partidos pendientes con su
+        competición, grupo, abreviatura y slugs de equipo. Se lee con un
+        cursor con nombre (server-side) para no traer toda la temporada a
+        memoria de golpe.
+
+        Los partidos salen de más reciente a más antiguo y cada petición
+        lleva una prioridad acorde (ver prioridad_acta), para que los
+        resultados del fin de semana entren en la BD los primeros.
 
-    def start_requests(self):
+        Al reanudar (--resume) se saltan los partidos con el acta ya escrita.
+
+        Todo lo que toca la BD (sacar la conexión del pool, cada lote del
+        cursor) va a un hilo con en_hilo, para no parar el reactor.
+        """
+        hoy = date.today()
+        completados = await en_hilo(checkpoints_del_spider, self)
+        callback = self.parse_acta_en_pool if self.pool else self.parse_acta
+
+        sql = """
+            SELECT
+                co.slug AS slug_competicion,
+                co.abreviatura AS abreviatura_grupo,
+                gr.slug AS slug_grupo,
+                gr.id_grupo,
+                eql.slug,
+                eqv.slug,
+                pa.id_equipo_local,
+                pa.id_equipo_visitante,
+                pa.fecha_partido,
+                pa.estado_partido
+            FROM competiciones co
+            JOIN grupos gr ON co.id_competicion = gr.id_competicion
+            JOIN partidos pa ON pa.id_grupo = gr.id_grupo
+            JOIN equipos eql ON pa.id_equipo_local = eql.id_equipo
+            JOIN equipos eqv ON pa.id_equipo_visitante = eqv.id_equipo
         """
-        Cargar todos los grupos desde SQL con su slug, nº de grupo y slug de competición.
+        condiciones = []
+        params = []
+
+        if not self.toda_temporada:
+            condiciones.append("pa.estado_partido != 'Acabado' and pa.fecha_partido < %s")
+            params.append(hoy)
+        if self.desde:
+            condiciones.append("pa.fecha_partido >= %s")
+            params.append(self.desde)
+        if self.hasta:
+            condiciones.append("pa.fecha_partido <= %s")
+            params.append(self.hasta)
+
+        # Con --shard, solo los grupos de este nodo (mismo reparto que
+        # shards.en_shard: id_grupo módulo N)
+        shard = shard_del_spider(self)
+        if shard:
+            resto, total = shard
+            condiciones.append("mod(gr.id_grupo, %s) = %s")
+            params.extend([total, resto])
+
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+
+        # Jugados primero (los futuros y sin fecha al final), del más reciente
+        # al más antiguo, y a igual fecha los que no están 'Acabado'
+        sql += """
+            ORDER BY pa.fecha_partido > %s,
+                     pa.fecha_partido DESC NULLS LAST,
+                     pa.estado_partido = 'Acabado'
         """
-        with get_connection() as conn:
-            with conn.cursor() as cur:
-                sql = """
-                SELECT 
-                    co.slug AS slug_competicion,
-                    co.abreviatura AS abreviatura_grupo,
-                    gr.slug AS slug_grupo,
-                    gr.id_grupo
-                FROM competiciones co
-                JOIN grupos gr ON co.id_competicion = gr.id_competicion;
-                """
-                cur.execute(sql)
-                competiciones = cur.fetchall()
-
-        for slug_competicion, abreviatura, slug_grupo, id_grupo in competiciones:
-            with get_connection() as conn:
-                with conn.cursor() as cur:
-                    if self.toda_temporada:
-                        sql = """
-                            SELECT eql.slug, eqv.slug, pa.id_equipo_local", pa.id_equipo_visitante
-                            FROM partidos pa
-                            JOIN equipos eql ON pa.id_equipo_local = eql.id_equipo
-                            JOIN equipos eqv ON pa.id_equipo_visitante = eqv.id_equipo
-                            WHERE pa.id_grupo = %s
-                        """
-                        cur.execute(sql, (id_grupo,))
-                        equipos = cur.fetchall()
-                    else:
-                        sql = """
-                            SELECT eql.slug, eqv.slug, pa.id_equipo_local, pa.id_equipo_visitante
-                            FROM partidos pa
-                            JOIN equipos eql ON pa.id_equipo_local = eql.id_equipo
-                            JOIN equipos eqv ON pa.id_equipo_visitante = eqv.id_equipo
-                            WHERE pa.id_grupo = %s 
-                                and pa.estado_partido != 'Acabado' 
-                                and pa.fecha_partido < %s
-                        """
-                        cur.execute(sql, (id_grupo, date.today()))
-                        equipos = cur.fetchall()
-
-            for eq_local, eq_visitante, id_local, id_visitante in equipos:
-                url = f"https://www.fcf.cat/acta/{self.temporada_ruta}/futbol-11/{slug_competicion}/{slug_grupo}/{abreviatura}/{eq_local}/{abreviatura}/{eq_visitante}"
-
-                yield scrapy.Request(
-                    url,
-                    callback=self.parse_acta,
-                    meta={"id_grupo" : id_grupo,
-                          "id_local" : id_local,
-                          "id_visitante" : id_visitante}
-                )
+        params.append(hoy)
+
+        conn = await en_hilo(obtener_conexion, self.name)
+        cur = conn.cursor(name="seed_actas")
+        try:
+            await en_hilo(cur.execute, sql, params)
+            while True:
+                filas = await en_hilo(cur.fetchmany, LOTE_SEMILLA)
+                if not filas:
+                    break
+
+                for (slug_competicion, abreviatura, slug_grupo, id_grupo,
+                     eq_local, eq_visitante, id_local, id_visitante,
+                     fecha_partido, estado_partido) in filas:
+                    if clave_checkpoint(id_grupo, id_local, id_visitante) in completados:
+                        continue
+
+                    url = f"https://www.fcf.cat/acta/{self.temporada_ruta}/futbol-11/{slug_competicion}/{slug_grupo}/{abreviatura}/{eq_local}/{abreviatura}/{eq_visitante}"
+
+                    yield scrapy.Request(
+                        url,
+                        callback=callback,
+                        priority=prioridad_acta(fecha_partido, estado_partido, hoy),
+                        meta={"id_grupo" : id_grupo,
+                              "id_local" : id_local,
+                              "id_visitante" : id_visitante}
+                    )
+        finally:
+            await en_hilo(cerrar_semilla, conn, cur)
 
     def extraer_estado(self, texto):
         if not texto:
@@ -82,164 +300,133 @@ class ActasSpider(scrapy.Spider):
         
         return "Pendiente"
     
+    # -----------------------------
+    # SECCIONES DEL ACTA. Cada backend solo lee los textos crudos de cada
+    # fila; los campos los construyen los *_de_filas / *_de_fila comunes.
+    # parse_* reciben una SelectorList con todas las tablas de la sección,
+    # parse_*_lxml una lista de elementos lxml (parse_goles*, una sola tabla)
+    # -----------------------------
     def parse_jugadores(self, tabla):
-        jugadores = []
-
-        for row in tabla.xpath('.//tbody/tr'):
-            texto = row.xpath('.//td[2]/a/text()').get()
-
-            if texto:
-                if "," in texto:
-                    partes = [p.strip() for p in texto.split(',')]
-                    apellidos = partes[0]
-                    nombre = partes[1]
-                else:
-                    apellidos = ""
-                    nombre = texto
-
-                dorsal = row.xpath('.//td[1]/span/text()').get()
-
-                jugadores.append({
-                    "nombre": nombre,
-                    "apellidos": apellidos,
-                    "dorsal" : dorsal
-                })
-
-        return jugadores
+        return jugadores_de_filas(
+            (row.xpath('.//td[2]/a/text()').get(), row.xpath('.//td[1]/span/text()').get())
+            for row in tabla.xpath('.//tbody/tr')
+        )
 
     def parse_equip_tecnic(self, tabla):
-        equipo_tecnico = []
+        return staff_de_filas(
+            (row.xpath('normalize-space(.//td[1])').get(), row.xpath('.//td[2]//span/@class').get())
+            for row in tabla.xpath('.//tbody/tr')
+        )
 
-        for row in tabla.xpath('.//tbody/tr'):
-            texto = row.xpath('normalize-space(.//td[1])').get()
-
-            if "," in texto:
-                partes = [p.strip() for p in texto.split(',')]
-                apellidos = partes[0]
-                nombre = partes[1]
-            else:
-                apellidos = ""
-                nombre = texto
-
-            # Obtener rol según la clase del span
-            rol = row.xpath('.//td[2]//span/@class').get()
-            rol_formateado = rol.capitalize() if rol else ""
-
-            equipo_tecnico.append({
-                "nombre": nombre,
-                "apellidos": apellidos,
-                "rol": rol_formateado
-            })
-
-        return equipo_tecnico
-    
     def parse_goles(self, tabla, escudo_local, escudo_visitante, id_local, id_visitante):
         goles = []
-
         for row in tabla.xpath('.//tbody/tr'):
-            tipo_raw = row.xpath('.//div[@class="gol"]//div[contains(@class, "gol-")]/@class').get()
-            tipo = "Normal"
-
-            if tipo_raw:
-                if "gol-penal" in tipo_raw:
-                    tipo = "Penal"
-                elif "gol-propia" in tipo_raw:
-                    tipo = "Propia"
-                else:
-                    tipo = "Normal"
-
-            # --- Jugador ---
-            texto = row.xpath('.//td[3]/a/text()').get()
-            texto = texto.strip() if texto else ""
-
-            if "," in texto:
-                partes = [p.strip() for p in texto.split(',')]
-                apellidos = partes[0]
-                nombre = partes[1]
-            else:
-                apellidos = ""
-                nombre = texto
-
-            # --- Minuto ---
-            minuto = row.xpath('./td[last()]/text()').get()
-            minuto = minuto.replace("'", "").strip() if minuto else ""
-
-            escudo_gol = row.xpath(
-                './/img[contains(@class, "acta-escut-gol")]/@src'
-            ).get()
-
-            escudo_gol_norm = self.normalizar_escudo(escudo_gol)
-
-            if escudo_gol_norm == escudo_local:
-                id_equipo = id_local
-
-            elif escudo_gol_norm == escudo_visitante:
-                id_equipo = id_visitante
-
-            else:
-                id_equipo = None
-
-            goles.append({
-                "tipo": tipo,
-                "nombre": nombre,
-                "apellidos": apellidos,
-                "minuto": minuto,
-                "id_equipo":id_equipo
-            })
-
+            escudo_gol = row.xpath('.//img[contains(@class, "acta-escut-gol")]/@src').get()
+            goles.append(gol_de_fila(
+                row.xpath('.//div[@class="gol"]//div[contains(@class, "gol-")]/@class').get(),
+                row.xpath('.//td[3]/a/text()').get(),
+                row.xpath('./td[last()]/text()').get(),
+                self.equipo_del_gol(escudo_gol, escudo_local, escudo_visitante, id_local, id_visitante),
+            ))
         return goles
-    
+
     def parse_tarjetas(self, tabla):
-        tarjetas = []
-        for row in tabla.xpath('.//tbody/tr'):
-            # --- Jugador ---
-            texto = row.xpath('.//a/text()').get()
-            texto = texto.strip() if texto else ""
-
-            if "," in texto:
-                partes = [p.strip() for p in texto.split(',')]
-                apellidos = partes[0]
-                nombre = partes[1]
-            else:
-                apellidos = ""
-                nombre = texto
-
-            # --- Tipo de tarjeta ---
-            tarjeta_raw = row.xpath('.//div[@class="acta-stat-box"]/*[contains(@class, "groga") or contains(@class, "vermella")]/@class').get()
-
-            tipo = "Desconocida"
-
-            if tarjeta_raw:
-                if "groga-2" in tarjeta_raw:
-                    tipo = "Segona Groga"     # Segunda amarilla
-                elif "groga" in tarjeta_raw:
-                    tipo = "Groga"            # Amarilla
-                elif "vermella" in tarjeta_raw:
-                    tipo = "Vermella"         # Roja directa
-
-            # --- Minuto ---
-            minuto_raw = row.xpath('.//div[@class="acta-minut-targeta"]/text()').get()
-
-            if minuto_raw:
-                minuto = minuto_raw.replace("'", "").strip()
-            else:
-                minuto = None
-
-            dorsal = row.xpath('.//td[1]/span/text()').get()
-
-            tarjetas.append({
-                "nombre": nombre,
-                "apellidos": apellidos,
-                "tipo": tipo,
-                "minuto": minuto,
-                "dorsal":dorsal
-            })
-
-        return tarjetas
-    
+        return [
+            tarjeta_de_fila(
+                row.xpath('.//a/text()').get(),
+                row.xpath('.//div[@class="acta-stat-box"]/*[contains(@class, "groga") or contains(@class, "vermella")]/@class').get(),
+                row.xpath('.//div[@class="acta-minut-targeta"]/text()').get(),
+                row.xpath('.//td[1]/span/text()').get(),
+            )
+            for row in tabla.xpath('.//tbody/tr')
+        ]
+
+    @staticmethod
+    def _filas(tablas):
+        return [row for tabla in tablas for row in XP_FILAS(tabla)]
+
+    def parse_jugadores_lxml(self, tablas):
+        return jugadores_de_filas(
+            (primero(XP_JUGADOR(row)), primero(XP_DORSAL(row)))
+            for row in self._filas(tablas)
+        )
+
+    def parse_equip_tecnic_lxml(self, tablas):
+        return staff_de_filas(
+            (XP_STAFF_NOMBRE(row), primero(XP_STAFF_ROL(row)))
+            for row in self._filas(tablas)
+        )
+
+    def parse_goles_lxml(self, tabla, escudo_local, escudo_visitante, id_local, id_visitante):
+        goles = []
+        for row in XP_FILAS(tabla):
+            escudo_gol = primero(XP_GOL_ESCUDO(row))
+            goles.append(gol_de_fila(
+                primero(XP_GOL_TIPO(row)),
+                primero(XP_GOL_JUGADOR(row)),
+                primero(XP_GOL_MINUTO(row)),
+                self.equipo_del_gol(escudo_gol, escudo_local, escudo_visitante, id_local, id_visitante),
+            ))
+        return goles
+
+    def parse_tarjetas_lxml(self, tablas):
+        return [
+            tarjeta_de_fila(
+                primero(XP_TARJETA_JUGADOR(row)),
+                primero(XP_TARJETA_TIPO(row)),
+                primero(XP_TARJETA_MINUTO(row)),
+                primero(XP_DORSAL(row)),
+            )
+            for row in self._filas(tablas)
+        ]
+
+    def equipo_del_gol(self, escudo_gol, escudo_local, escudo_visitante, id_local, id_visitante):
+        escudo_gol_norm = self.normalizar_escudo(escudo_gol)
+        if escudo_gol_norm == escudo_local:
+            return id_local
+        if escudo_gol_norm == escudo_visitante:
+            return id_visitante
+        return None
+
     def normalizar_escudo(self, url):
         return url.split('/')[-1] if url else None
 
+    def clasificar_tablas(self, root, envolver=True):
+        """
+        Recorre una sola vez todas las tablas `acta-table` y las reparte por
+        sección (según el texto de la cabecera) y columna (local/visitante).
+        Devuelve {(seccion, columna): SelectorList}, con columna None para
+        las secciones que se buscan en todo el documento. Con
+        envolver=False, listas de elementos lxml (backend lxml).
+        """
+        columnas_local = set(XP_COLUMNAS_LOCAL(root))
+        columnas_visitante = set(XP_COLUMNAS_VISITANTE(root))
+
+        tablas = {}
+        for tabla in XP_TABLAS(root):
+            cabeceras = [th.text or "" for th in XP_CABECERAS(tabla)]
+
+            destinos = []
+            for seccion in SECCIONES_GLOBALES:
+                if any(seccion in texto for texto in cabeceras):
+                    destinos.append((seccion, None))
+
+            secciones = [s for s in SECCIONES_COLUMNA if any(s in texto for texto in cabeceras)]
+            if secciones:
+                columnas = XP_COLUMNAS_TABLA(tabla)
+                for seccion in secciones:
+                    if any(c in columnas_local for c in columnas):
+                        destinos.append((seccion, "local"))
+                    if any(c in columnas_visitante for c in columnas):
+                        destinos.append((seccion, "visitante"))
+
+            if destinos:
+                nodo = Selector(root=tabla, type="html") if envolver else tabla
+                for destino in destinos:
+                    tablas.setdefault(destino, SelectorList() if envolver else []).append(nodo)
+
+        return tablas
+
     def parse_acta(self, response):
         item = ActasItem()
 
@@ -249,25 +436,20 @@ class ActasSpider(scrapy.Spider):
 
         item["id_local"] = id_local
         item["id_visitante"] = id_visitante
+
+        root = response.selector.root
+        lxml = backend_del_spider(self) == "lxml"
+        tablas = self.clasificar_tablas(root, envolver=not lxml)
+        vacia = [] if lxml else SelectorList()
         # -----------------------------
         # ESCUDOS
         # -----------------------------
-        escudo_local = response.xpath(
-            '//div[@class="acta-head"]/div[contains(@class, "acta-escut")][1]/a/img/@src'
-        ).get()
-
-        escudo_visitante = response.xpath(
-            '//div[@class="acta-head"]/div[contains(@class, "acta-escut")][last()]/a/img/@src'
-        ).get()
-
-        escudo_local_norm = self.normalizar_escudo(escudo_local)
-        escudo_visitante_norm = self.normalizar_escudo(escudo_visitante)
+        escudo_local_norm = self.normalizar_escudo(primero(XP_ESCUDO_LOCAL(root)))
+        escudo_visitante_norm = self.normalizar_escudo(primero(XP_ESCUDO_VISITANTE(root)))
         # -----------------------------
         # FECHA Y HORA
         # -----------------------------
-        texto_fecha_hora = response.xpath(
-            '//div[contains(@class, "print-acta-data")]/text()'
-        ).get()
+        texto_fecha_hora = primero(XP_FECHA_HORA(root))
 
         fecha = None
         hora = None
@@ -285,14 +467,14 @@ class ActasSpider(scrapy.Spider):
         # -----------------------------
         # ESTADO DEL PARTIDO
         # -----------------------------
-        raw_estado = response.xpath('//div[@class="acta-estat"]/span/text()').get()
+        raw_estado = primero(XP_ESTADO(root))
         raw_estado = raw_estado.strip() if raw_estado else None
         item["estado"] = self.extraer_estado(raw_estado)
 
         # -----------------------------
         # RESULTADO
         # -----------------------------
-        resultado = response.xpath('//div[@class="acta-marcador"]/span/text()').get()
+        resultado = primero(XP_RESULTADO(root))
 
         goles_local = None
         goles_visitante = None
@@ -312,11 +494,12 @@ class ActasSpider(scrapy.Spider):
         # -----------------------------
         # ESTADIO
         # -----------------------------
-        tabla_estadi = response.xpath(
-            '//table[@class="acta-table"][thead/tr/th[contains(text(), "Estadi")]]'
-        )
+        tabla_estadi = tablas.get(("Estadi", None), vacia)
 
-        url_estadio = tabla_estadi.xpath('.//tbody//a[1]/@href').get()
+        if lxml:
+            url_estadio = primero_en(XP_ESTADIO_URL, tabla_estadi)
+        else:
+            url_estadio = tabla_estadi.xpath('.//tbody//a[1]/@href').get()
         codigo_estadio = None
 
         if url_estadio:
@@ -329,28 +512,33 @@ class ActasSpider(scrapy.Spider):
         # -----------------------------
         # ÁRBITRO PRINCIPAL
         # -----------------------------
-        tabla_arbitres = response.xpath(
-            '//table[@class="acta-table"][thead/tr/th[contains(text(), "Àrbitres")]]'
-        )
+        tabla_arbitres = tablas.get(("Àrbitres", None), vacia)
 
-        primer_arbitro = tabla_arbitres.xpath('.//tbody/tr[1]')
+        if lxml:
+            primer_arbitro = [fila for tabla in tabla_arbitres for fila in XP_ARBITRO_FILA(tabla)]
+        else:
+            primer_arbitro = tabla_arbitres.xpath('.//tbody/tr[1]')
 
         nombre_arbitro = None
         apellidos_arbitro = None
         delegacion = None
 
         # Nombre completo
-        arbitro = primer_arbitro.xpath('.//td[2]/text()').get()
+        if lxml:
+            arbitro = primero_en(XP_ARBITRO_NOMBRE, primer_arbitro)
+        else:
+            arbitro = primer_arbitro.xpath('.//td[2]/text()').get()
 
         if arbitro:
             arbitro = arbitro.strip()
             if "," in arbitro:
-                ap, nom = [p.strip() for p in arbitro.split(",", 1)]
-                apellidos_arbitro = ap
-                nombre_arbitro = nom
+                nombre_arbitro, apellidos_arbitro = separar_nombre(arbitro, 1)
 
         # Delegación
-        deleg = primer_arbitro.xpath('.//td[2]/span/text()').get()
+        if lxml:
+            deleg = primero_en(XP_ARBITRO_DELEGACION, primer_arbitro)
+        else:
+            deleg = primer_arbitro.xpath('.//td[2]/span/text()').get()
         if deleg:
             delegacion = deleg.strip("()")
 
@@ -358,117 +546,79 @@ class ActasSpider(scrapy.Spider):
         item["apellidos_arbitro"] = apellidos_arbitro
         item["delegacion_arbitro"] = delegacion
 
-        col_local = response.xpath('//div[contains(@class, "col-md-4")][1]')
-        col_visitante = response.xpath('//div[contains(@class, "col-md-4")][last()]')
-
-        # -----------------------------
-        # TITULARES
-        # -----------------------------
-        jugadores_local = []
-        jugadores_visitante = []
-
-        tabla_jugadores_local = col_local.xpath(
-            './/table[@class="acta-table"][thead/tr/th[contains(text(), "Titulars")]]'
-        )
-
-        if tabla_jugadores_local:
-            jugadores_local = self.parse_jugadores(tabla_jugadores_local)
-
-        tabla_jugadores_visitante = col_visitante.xpath(
-            './/table[@class="acta-table"][thead/tr/th[contains(text(), "Titulars")]]'
-        )
-
-        if tabla_jugadores_visitante:
-            jugadores_visitante = self.parse_jugadores(tabla_jugadores_visitante)
-
-        item['jugadores_local'] = jugadores_local
-        item['jugadores_visitante'] = jugadores_visitante
-
         # -----------------------------
-        # SUPLENTES
+        # TITULARES, SUPLENTES, CUERPO TÉCNICO Y TARJETAS (por columna)
         # -----------------------------
-        suplentes_local = []
-        suplentes_visitante = []
-
-        tablas_suplentes_local = col_local.xpath(
-            './/table[@class="acta-table"][thead/tr/th[contains(text(), "Suplents")]]'
-        )
-
-        if tablas_suplentes_local:
-            suplentes_local = self.parse_jugadores(tablas_suplentes_local)
-
-        tablas_suplentes_visitante = col_visitante.xpath(
-            './/table[@class="acta-table"][thead/tr/th[contains(text(), "Suplents")]]'
-        )
-
-        if tablas_suplentes_visitante:
-            suplentes_visitante = self.parse_jugadores(tablas_suplentes_visitante)
-
-        item['suplentes_local'] = suplentes_local
-        item['suplentes_visitante'] = suplentes_visitante
-
-        # -----------------------------
-        # CUERPO TÉCNICO
-        # -----------------------------
-        staff_local = []
-        staff_visitante = []
-
-        tablas_staff_local = col_local.xpath(
-            './/table[@class="acta-table"][thead/tr/th[contains(text(), "Equip Tècnic")]]'
-        )
-
-        if tablas_staff_local:
-            staff_local = self.parse_equip_tecnic(tablas_staff_local)
-
-        tablas_staff_visitante = col_visitante.xpath(
-            './/table[@class="acta-table"][thead/tr/th[contains(text(), "Equip Tècnic")]]'
-        )
-
-        if tablas_staff_visitante:
-            staff_visitante = self.parse_equip_tecnic(tablas_staff_visitante)
-
-        item['staff_local'] = staff_local
-        item['staff_visitante'] = staff_visitante
+        if lxml:
+            parsers = {
+                "Titulars": ("jugadores", self.parse_jugadores_lxml),
+                "Suplents": ("suplentes", self.parse_jugadores_lxml),
+                "Equip Tècnic": ("staff", self.parse_equip_tecnic_lxml),
+                "Targetes": ("tarjetas", self.parse_tarjetas_lxml),
+            }
+        else:
+            parsers = {
+                "Titulars": ("jugadores", self.parse_jugadores),
+                "Suplents": ("suplentes", self.parse_jugadores),
+                "Equip Tècnic": ("staff", self.parse_equip_tecnic),
+                "Targetes": ("tarjetas", self.parse_tarjetas),
+            }
+
+        for seccion, (campo, parser) in parsers.items():
+            for columna in ("local", "visitante"):
+                tabla = tablas.get((seccion, columna))
+                item[f"{campo}_{columna}"] = parser(tabla) if tabla else []
 
         # -----------------------------
         # GOLES
         # -----------------------------
-        tablas_goles = response.xpath(
-            '//table[@class="acta-table"][thead/tr/th[contains(text(), "Gols")]]'
-        )
+        tablas_goles = tablas.get(("Gols", None), vacia)
 
         goles = []
 
         if len(tablas_goles) == 0:
-            print("⚠️ No hay tablas de goles en este partido.")
+            self.logger.debug("No hay tablas de goles en este partido.")
         elif len(tablas_goles) == 1:
-            goles = self.parse_goles(tablas_goles[0], escudo_local_norm, escudo_visitante_norm, id_local, id_visitante)
+            parse_goles = self.parse_goles_lxml if lxml else self.parse_goles
+            goles = parse_goles(tablas_goles[0], escudo_local_norm, escudo_visitante_norm, id_local, id_visitante)
 
         item['goles'] = goles
 
-        # -----------------------------
-        # TARJETAS
-        # -----------------------------
-        tarjetas_local = []
-        tarjetas_visitante = []
-
-        tablas_tarjetas_local = col_local.xpath(
-            './/table[@class="acta-table"][thead/tr/th[contains(text(), "Targetes")]]'
-        )
-
-        if tablas_tarjetas_local:
-            tarjetas_local = self.parse_tarjetas(tablas_tarjetas_local)
-
-        tablas_tarjetas_visitante = col_visitante.xpath(
-            './/table[@class="acta-table"][thead/tr/th[contains(text(), "Targetes")]]'
-        )
-
-        if tablas_tarjetas_visitante:
-            tarjetas_visitante = self.parse_tarjetas(tablas_tarjetas_visitante)
-
-        item['tarjetas_local'] = tarjetas_local
-        item['tarjetas_visitante'] = tarjetas_visitante
-
         yield item
 
-       
\ No newline at end of file
+    async def parse_acta_en_pool(self, response):
+        """
+        parse_acta en un proceso del pool: el reactor solo envía el cuerpo y
+        recibe un dict, así que mientras un proceso parsea se sigue
+        descargando y los demás procesos parsean otras actas.
+        """
+        meta = {clave: response.meta[clave] for clave in ("id_grupo", "id_local", "id_visitante")}
+        datos = await en_pool(self.pool, parsear_acta_aislada, response.url, response.body,
+                              response.encoding, meta, backend_del_spider(self))
+        if datos is None:
+            self.crawler.stats.inc_value("actas/sin_item_en_pool")
+            self.logger.warning("[ACTA] %s: el parseo no ha dado ningún item", response.url)
+            return
+        self.crawler.stats.inc_value("actas/parseadas_en_pool")
+        yield ActasItem(datos)
+
+
+# Spiders de cada proceso del pool, uno por backend (sin crawler: solo se
+# usan sus parsers)
+_spiders_aislados = {}
+
+
+def parsear_acta_aislada(url, body, encoding, meta, backend="selector"):
+    """
+    Parsea un acta en un proceso del pool con el mismo código que
+    ActasSpider.parse_acta y devuelve el item como dict, o None si no ha
+    salido ninguno.
+    """
+    spider = _spiders_aislados.get(backend)
+    if spider is None:
+        spider = _spiders_aislados[backend] = ActasSpider(backend=backend)
+
+    request = scrapy.Request(url, meta=meta)
+    response = HtmlResponse(url, body=body, encoding=encoding, request=request)
+    item = next(spider.parse_acta(response), None)
+    return dict(item) if item is not None else None
@@ -1,23 +1,48 @@
 import scrapy
 import re
+from lxml import etree
 from urllib.parse import urljoin
-from db.connection import get_connection
-from ..items import CalendarioItem
+from db.connection import obtener_conexion, liberar_conexion
+from db.checkpoints import clave_checkpoint
+from ..items import CalendarioCompletoItem, CalendarioItem
+from ..hilos import en_hilo
+from ..checkpoints import checkpoints_del_spider
+from ..shards import en_shard, shard_del_spider
+from ..extraccion import backend_del_spider, html, primero
 from scrapy import signals
 
+# Backend lxml
+XP_TABLAS = etree.XPath('//table[contains(@class,"calendaritable")]')
+XP_CABECERAS = etree.XPath('./thead/tr/th/text()', smart_strings=False)
+XP_FILAS = etree.XPath('./tbody/tr')
+XP_CELDAS = etree.XPath('./td')
+XP_HREF = etree.XPath('.//a/@href', smart_strings=False)
+
 class CalendarioSpider(scrapy.Spider):
     name = "calendario"
+    # Al reanudar, start() siembra de nuevo todo lo que no tiene checkpoint:
+    # sin JOBDIR (ver cli.jobdir)
+    siembra_desde_checkpoints = True
     
-    def __init__(self, temporada="2025-2026", temporada_ruta="2526", *args, **kwargs):
+    def __init__(self, temporada="2025-2026", temporada_ruta="2526", grupos=None, backend=None,
+                 *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.temporada = temporada
         self.temporada_ruta = temporada_ruta
+        # "selector" o "lxml" (ver extraccion.py); None → FCF_EXTRACCION
+        self.backend = backend
+
+        # Opcional: limitar a unos grupos (lista o "1,2,3"); lo usa también
+        # el pipeline para precargar solo sus equipos
+        if isinstance(grupos, str):
+            grupos = grupos.split(",")
+        self.ids_grupo = [int(g) for g in grupos] if grupos else None
 
-    def start_requests(self):
+    def cargar_grupos(self):
         """
         Cargar todos los grupos desde SQL con su slug, nº de grupo y slug de competición.
         """
-        conn = get_connection()
+        conn = obtener_conexion(self.name)
         cur = conn.cursor()
 
         sql = """
@@ -26,13 +51,26 @@ class CalendarioSpider(scrapy.Spider):
         FROM public.grupos g
         JOIN public.competiciones c ON c.id_competicion = g.id_competicion
         """
+        params = ()
+        if self.ids_grupo:
+            sql += " WHERE g.id_grupo = ANY(%s)"
+            params = (self.ids_grupo,)
 
-        cur.execute(sql)
+        cur.execute(sql, params)
         grupos = cur.fetchall()
         cur.close()
-        conn.close()
+        liberar_conexion(conn)
+        return grupos
+
+    async def start(self):
+        """Al reanudar (--resume) se saltan los grupos ya escritos."""
+        completados = await en_hilo(checkpoints_del_spider, self)
+        shard = shard_del_spider(self)
+        grupos = await en_hilo(self.cargar_grupos)
 
         for id_grupo, nro, comp_slug in grupos:
+            if clave_checkpoint(id_grupo) in completados or not en_shard(id_grupo, shard):
+                continue
             url = f"https://www.fcf.cat/calendari/{self.temporada_ruta}/futbol-11/{comp_slug}/grup-{nro}"
 
             yield scrapy.Request(
@@ -50,44 +88,77 @@ class CalendarioSpider(scrapy.Spider):
         comp_slug = response.meta["competicion_slug"]
         nro_grupo = response.meta["numero_grupo"]
 
-        tablas = response.xpath('//table[contains(@class,"calendaritable")]')
+        self.crawler.stats.inc_value(
+            "calendario/tiempo_descarga", response.meta.get("download_latency", 0)
+        )
+
+        if backend_del_spider(self) == "lxml":
+            tablas = XP_TABLAS(response.selector.root)
+            cabeceras, filas, celdas, html_fila = XP_CABECERAS, XP_FILAS, XP_CELDAS, html
+
+            def href(td):
+                return primero(XP_HREF(td))
+        else:
+            tablas = response.xpath('//table[contains(@class,"calendaritable")]')
+
+            def cabeceras(tabla):
+                return tabla.xpath('./thead/tr/th/text()').getall()
+
+            def filas(tabla):
+                return tabla.xpath('./tbody/tr')
+
+            def celdas(row):
+                return row.xpath("./td")
+
+            def href(td):
+                return td.xpath(".//a/@href").get()
+
+            def html_fila(row):
+                return row.get()
+
         link_acta = False
+        emitidas = 0
 
         for tabla in tablas:
-            ths = tabla.xpath('./thead/tr/th/text()').getall()
+            ths = cabeceras(tabla)
             jornada = int(ths[0].replace("Jornada", "").strip())
-            print(f"[JORNADA] Jornada: {jornada}")
-            rows = tabla.xpath('./tbody/tr')
+            self.logger.debug("[JORNADA] Jornada: %s", jornada)
+            rows = filas(tabla)
 
             for row in rows:
-                tds = row.xpath("./td")
+                tds = celdas(row)
                 item = CalendarioItem()
 
                 if not link_acta:
-                    acta_url = tds[3].xpath(".//a/@href").get()
+                    acta_url = href(tds[3])
                     item["slug_competicion"] = acta_url.split("/")[6]
                     item["abreviatura_competicion"] = acta_url.split("/")[8] 
                     link_acta=True
 
                 if len(tds) != 7:
-                    print("[WARN] Fila inesperada:", row.get())
+                    self.logger.warning("[WARN] Fila inesperada: %s", html_fila(row))
 
                 item["id_grupo"] = id_grupo
                 item["jornada"] = jornada
                 item["temporada"] = self.temporada
 
                 # LOCAL
-                local_href = tds[0].xpath(".//a/@href").get()
+                local_href = href(tds[0])
                 if not local_href:
-                    print("[WARN] Sin href local:", row.get())
+                    self.logger.warning("[WARN] Sin href local: %s", html_fila(row))
                     continue
                 item["equipo_local_slug"] = local_href.rstrip("/").split("/")[-1]
 
                 # VISITANTE
-                visitante_href = tds[6].xpath(".//a/@href").get()
+                visitante_href = href(tds[6])
                 if not visitante_href:
-                    print("[WARN] Sin href visitante:", row.get())
+                    self.logger.warning("[WARN] Sin href visitante: %s", html_fila(row))
                     continue
                 item["equipo_visitante_slug"] = visitante_href.rstrip("/").split("/")[-1]
 
-                yield item
\ No newline at end of file
+                emitidas += 1
+                yield item
+
+        # El pipeline da el grupo por escrito (checkpoint) al recibir sus
+        # `emitidas` filas, aunque lleguen mezcladas con las de otros grupos
+        yield CalendarioCompletoItem(id_grupo=id_grupo, filas=emitidas)
\ No newline at end of file
@@ -1,7 +1,9 @@
 import scrapy
 import re
-from db.connection import get_connection
+from db.connection import obtener_conexion, liberar_conexion
 from ..items import CamposItem
+from ..hilos import en_hilo
+from ..shards import en_shard, shard_del_spider
 from scrapy import signals
 
 class CamposSpider(scrapy.Spider):
@@ -10,11 +12,11 @@ class CamposSpider(scrapy.Spider):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
     
-    def start_requests(self):
+    def cargar_codigos(self):
         """
         Cargar todos los grupos desde SQL con su slug, nº de grupo y slug de competición.
         """
-        conn = get_connection()
+        conn = obtener_conexion(self.name)
         cur = conn.cursor()
 
         sql = """
@@ -26,7 +28,14 @@ class CamposSpider(scrapy.Spider):
         cur.execute(sql)
         codigos = cur.fetchall()
         cur.close()
-        conn.close()
+        liberar_conexion(conn)
+        return codigos
+
+    async def start(self):
+        codigos = await en_hilo(self.cargar_codigos)
+
+        shard = shard_del_spider(self)
+        codigos = [codigo for codigo in codigos if en_shard(codigo[0], shard)]
 
         for codigo in codigos:
             url = f"https://www.fcf.cat/camp/{codigo[0]}"
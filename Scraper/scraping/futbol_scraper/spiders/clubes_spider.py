@@ -1,27 +1,16 @@
 import scrapy
 import re
 from ..items import ClubItem
-from db.connection import get_connection
-
-# Mapeo de slugs que estan diferentes en aprtado club y equipos
-slugs_mapeo = {"jesus-y-maria-ud":"jesus-i-maria-ud",
-               "remences-ae-unio": "remences-associacio-esportiva-unio",
-               "costa-daurada-fc": "costa-daurada-salou-fc",
-               "bescano-cd": "bescano-ce",
-               "palafrugell-cf": "palafrugell-fc",
-               "efb-ulldecona":"escola-futbol-base-ulldecona-assoc",
-               "unificacion-cfsantaperpetua": "unificacion-cfsanta-perpetua",
-               "fundacio-esport-hospitalet-at": "fundacio-esporthospitalet-at",
-               "escola-f-pobla-segur-i-comarc":"escola-f-pobla-segur-i-comarca",
-               "vilaseca-cf":"vila-seca-cf",
-               "agramunt-escolagerard-gatell-cf":"agramunt-escola-gerard-gatell-cf",
-               "montroig-at":"mont-roig-at",
-               "vilanova-geltru-cf":"vilanova-i-la-geltru-cf",
-               "lleida-esportiu-club":"lleida-ponent-esportiu-club",
-               "sant-jaume-denveija-ue":"sant-jaume-denveja-ue",
-               "vila-olimpica-club-esp":"vila-olimpica-club-esportiu",
-               "alcanar-2015-escola-futbol":"escola-futbol-alcanar-2015",
-               "les-corts-de-barcelona-club-esp":"les-corts-de-barcelona-club-esportiu"}
+from ..hilos import en_hilo
+from db.connection import obtener_conexion, liberar_conexion, sesion
+from db.esquema import asegurar_slugs_clubes
+from db.slugs_clubes import (
+    cargar_sin_resolver, cargar_slugs_clubes, guardar_slugs_clubes, marcar_sin_resolver, olvidar_slug_club,
+    sembrar_slugs_clubes,
+)
+from ..shards import en_shard, shard_del_spider
+from ..normalizacion import SLUGS_CLUB_WEB
+from ..resolucion_clubes import IndiceSlugs, mismo_club, slugs_en_listado
 
 class ClubesSpider(scrapy.Spider):
     name = "clubes"
@@ -30,27 +19,151 @@ class ClubesSpider(scrapy.Spider):
         super().__init__(*args, **kwargs)
         self.temporada_ruta = temporada_ruta
 
-    def start_requests(self):
+    def cargar_slugs(self):
         """
-        Cargar todos los slugs desde la tabla Clubes en SQL y construir URLs como:
-        https://www.fcf.cat/club/{temporada_ruta}/{slug}
+        (slug, nombre_club) de la tabla clubes, el mapa slug → slug web de
+        slugs_clubes y los slugs sin ficha que aún no toca volver a buscar.
         """
-
-        conn = get_connection()
+        conn = obtener_conexion(self.name)
         cur = conn.cursor()
-        cur.execute('SELECT slug FROM public.clubes;')
+        cur.execute('SELECT slug, nombre_club FROM public.clubes;')
         rows = cur.fetchall()
         cur.close()
-        conn.close()
-
-        print(f"[CLUBES] Voy a scrapear {len(rows)} clubes")
-
-        for slug, in rows:
-            # Aplicar el mapeo si existe
-            slug_real = slugs_mapeo.get(slug, slug)
+        liberar_conexion(conn)
+
+        with sesion(self.name) as conn:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                asegurar_slugs_clubes(cur)
+                sembrar_slugs_clubes(cur, SLUGS_CLUB_WEB)
+                slugs_web = cargar_slugs_clubes(cur)
+                sin_resolver = cargar_sin_resolver(cur, self.settings.getint("FCF_CLUBES_SIN_RESOLVER_DIAS", 7))
+        return rows, slugs_web, sin_resolver
+
+    def en_bd(self, funcion, *args):
+        """funcion(cur, *args) con una conexión del pool en autocommit."""
+        with sesion(self.name) as conn:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                funcion(cur, *args)
+
+    async def start(self):
+        """
+        Cargar todos los slugs desde la tabla Clubes en SQL y construir URLs como:
+        https://www.fcf.cat/club/{temporada_ruta}/{slug}
 
-            url = f"https://www.fcf.cat/club/{self.temporada_ruta}/{slug_real}"
-            yield scrapy.Request(url, callback=self.parse_club, meta={"slug_original": slug, "slug_usable": slug_real})
+        El slug de la ficha sale de slugs_clubes; si falta alguno, antes se
+        descarga el listado de clubes para resolverlo (parse_listado). Los
+        marcados 'sin_resolver' hace poco no se piden.
+        """
+        rows, slugs_web, sin_resolver = await en_hilo(self.cargar_slugs)
+
+        shard = shard_del_spider(self)
+        rows = [row for row in rows if en_shard(row[0], shard)]
+
+        self.logger.info("[CLUBES] Voy a scrapear %d clubes", len(rows))
+
+        # Nombre en la BD de los que hay que resolver: confirma en parse_club
+        # los slugs aproximados
+        self.nombres_club = {}
+        pendientes = []
+        sin_ficha = 0
+        for slug, nombre_club in rows:
+            if slug in slugs_web:
+                self.crawler.stats.inc_value("clubes/slug_conocido")
+                yield self.request_club(slug, slugs_web[slug])
+            elif slug in sin_resolver:
+                sin_ficha += 1
+            else:
+                pendientes.append(slug)
+                self.nombres_club[slug] = nombre_club
+
+        if sin_ficha:
+            self.crawler.stats.inc_value("clubes/sin_resolver_vigente", sin_ficha)
+            self.logger.info("[CLUBES] %d clubes sin ficha en slugs_clubes ('sin_resolver'): no se piden", sin_ficha)
+
+        if not pendientes:
+            return
+
+        listado = self.settings.get("FCF_CLUBES_LISTADO")
+        if not listado:
+            for slug in pendientes:
+                yield self.request_club(slug, slug, "propio")
+            return
+
+        self.logger.info("[CLUBES] %d clubes sin slug web conocido: descargo el listado", len(pendientes))
+        yield scrapy.Request(
+            listado.format(temporada_ruta=self.temporada_ruta),
+            callback=self.parse_listado,
+            dont_filter=True,
+            meta={"pendientes": pendientes, "publicados": set()},
+        )
+
+    def request_club(self, slug, slug_web, origen="conocido"):
+        """
+        `origen`: "conocido" (de slugs_clubes), "listado", "aproximado" (a
+        confirmar con la ficha) o "propio" (con su slug, sin resolver).
+        """
+        url = f"https://www.fcf.cat/club/{self.temporada_ruta}/{slug_web}"
+        return scrapy.Request(url, callback=self.parse_club, meta={
+            "slug_original": slug, "slug_usable": slug_web, "origen": origen,
+        })
+
+    async def parse_listado(self, response):
+        pendientes = response.meta["pendientes"]
+        publicados = response.meta["publicados"]
+        publicados |= slugs_en_listado(response.xpath("//a/@href").getall())
+
+        # Listado paginado: seguir hasta la última página
+        siguiente = response.xpath("//a[@rel='next']/@href").get()
+        if siguiente:
+            yield response.follow(siguiente, callback=self.parse_listado, dont_filter=True,
+                                  meta={"pendientes": pendientes, "publicados": publicados})
+            return
+
+        if not publicados:
+            # El listado no ha dado nada (¿ha cambiado la página?): como antes,
+            # cada club con su propio slug
+            self.logger.warning("[CLUBES] Listado sin clubes en %s: pido los %d pendientes tal cual",
+                                response.url, len(pendientes))
+            for slug in pendientes:
+                yield self.request_club(slug, slug, "propio")
+            return
+
+        indice = IndiceSlugs(publicados)
+        aprendidos = []
+        aproximados = 0
+        for slug in pendientes:
+            slug_web = indice.resolver(slug)
+            if slug_web is None:
+                # Como antes del listado: se pide con su propio slug (y si da
+                # 404 queda como 'sin_resolver', ver parse_club)
+                self.crawler.stats.inc_value("clubes/slug_sin_resolver")
+                self.logger.warning("[CLUBES] %s: no está en el listado, lo pido con su slug", slug)
+                yield self.request_club(slug, slug, "propio")
+            elif slug_web == slug:
+                self.crawler.stats.inc_value("clubes/slug_listado")
+                aprendidos.append((slug, slug_web, "listado"))
+                yield self.request_club(slug, slug_web, "listado")
+            else:
+                # Parecido no es lo mismo: se guarda solo si la ficha es la
+                # del club (parse_club)
+                self.crawler.stats.inc_value("clubes/slug_aproximado")
+                self.logger.info("[CLUBES] %s → %s (a confirmar con la ficha)", slug, slug_web)
+                aproximados += 1
+                yield self.request_club(slug, slug_web, "aproximado")
+
+        if aprendidos:
+            await en_hilo(self.en_bd, guardar_slugs_clubes, aprendidos)
+
+        self.logger.info("[CLUBES] Listado: %d clubes; de %d pendientes, %d en el listado y %d aproximados",
+                         len(indice), len(pendientes), len(aprendidos), aproximados)
+
+    def nombre_en_ficha(self, response):
+        """Nombre del club en su ficha: el primer h1 o, si no hay, el título de la página."""
+        return (response.xpath("normalize-space(//h1)").get()
+                or response.xpath("normalize-space(//title)").get()
+                or None)
 
     def extraer_valor(self, texto):
         if not texto:
@@ -73,9 +186,40 @@ class ClubesSpider(scrapy.Spider):
 
         return limpio
 
-    def parse_club(self, response):
+    async def parse_club(self, response):
         slug_original = response.meta["slug_original"]
         slug_usable = response.meta["slug_usable"]
+        origen = response.meta.get("origen", "conocido")
+
+        if response.status == 404:
+            self.crawler.stats.inc_value("clubes/404")
+            if origen == "propio":
+                # Ni en el listado ni con su slug: no se busca más hasta que caduque
+                self.logger.warning("[CLUBES] 404 en %s: sin ficha, queda como 'sin_resolver'", slug_original)
+                await en_hilo(self.en_bd, marcar_sin_resolver, slug_original)
+            else:
+                # Slug web equivocado: si era aprendido, se vuelve a resolver la próxima vez
+                self.logger.warning("[CLUBES] 404 en %s (%s)", slug_usable, slug_original)
+                await en_hilo(self.en_bd, olvidar_slug_club, slug_original)
+            return
+
+        if origen == "aproximado":
+            nombre_web = self.nombre_en_ficha(response)
+            nombre_bd = self.nombres_club.get(slug_original)
+            if not mismo_club(nombre_web, nombre_bd):
+                # Ni se guarda el mapeo ni el club, y no se vuelve a probar
+                # hasta que caduque: si es correcto, que se añada a
+                # SLUGS_CLUB_WEB (normalizacion.py)
+                self.crawler.stats.inc_value("clubes/aproximado_sin_confirmar")
+                self.logger.warning("[CLUBES] %s → %s sin confirmar: la ficha es de %r y en la BD es %r",
+                                    slug_original, slug_usable, nombre_web, nombre_bd)
+                await en_hilo(self.en_bd, marcar_sin_resolver, slug_original)
+                return
+            self.crawler.stats.inc_value("clubes/aproximado_confirmado")
+            await en_hilo(self.en_bd, guardar_slugs_clubes, [(slug_original, slug_usable, "aproximado")])
+        elif origen == "propio":
+            # La próxima vez ya es conocido: no hace falta el listado
+            await en_hilo(self.en_bd, guardar_slugs_clubes, [(slug_original, slug_original, "propio")])
 
         # EXTRAER DATOS SEGÚN EL HTML REAL
         raw_delegacion = response.xpath("normalize-space(//span[contains(text(),'Delegació')]/parent::td)").get()
@@ -2,6 +2,8 @@ import scrapy
 import re
 from collections import defaultdict
 from ..items import CompeticionItem
+from ..shards import en_shard, shard_del_spider
+from ..normalizacion import slug_competicion
 
 
 class CompeticionesSpider(scrapy.Spider):
@@ -25,7 +27,8 @@ class CompeticionesSpider(scrapy.Spider):
         )
 
     def parse_competiciones(self, response):
-        self.logger.info(f"Status respuesta competiciones: {response.status}")
+        self.logger.info("Status respuesta competiciones: %s", response.status)
+        shard = shard_del_spider(self)
 
         for comp in response.css("p.competicion"):
             nombre_raw = comp.css("::text").get(default="").strip()
@@ -80,18 +83,9 @@ class CompeticionesSpider(scrapy.Spider):
                     item["nivel"] = None
 
             # -------- SLUG --------
-            item["slug"] = (
-                nombre_raw.lower()
-                .replace(" ", "-")
-                .replace("ó", "o")
-                .replace("ò", "o")
-                .replace("ú", "u")
-                .replace("ù", "u")
-                .replace("í", "i")
-                .replace("ì", "i")
-                .replace("é", "e")
-                .replace("è", "e")
-                .replace("à", "a")
-            )
+            item["slug"] = slug_competicion(nombre_raw)
 
-            yield item
+            # Con --shard cada nodo escribe solo sus competiciones; el filtro
+            # va al final para que el nivel se calcule igual en todos
+            if en_shard(item["codigo_web"], shard):
+                yield item
@@ -1,42 +1,46 @@
 import re
 import scrapy
-from db.connection import get_connection
+from lxml import etree
+from parsel.csstranslator import css2xpath
+from db.connection import obtener_conexion, liberar_conexion
 from ..items import EquipoItem
+from ..hilos import en_hilo
+from ..shards import en_shard, shard_del_spider
+from ..extraccion import backend_del_spider, primero
+from ..normalizacion import slug, slug_club_de_equipo
+
+# Backend lxml: los mismos selectores CSS de parse_grupo_page, traducidos a
+# XPath una sola vez
+XP_FILAS = etree.XPath(css2xpath("table.fcftable-e tbody tr"))
+XP_LINK_EQUIPO = etree.XPath(css2xpath("td.tl.resumida a"))
+XP_TEXTO = etree.XPath(css2xpath("::text"), smart_strings=False)
+XP_HREF_EQUIP = etree.XPath(css2xpath("td.tc.pr-0 a::attr(href)"), smart_strings=False)
 
 
 class EquiposSpider(scrapy.Spider):
     name = "equipos"
 
     def __init__(self, temporada="2025-26", temporada_ruta="2526",
-                 tipo="futbol-11", *args, **kwargs):
+                 tipo="futbol-11", backend=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.temporada = temporada              # "2025-26"
         self.temporada_ruta = temporada_ruta    # "2526" para la URL
         self.tipo = tipo                        # "futbol-11"
+        self.backend = backend                  # "selector" / "lxml" (None → FCF_EXTRACCION)
 
-    # Helpers para slugs
+    # Helpers para slugs (ver normalizacion.py)
     @staticmethod
     def normalize_slug(s: str) -> str:
-        s = s.lower().strip()
-        s = s.replace(" ", "-")
-        s = (s
-             .replace("à","a").replace("á","a").replace("ä","a")
-             .replace("è","e").replace("é","e").replace("ë","e")
-             .replace("ì","i").replace("í","i").replace("ï","i")
-             .replace("ò","o").replace("ó","o").replace("ö","o")
-             .replace("ù","u").replace("ú","u").replace("ü","u"))
-        s = re.sub(r"[^a-z0-9\-]", "", s)
-        s = re.sub(r"-+", "-", s)
-        return s
+        return slug(s)
 
     @staticmethod
     def derive_club_slug(equipo_slug: str) -> str:
         # p.ej. damm-cf-a -> damm-cf
-        return re.sub(r"-(?:[a-h]|u\d+)$", "", equipo_slug)
+        return slug_club_de_equipo(equipo_slug)
 
-    def start_requests(self):
+    def cargar_grupos(self):
         # Leer todos los grupos + slug de competición desde la BD
-        conn = get_connection()
+        conn = obtener_conexion(self.name)
         cur = conn.cursor()
         cur.execute(
             '''
@@ -54,9 +58,16 @@ class EquiposSpider(scrapy.Spider):
         )
         rows = cur.fetchall()
         cur.close()
-        conn.close()
+        liberar_conexion(conn)
+        return rows
+
+    async def start(self):
+        rows = await en_hilo(self.cargar_grupos)
+
+        shard = shard_del_spider(self)
+        rows = [row for row in rows if en_shard(row[0], shard)]
 
-        self.logger.info(f"[EQUIPOS] Voy a procesar {len(rows)} grupos para temporada {self.temporada}")
+        self.logger.info("[EQUIPOS] Voy a procesar %d grupos para temporada %s", len(rows), self.temporada)
 
         for id_grupo, num_grupo, temp, slug_grupo, slug_comp in rows:
             # Por si algún grupo no tiene slug, lo construimos:
@@ -88,14 +99,31 @@ class EquiposSpider(scrapy.Spider):
         letra = m.group(1).upper()
         return {"A": 1, "B": 2, "C": 3, "D": 4}.get(letra, 1)
 
-    def parse_grupo_page(self, response, id_grupo):
-        # Recorremos todas las filas de la tabla de clasificación
+    def filas_clasificacion(self, response):
+        """
+        (nombre, href del calendario, href del equipo) de cada fila de la
+        tabla de clasificación, con el backend del spider.
+        """
+        if backend_del_spider(self) == "lxml":
+            for row in XP_FILAS(response.selector.root):
+                links = XP_LINK_EQUIPO(row)
+                nombre = next((texto for link in links for texto in XP_TEXTO(link)), None)
+                href_cal = links[0].get("href") if links else None
+                yield nombre, href_cal, primero(XP_HREF_EQUIP(row))
+            return
+
         for row in response.css("table.fcftable-e tbody tr"):
             # Celda con el nombre del equipo (vista 'resumida')
             link = row.css("td.tl.resumida a")
-            nombre = link.css("::text").get()
-            href_cal = link.attrib.get("href")
+            yield (
+                link.css("::text").get(),
+                link.attrib.get("href"),
+                row.css("td.tc.pr-0 a::attr(href)").get(),
+            )
 
+    def parse_grupo_page(self, response, id_grupo):
+        # Recorremos todas las filas de la tabla de clasificación
+        for nombre, href_cal, href_equip in self.filas_clasificacion(response):
             if not nombre or not href_cal:
                 continue  # por si hay alguna fila rara
 
@@ -106,7 +134,6 @@ class EquiposSpider(scrapy.Spider):
             equipo_slug = href_cal.rstrip("/").split("/")[-1]
 
             # Si quieres, también puedes sacar el href de /equip/... (no obligatorio)
-            href_equip = row.css("td.tc.pr-0 a::attr(href)").get()
             # ej: https://www.fcf.cat/equip/2526/hc16/espanyol-rcd-a
             codigo_equipo = None
             if href_equip:
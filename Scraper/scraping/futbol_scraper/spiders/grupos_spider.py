@@ -1,32 +1,64 @@
 import re
 import scrapy
+from db.connection import obtener_conexion, liberar_conexion
 from ..items import GrupoItem
+from ..hilos import en_hilo
+from ..shards import en_shard, shard_del_spider
 
 class GruposSpider(scrapy.Spider):
     name = "grupos"
 
-    def __init__(self, codigo_competicion=None, temporada="21",
+    def __init__(self, codigo_competicion=None, codigos_competicion=None, temporada="21",
                  tipo="futbol-11", categoria="19308233", *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.codigo_competicion = str(codigo_competicion) if codigo_competicion else None
+        # Acepta una lista de códigos o un string "123,456"; si no se pasa
+        # ninguno se leen todas las competiciones de la BD
+        if isinstance(codigos_competicion, str):
+            codigos_competicion = codigos_competicion.split(",")
+        codigos = list(codigos_competicion or [])
+        if codigo_competicion:
+            codigos.append(codigo_competicion)
+        self.codigos_competicion = [str(c).strip() for c in codigos if str(c).strip()]
+
         self.temporada = str(temporada)
         self.tipo = tipo
         self.categoria = str(categoria)
 
-    def start_requests(self):
-        if not self.codigo_competicion:
-            self.logger.error("Debes pasar 'codigo_competicion' (CodigoWeb de la competencia).")
+    def cargar_codigos(self):
+        conn = obtener_conexion(self.name)
+        cur = conn.cursor()
+        cur.execute('SELECT codigo_web FROM public.competiciones WHERE codigo_web IS NOT NULL;')
+        rows = cur.fetchall()
+        cur.close()
+        liberar_conexion(conn)
+        return [str(r[0]) for r in rows]
+
+    async def start(self):
+        codigos = self.codigos_competicion or await en_hilo(self.cargar_codigos)
+        shard = shard_del_spider(self)
+        codigos = [c for c in codigos if en_shard(c, shard)]
+        if not codigos:
+            self.logger.error("No hay competiciones con 'codigo_web' para cargar grupos.")
             return
+
+        self.logger.info("[GRUPOS] Voy a generar grupos para %d competiciones", len(codigos))
+
         url = "https://www.fcf.cat/cargar_grupos"
-        formdata = {
-            "tipo": self.tipo,
-            "categoria": self.categoria,
-            "competicion": self.codigo_competicion,
-            "temporada": self.temporada,
-        }
-        yield scrapy.FormRequest(url=url, formdata=formdata, callback=self.parse_grupos)
-
-    def parse_grupos(self, response):
+        for codigo in codigos:
+            formdata = {
+                "tipo": self.tipo,
+                "categoria": self.categoria,
+                "competicion": codigo,
+                "temporada": self.temporada,
+            }
+            yield scrapy.FormRequest(
+                url=url,
+                formdata=formdata,
+                callback=self.parse_grupos,
+                cb_kwargs={"codigo_competicion": codigo},
+            )
+
+    def parse_grupos(self, response, codigo_competicion):
         for a in response.css("a.grupo"):
             texto = a.css("p::text").get(default="").strip()
             m = re.search(r"(\d+)", texto)
@@ -35,7 +67,7 @@ class GruposSpider(scrapy.Spider):
             slug = href.rstrip("/").split("/")[-1] or f"grup-{numero}"
 
             item = GrupoItem()
-            item["codigo_competicion"] = int(self.codigo_competicion)
+            item["codigo_competicion"] = int(codigo_competicion)
             item["numero_grupo"] = numero
             item["temporada"] = "2025-26"
             item["region"] = None  # si aparece en otra parte, lo añadimos luego
@@ -0,0 +1,10 @@
+from urllib.parse import urlparse
+
+
+def familia_url(url):
+    """
+    Familia de una URL de fcf.cat según el primer segmento de la ruta:
+    "acta", "calendari", "classificacio", "club", "camp", "cargar_grupos"...
+    """
+    ruta = urlparse(url).path.strip("/")
+    return ruta.split("/", 1)[0] or "otros"
@@ -0,0 +1,93 @@
+"""
+Paridad de los backends de extracción: los callbacks dan los mismos items
+con "selector" y con "lxml" sobre las páginas grabadas de bench/fixtures y
+sobre variantes del acta con filas y secciones incompletas.
+
+Con FCF_CORPUS_PARIDAD=DIR se comparan también todas las páginas de un
+corpus grabado (cli.py scrape ... --grabar DIR).
+
+Uso (desde Scraper/):
+    python -m pytest tests
+"""
+import os
+
+import pytest
+
+from bench.bench_parse import CASOS, crear_spider, paginas_del_caso
+from bench.paridad_extraccion import CASOS_PARIDAD, items_de
+
+# Variantes del acta: (texto del fixture, sustituto)
+VARIANTES_ACTA = {
+    "sin_goles": [
+        ('<th colspan="4">Gols</th>', '<th colspan="4">Resum</th>'),
+    ],
+    "sin_tablas": [
+        ('class="acta-table"', 'class="acta-resum"'),
+    ],
+    "filas_incompletas": [
+        # Titular sin dorsal y titular sin nombre
+        ('<td><span>35</span></td><td><a href="https://www.fcf.cat/jugador/2526/35">VIDAL ROCA, MARC',
+         '<td></td><td><a href="https://www.fcf.cat/jugador/2526/35">VIDAL ROCA, MARC'),
+        ('>MOLINA PRAT, ORIOL</a>', '></a>'),
+        # Técnico sin rol
+        ('<span class="delegat"></span>', ''),
+        # Tarjeta sin minuto y tarjeta de tipo desconocido
+        ("<div class=\"acta-minut-targeta\">55'</div>", ''),
+        ('<div class="groga-2"></div></div><div class="acta-minut-targeta">75\'',
+         '<div class="blava"></div></div><div class="acta-minut-targeta">75\''),
+        # Gol con escudo que no es de ninguno de los dos equipos, y gol
+        # sin coma en el nombre ni minuto
+        ('escuts/visitant.png"></td><td><a href="#">FONT RIBAS',
+         'escuts/altre.png"></td><td><a href="#">FONT RIBAS'),
+        (">GARCIA LOPEZ, MARC</a></td><td>77'</td>", ">GARCIA LOPEZ MARC</a></td><td></td>"),
+    ],
+}
+
+
+def paginas():
+    corpus = os.environ.get("FCF_CORPUS_PARIDAD")
+    for nombre in CASOS_PARIDAD:
+        caso = CASOS[nombre]
+        for url, body in paginas_del_caso(caso, None):
+            yield pytest.param(nombre, url, body, id=f"{nombre}-fixture")
+        if corpus:
+            for i, (url, body) in enumerate(paginas_del_caso(caso, corpus)):
+                yield pytest.param(nombre, url, body, id=f"{nombre}-corpus-{i}")
+
+
+def comparar(nombre, url, body):
+    caso = CASOS[nombre]
+    esperados = items_de(crear_spider(caso, "selector"), caso, url, body)
+    obtenidos = items_de(crear_spider(caso, "lxml"), caso, url, body)
+    assert obtenidos == esperados
+    return esperados
+
+
+@pytest.mark.parametrize("nombre, url, body", list(paginas()))
+def test_paridad(nombre, url, body):
+    assert comparar(nombre, url, body)
+
+
+@pytest.mark.parametrize("variante", sorted(VARIANTES_ACTA))
+def test_paridad_variantes_acta(variante):
+    (url, body), = paginas_del_caso(CASOS["acta"], None)
+    html = body.decode("utf-8")
+    for original, sustituto in VARIANTES_ACTA[variante]:
+        assert original in html, f"El fixture ya no contiene {original!r}"
+        html = html.replace(original, sustituto)
+
+    item, = comparar("acta", url, html.encode("utf-8"))
+
+    if variante == "sin_goles":
+        assert item["goles"] == []
+    elif variante == "sin_tablas":
+        assert item["jugadores_local"] == item["tarjetas_visitante"] == []
+        assert item["codigo_estadio"] is None
+    else:
+        assert item["jugadores_local"][0].dorsal is None
+        assert len(item["jugadores_local"]) == 10
+        assert item["staff_local"][1].rol == ""
+        assert [t.tipo for t in item["tarjetas_local"]] == ["Groga", "Desconocida", "Vermella"]
+        assert item["tarjetas_local"][0].minuto is None
+        assert [g.id_equipo for g in item["goles"]] == [10, None, 10]
+        assert item["goles"][2].minuto is None
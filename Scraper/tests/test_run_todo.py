@@ -0,0 +1,112 @@
+"""
+cli.run_todo con spiders de mentira (sin red ni BD): el reactor tiene que
+seguir vivo hasta que terminan todas las etapas, también cuando entre una
+y otra solo hay trabajo en hilos (--resume, --shard).
+
+Cada caso corre en un proceso aparte: el reactor de Twisted no se puede
+arrancar dos veces en el mismo proceso.
+
+Uso (desde Scraper/):
+    python -m pytest tests
+"""
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+ETAPAS = ["competiciones", "grupos", "equipos", "clubes", "calendarios", "actas", "campos"]
+
+# Clases de cli.py que se sustituyen
+SPIDERS_CLI = {
+    "competiciones": "CompeticionesSpider",
+    "grupos": "GruposSpider",
+    "equipos": "EquiposSpider",
+    "clubes": "ClubesSpider",
+    "calendarios": "CalendarioSpider",
+    "actas": "ActasSpider",
+    "campos": "CamposSpider",
+}
+
+
+def ejecutar(modo):
+    """Lanza run_todo en `modo`; devuelve lo que imprime."""
+    # db/config.py necesita DB_PORT aunque no haya .env; no se conecta nunca
+    entorno = {"DB_PORT": "5432", **os.environ}
+    resultado = subprocess.run(
+        [sys.executable, "-m", "tests.test_run_todo", modo],
+        cwd=RAIZ, env=entorno, capture_output=True, text=True, timeout=120,
+    )
+    assert resultado.returncode == 0, resultado.stderr
+    return resultado.stdout
+
+
+def arrancadas(salida):
+    return [linea.rsplit(" ", 1)[1] for linea in salida.splitlines()
+            if linea.startswith("[CLI][ALL] Arranca etapa ")]
+
+
+def test_sin_reanudar():
+    assert sorted(arrancadas(ejecutar("normal"))) == sorted(ETAPAS)
+
+
+def test_reanudar():
+    salida = ejecutar("reanudar")
+    assert "[CLI][ALL] Etapa competiciones ya completada en 'prueba', se salta" in salida
+    assert sorted(arrancadas(salida)) == sorted(ETAPAS[1:])
+
+
+@pytest.mark.parametrize("modo", ["shard", "shard_reanudar"])
+def test_shard(modo):
+    salida = ejecutar(modo)
+    assert sorted(arrancadas(salida)) == sorted(ETAPAS)
+    marcadas = [linea.rsplit(" ", 1)[1] for linea in salida.splitlines()
+                if linea.startswith("[PRUEBA] Etapa marcada ")]
+    assert sorted(marcadas) == sorted(ETAPAS)
+
+
+def main(modo):
+    import scrapy
+
+    import cli
+
+    for etapa, clase in SPIDERS_CLI.items():
+        nombre = getattr(cli, clase).name
+
+        async def start(self):
+            return
+            yield
+
+        setattr(cli, clase, type(clase, (scrapy.Spider,), {"name": nombre, "start": start}))
+
+    directorio = tempfile.mkdtemp()
+    cli.jobdir = lambda nombre, spider: os.path.join(directorio, nombre, spider.name)
+    cli.etapa_ya_completada = lambda nombre, spider: spider.name == "competiciones"
+    cli.shards_pendientes = lambda shard, etapas: []
+    # Corre en un hilo: se imprime al final, que no se mezcle con el resto
+    marcadas = []
+    cli.terminar_etapa_shard = lambda shard, etapa: marcadas.append(etapa)
+
+    ajustes = {
+        "ITEM_PIPELINES": {},
+        "EXTENSIONS": {},
+        "DOWNLOADER_MIDDLEWARES": {},
+        "LOG_LEVEL": "ERROR",
+        "FCF_SHARD_ESPERA": 0.01,
+    }
+    reanudar = "prueba" if modo in ("reanudar", "shard_reanudar") else None
+    shard = (0, 2, "prueba", "nodo") if modo.startswith("shard") else None
+    if modo == "shard_reanudar":
+        # Con shard, ninguna etapa se da por completada: se marcan todas
+        cli.etapa_ya_completada = lambda nombre, spider: False
+    cli.run_todo(reanudar=reanudar, ajustes=ajustes, shard=shard)
+    for etapa in marcadas:
+        print(f"[PRUEBA] Etapa marcada {etapa}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1])